@@ -271,8 +271,8 @@ export type ProductResponse = {
     title: string;
     description?: (string | null);
     price: number;
-    brand: BrandResponse;
-    category: CategoryResponse;
+    brand?: (BrandResponse | null);
+    category?: (CategoryResponse | null);
     images?: Array<Image>;
     sizes: Array<Size>;
     created_at: string;
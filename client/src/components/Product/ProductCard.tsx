@@ -3,7 +3,7 @@ import { memo } from "react";
 import PlaceHolderImage from "@/assets/placeholder_image.jpg";
 import { Link } from "react-router-dom";
 import AddToCart from "../Cart/AddToCart";
-import { handleImageError } from "@/utils/default_images";
+import { handleImageError, imageSrcSet } from "@/utils/default_images";
 import { IndianRupee } from "lucide-react";
 
 type Props = {
@@ -26,12 +26,18 @@ const ProductCard = memo(({ product }: Props) => {
 
   // Apply transformation to optimize the image.
   const imageUrl = originalImageUrl && optimizeImageUrl(originalImageUrl!);
+  const srcSet =
+    product.images && product.images.length > 0
+      ? imageSrcSet(product.images[0])
+      : undefined;
 
   return (
     <div className="card sm:w-80 md:w-96 lg:w-96 bg-base-100 border border-base-300 text-base-content shadow-xl mx-auto">
       <figure className="p-5">
         <img
           src={imageUrl || PlaceHolderImage}
+          srcSet={srcSet}
+          sizes="(min-width: 768px) 24rem, 20rem"
           alt={product.title}
           loading="lazy"
           className="w-full h-64 object-cover rounded-xl"
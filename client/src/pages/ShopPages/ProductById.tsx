@@ -9,7 +9,8 @@ import { useEffect } from "react";
 import AddToCart from "@/components/Cart/AddToCart";
 import { Carousel } from "react-responsive-carousel";
 import "react-responsive-carousel/lib/styles/carousel.min.css";
-import { handleImageError } from "@/utils/default_images";
+import { handleImageError, imageSrcSet } from "@/utils/default_images";
+import { subscribeToProduct } from "@/services/webSocketService";
 
 const ProductById = () => {
   const { productId } = useParams();
@@ -21,6 +22,12 @@ const ProductById = () => {
     window.scrollTo({ top: 0, behavior: "smooth" });
   }, []);
 
+  // Live stock and price while the page is open
+  useEffect(() => {
+    if (!productId) return;
+    return subscribeToProduct(productId);
+  }, [productId]);
+
   if (isLoading) {
     return <PageLoading />;
   }
@@ -69,6 +76,8 @@ const ProductById = () => {
             <div key={image.public_id} className="relative">
               <img
                 src={image.url}
+                srcSet={imageSrcSet(image)}
+                sizes="(min-width: 672px) 42rem, 100vw"
                 alt={`Product image ${index + 1}`}
                 className="max-h-96 w-full object-fill bg-base-300"
                 loading={index === 0 ? "eager" : "lazy"}
@@ -139,7 +148,7 @@ const ProductById = () => {
                   <div className="flex items-center gap-2">
                     <span className="badge badge-outline">Brand</span>
                     <span className="badge badge-primary">
-                      {product.brand.title}
+                      {product.brand?.title}
                     </span>
                   </div>
                   <div className="flex items-center gap-2">
@@ -147,7 +156,7 @@ const ProductById = () => {
                       <ChartBarStacked className="w-4 h-4" /> Category
                     </span>
                     <span className="badge badge-primary">
-                      {product.category.title}
+                      {product.category?.title}
                     </span>
                   </div>
                 </div>
@@ -5,8 +5,14 @@ import {
   setConnectionStatus,
   setError,
 } from "@/features/webSocketSlice";
+import {
+  OrderDeltaEvent,
+  OrderResyncResponse,
+  ProductDeltaEvent,
+} from "@/types/socketTypes";
 import { OrderResponse } from "@/client";
 import { orderApiSlice } from "@/features/orderApiSlice";
+import { productApiSlice } from "@/features/productApiSlice";
 
 // WebSocket server URL
 const ENDPOINT = "https://solestore-ecommerce-3e19.onrender.com"; // "http://127.0.0.1:8000";
@@ -14,6 +20,36 @@ const ENDPOINT = "https://solestore-ecommerce-3e19.onrender.com"; // "http://127
 // webSocketService.ts
 let socket: Socket | null = null;
 let currentToken: string | null = null;
+// Cached orders keep the version the server sent them at
+type VersionedOrder = OrderResponse & { version?: number };
+
+// Apply `update` to every cached copy of an order, in single and list queries
+const updateCachedOrder = (
+  store: Store,
+  orderId: string,
+  update: (order: VersionedOrder) => void
+) => {
+  const entries = orderApiSlice.util.selectInvalidatedBy(store.getState(), [
+    { type: "Order", id: orderId },
+  ]);
+  for (const { endpointName, originalArgs } of entries) {
+    if (endpointName === "getOrder") {
+      store.dispatch(
+        orderApiSlice.util.updateQueryData("getOrder", originalArgs, update)
+      );
+    } else if (endpointName === "getOrders") {
+      store.dispatch(
+        orderApiSlice.util.updateQueryData("getOrders", originalArgs, (orders) => {
+          const order = orders.find(({ id }) => id === orderId);
+          if (order) update(order);
+        })
+      );
+    }
+  }
+};
+
+// Products whose pages are open, rejoined after every reconnect
+const productSubscriptions = new Map<string, number>();
 
 export const initWebSocket = (store: Store, token: string | null) => {
   // Disconnect if token changes or becomes null
@@ -39,6 +75,9 @@ export const initWebSocket = (store: Store, token: string | null) => {
 
     const handleConnect = () => {
       store.dispatch(setConnectionStatus("connected"));
+      productSubscriptions.forEach((_count, productId) => {
+        socket?.emit("product-subscribe", { product_id: productId });
+      });
     };
 
     const handleDisconnect = () => {
@@ -50,9 +89,43 @@ export const initWebSocket = (store: Store, token: string | null) => {
       console.error("WebSocket error:", error);
     };
 
-    const handleOrderUpdate = (data: OrderResponse) => {
+    const handleOrderUpdate = (data: OrderDeltaEvent) => {
+      let missed = false;
+      updateCachedOrder(store, data.id, (order) => {
+        const version = order.version ?? 0;
+        if (version < data.base_version) {
+          missed = true;
+        } else if (version < data.version) {
+          // `changes` holds every field changed since base_version
+          Object.assign(order, data.changes);
+          order.version = data.version;
+        }
+      });
+      if (!missed) return;
+      // Missed an update, ask the server for the full order
+      socket?.emit(
+        "order-resync",
+        { order_id: data.id },
+        (order: OrderResyncResponse) => {
+          if (!order?.id) return;
+          updateCachedOrder(store, order.id, (cached) => {
+            if ((cached.version ?? 0) < order.version) Object.assign(cached, order);
+          });
+        }
+      );
+    };
+
+    const handleProductUpdate = (data: ProductDeltaEvent) => {
       store.dispatch(
-        orderApiSlice.util.invalidateTags([{ type: "Order", id: data.id }])
+        productApiSlice.util.updateQueryData(
+          "getProduct",
+          { productId: data.id },
+          (product) => {
+            if (data.price !== null) product.price = data.price;
+            if (data.sizes !== null) product.sizes = data.sizes;
+            product.updated_at = data.updated_at;
+          }
+        )
       );
     };
 
@@ -64,7 +137,8 @@ export const initWebSocket = (store: Store, token: string | null) => {
       .on("response", (data: unknown) => {
         store.dispatch(receiveResponse(data));
       })
-      .on("order-updated", handleOrderUpdate);
+      .on("order-updated", handleOrderUpdate)
+      .on("product-updated", handleProductUpdate);
 
     // Return cleanup with connection check
     return () => {
@@ -82,3 +156,25 @@ export const initWebSocket = (store: Store, token: string | null) => {
   // Return empty cleanup if no connection
   return () => {};
 };
+
+// Receive live price and stock of a product while its page is open.
+// Returns the unsubscribe function.
+export const subscribeToProduct = (productId: string) => {
+  const count = productSubscriptions.get(productId) ?? 0;
+  productSubscriptions.set(productId, count + 1);
+  if (count === 0 && socket?.connected) {
+    socket.emit("product-subscribe", { product_id: productId });
+  }
+
+  return () => {
+    const remaining = (productSubscriptions.get(productId) ?? 1) - 1;
+    if (remaining > 0) {
+      productSubscriptions.set(productId, remaining);
+      return;
+    }
+    productSubscriptions.delete(productId);
+    if (socket?.connected) {
+      socket.emit("product-unsubscribe", { product_id: productId });
+    }
+  };
+};
@@ -0,0 +1,17 @@
+import { Image } from "@/client";
+
+// Re-encoded widths of a product image, see ImageRendition on the server.
+// Images uploaded before renditions existed have none.
+export type ImageRendition = {
+  width: number;
+  height: number;
+  format: string;
+  url: string;
+  public_id: string;
+};
+
+export type ImageWithRenditions = Image & {
+  width?: number | null;
+  height?: number | null;
+  renditions?: ImageRendition[];
+};
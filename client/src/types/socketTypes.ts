@@ -0,0 +1,21 @@
+import { OrderResponse, Size } from "@/client";
+
+// Payload of the "order-updated" socket event: only the changed fields.
+// `changes` applies on top of `base_version`.
+export type OrderDeltaEvent = {
+  id: string;
+  user_id: string;
+  base_version: number;
+  version: number;
+  changes: Partial<OrderResponse>;
+};
+
+export type OrderResyncResponse = OrderResponse & { version: number };
+
+// Payload of the "product-updated" socket event; null fields did not change.
+export type ProductDeltaEvent = {
+  id: string;
+  price: number | null;
+  sizes: Size[] | null;
+  updated_at: string;
+};
@@ -1,4 +1,5 @@
 import PlaceHolderImage from "@/assets/placeholder_image.jpg";
+import { ImageWithRenditions } from "@/types/imageTypes";
 
 export const default_profile_img =
   "https://res.cloudinary.com/rohithashok/image/upload/w_1000,ar_1:1,c_fill,g_auto,e_art:hokusai/v1737112833/solestore_ecommerce_app/static_files/avatar_b3fhzc.png";
@@ -12,3 +13,15 @@ export const handleImageError = (
   const imgElement = e.currentTarget;
   imgElement.src = PlaceHolderImage;
 };
+
+// srcset of the WebP renditions so the browser downloads only the width it
+// displays. Undefined for images without renditions.
+export const imageSrcSet = (image: ImageWithRenditions): string | undefined => {
+  const renditions = (image.renditions ?? [])
+    .filter((rendition) => rendition.format === "webp")
+    .sort((a, b) => a.width - b.width);
+  if (renditions.length === 0) return undefined;
+  return renditions
+    .map((rendition) => `${rendition.url} ${rendition.width}w`)
+    .join(", ");
+};
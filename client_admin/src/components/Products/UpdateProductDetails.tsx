@@ -42,8 +42,8 @@ const UpdateProductDetails = memo(({ product }: Props) => {
     title: product.title || "",
     description: product.description || "",
     price: product.price || 0,
-    brand: product.brand.id || "",
-    category: product.category.id || "",
+    brand: product.brand?.id || "",
+    category: product.category?.id || "",
   };
 
   const [productDetails, setProductDetails] =
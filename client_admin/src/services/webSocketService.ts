@@ -7,6 +7,7 @@ import {
 } from "@/features/webSocketSlice";
 import { ordersApiSlice } from "@/features/orderApiSlice";
 import { OrderResponse } from "@/client";
+import { OrderDeltaEvent, OrderResyncResponse } from "@/types/socketTypes";
 // import { OrderResponse } from "@/client";
 // import { ordersApiSlice } from "@/features/orderApiSlice";
 // WebSocket server URL
@@ -15,6 +16,39 @@ const ENDPOINT = "https://solestore-ecommerce-3e19.onrender.com"; // "http://127
 // webSocketService.ts
 let socket: Socket | null = null;
 let currentToken: string | null = null;
+// Cached orders keep the version the server sent them at
+type VersionedOrder = OrderResponse & { version?: number };
+
+// Apply `update` to every cached copy of an order, in single and list queries
+const updateCachedOrder = (
+  store: Store,
+  orderId: string,
+  update: (order: VersionedOrder) => void
+) => {
+  const entries = ordersApiSlice.util.selectInvalidatedBy(store.getState(), [
+    { type: "Order", id: orderId },
+  ]);
+  for (const { endpointName, originalArgs } of entries) {
+    if (endpointName === "getOrder") {
+      store.dispatch(
+        ordersApiSlice.util.updateQueryData("getOrder", originalArgs, update)
+      );
+    } else if (endpointName === "getOrders") {
+      store.dispatch(
+        ordersApiSlice.util.updateQueryData("getOrders", originalArgs, (orders) => {
+          const index = orders.findIndex(({ id }) => id === orderId);
+          if (index === -1) return;
+          update(orders[index]);
+          // Drop it from lists filtered on a status it no longer has
+          const status = originalArgs?.order_status;
+          if (status && orders[index].order_status !== status) {
+            orders.splice(index, 1);
+          }
+        })
+      );
+    }
+  }
+};
 
 export const initWebSocket = (store: Store, token: string | null) => {
   // Disconnect if token changes or becomes null
@@ -51,13 +85,33 @@ export const initWebSocket = (store: Store, token: string | null) => {
       console.error("WebSocket error:", error);
     };
 
-    const handleOrderUpdate = (data: OrderResponse) => {
-      store.dispatch(
-        ordersApiSlice.util.invalidateTags([{ type: "Order", id: data.id }])
+    const handleOrderUpdate = (data: OrderDeltaEvent) => {
+      let missed = false;
+      updateCachedOrder(store, data.id, (order) => {
+        const version = order.version ?? 0;
+        if (version < data.base_version) {
+          missed = true;
+        } else if (version < data.version) {
+          // `changes` holds every field changed since base_version
+          Object.assign(order, data.changes);
+          order.version = data.version;
+        }
+      });
+      if (!missed) return;
+      // Missed an update, ask the server for the full order
+      socket?.emit(
+        "order-resync",
+        { order_id: data.id },
+        (order: OrderResyncResponse) => {
+          if (!order?.id) return;
+          updateCachedOrder(store, order.id, (cached) => {
+            if ((cached.version ?? 0) < order.version) Object.assign(cached, order);
+          });
+        }
       );
     };
 
-    const handleNewOrder = (data: OrderResponse) => {
+    const handleNewOrder = (data: OrderResponse & { version: number }) => {
       console.log("New order received:", data);
 
       store.dispatch(
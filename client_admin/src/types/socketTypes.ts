@@ -0,0 +1,13 @@
+import { OrderResponse } from "@/client";
+
+// Payload of the "order-updated" socket event: only the changed fields.
+// `changes` applies on top of `base_version`.
+export type OrderDeltaEvent = {
+  id: string;
+  user_id: string;
+  base_version: number;
+  version: number;
+  changes: Partial<OrderResponse>;
+};
+
+export type OrderResyncResponse = OrderResponse & { version: number };
@@ -1,3 +1,4 @@
+import logging
 from app.admin_app.admin_models.admin import Admin, AdminCreateRequest, AdminRole, AdminResponse
 from beanie import PydanticObjectId
 from app.utilities.password_utils import hash_password, verify_password
@@ -14,7 +15,11 @@ from app.utilities.query_models import AdminQueryParams, SortByAdmin, SortOrder
 from pydantic import ValidationError
 
 from app.utilities.response_message_models import SuccessMessage
-from app.utilities.cloudinary_utils import delete_image_from_cloudinary
+from app.utilities.media_index import release_media
+from app.utilities.auth_utils import ADMIN_PRINCIPAL
+from app.utilities.principal_cache import principal_cache
+
+logger = logging.getLogger(__name__)
 
 
 async def create_admin(admin_data: dict):
@@ -38,7 +43,7 @@ async def create_admin(admin_data: dict):
         elif "email" in str(e):
             raise ValueError("Email already exists") from e
         else:
-            print("A duplicate key error occurred")
+            logger.error("A duplicate key error occurred")
             raise ValueError("A duplicate key error occurred") from e
 
 
@@ -330,8 +335,6 @@ async def delete_admin(admin_id: str):
                 status_code=404,
                 detail="Admin not found"
             )
-        if admin_found.profile_img_url and admin_found.profile_img_public_id:
-            await delete_image_from_cloudinary(str(admin_found.profile_img_public_id))
         result: DeleteResult = await Admin.find_one(
             Admin.id == PydanticObjectId(admin_id)
         ).delete()
@@ -341,19 +344,23 @@ async def delete_admin(admin_id: str):
                 status_code=404,
                 detail="Admin not found"
             )
+        # Only once the admin is gone
+        if admin_found.profile_img_url and admin_found.profile_img_public_id:
+            await release_media([str(admin_found.profile_img_public_id)])
+        principal_cache.invalidate((ADMIN_PRINCIPAL, admin_id))
         return SuccessMessage(
             message="Admin deleted"
         )
 
     except HTTPException as e:
-        print("Error deleting admin")
+        logger.warning("Error deleting admin")
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
 
     except Exception as e:
-        print(f"Error deleting admin: {str(e)}")
+        logger.exception("Error deleting admin: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error deleting admin"
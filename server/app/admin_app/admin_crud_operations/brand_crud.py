@@ -1,4 +1,5 @@
 '''Admin Brand crud functions'''
+import logging
 from app.model.brand_models import Brand, BrandCreateRequest
 
 from fastapi import HTTPException, status
@@ -10,6 +11,8 @@ from beanie.operators import And
 from pymongo.errors import DuplicateKeyError
 from pymongo.results import DeleteResult
 
+logger = logging.getLogger(__name__)
+
 
 async def create_brand(brand_data: BrandCreateRequest):
     '''Function to create a brand'''
@@ -94,7 +97,7 @@ async def delete_brand(brand_id: str):
 
         return {"message": "Brand deleted"}
     except HTTPException as e:
-        print("Http Exception deleting brand: ", e)
+        logger.warning("Http Exception deleting brand: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -1,4 +1,5 @@
 '''Admin Category crud functions'''
+import logging
 from app.model.category_model import Category, CategoryCreateRequest, CategoryResponse
 
 from fastapi import HTTPException, status
@@ -12,6 +13,8 @@ from pymongo.results import DeleteResult
 
 from app.utilities.response_message_models import SuccessMessage
 
+logger = logging.getLogger(__name__)
+
 
 async def create_category(category_data: CategoryCreateRequest) -> CategoryResponse:
     '''Function to create a category'''
@@ -41,7 +44,7 @@ async def create_category(category_data: CategoryCreateRequest) -> CategoryRespo
     except DuplicateKeyError as e:
         if "title" in str(e):
             raise ValueError("Category already exists") from e
-        print("A duplicate key error occurred")
+        logger.error("A duplicate key error occurred")
         raise ValueError("A duplicate key error occurred") from e
 
 
@@ -113,7 +116,7 @@ async def delete_category(category_id: str) -> SuccessMessage:
             message="Category deleted"
         )
     except HTTPException as e:
-        print("Error deleting category")
+        logger.warning("Error deleting category")
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
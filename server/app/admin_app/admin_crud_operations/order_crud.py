@@ -1,19 +1,41 @@
 '''Order admin crud operations'''
 
+import logging
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
 from bson import ObjectId
 
 from fastapi import HTTPException
 from beanie import PydanticObjectId
-from beanie.operators import And
+from beanie.odm.queries.update import UpdateResponse
+
+from app.model.order_models import (
+    Order,
+    OrderResponse,
+    OrderStatus,
+    OrderSummaryResponse,
+    OrderDeltaEvent,
+    ORDER_STATUS_DELTA_FIELDS,
+    ORDER_SUMMARY_PROJECTION,
+    ORDER_EXPORT_FIELDS,
+    ORDER_EXPORT_PROJECTION
+)
+from app.utilities.query_models import ExportFormat
+from app.crud.order_rollup_crud import record_status_change
+from app.config.socket_broadcast import broadcaster
+from app.config.env_settings import settings
 
-from app.model.order_models import Order, OrderResponse, OrderStatus
-from app.config.socket_manager import sio
+logger = logging.getLogger(__name__)
 
 
 async def get_orders_admin(
         page: int = 1,
         order_status: OrderStatus = None,
-
+        summary: bool = False
 ):
     '''Function to fetch all orders in admin'''
     try:
@@ -22,7 +44,18 @@ async def get_orders_admin(
 
         query = {}
         if order_status:
-            query["order_status"] = order_status
+            query["order_status"] = OrderStatus(order_status).value
+
+        if summary:
+            orders = await (
+                Order.get_motor_collection()
+                .find(query, projection=ORDER_SUMMARY_PROJECTION)
+                .sort("created_at", -1)
+                .skip(skip)
+                .limit(limit)
+                .to_list(length=limit)
+            )
+            return [OrderSummaryResponse.from_mongo(order) for order in orders]
 
         orders = await (
             Order.find(query, fetch_links=True)
@@ -34,13 +67,93 @@ async def get_orders_admin(
         orders_response = [OrderResponse.from_mongo(order) for order in orders]
         return orders_response
     except HTTPException as e:
-        print("Error fetching orders: ", e)
+        logger.warning("Error fetching orders: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
 
 
+EXPORT_BATCH_SIZE = 2000
+
+
+def build_export_query(
+        order_status: OrderStatus = None,
+        start: datetime = None,
+        end: datetime = None
+) -> dict:
+    '''Validate export filters and build the orders query'''
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=400,
+            detail="Start date must be before end date"
+        )
+    query = {}
+    if order_status:
+        query["order_status"] = OrderStatus(order_status).value
+    if start or end:
+        query["created_at"] = {}
+        if start:
+            query["created_at"]["$gte"] = start
+        if end:
+            query["created_at"]["$lte"] = end
+    return query
+
+
+def _export_row(order: dict) -> dict:
+    return {
+        "id": str(order["_id"]),
+        "user_id": str(order["user_id"]),
+        "razorpay_order_id": order.get("razorpay_order_id"),
+        "razorpay_payment_id": order.get("razorpay_payment_id"),
+        "amount": order.get("amount"),
+        "payment_verified": order.get("payment_verified"),
+        "order_status": order.get("order_status"),
+        "total_count": order.get("order_details", {}).get("total_count", 0),
+        "address": order.get("address"),
+        "phone": order.get("phone"),
+        "created_at": order["created_at"].isoformat(),
+        "updated_at": order["updated_at"].isoformat(),
+    }
+
+
+async def stream_orders_export(
+        query: dict,
+        export_format: ExportFormat = ExportFormat.csv
+) -> AsyncIterator[str]:
+    '''Stream orders matching the query as CSV or NDJSON, one batch at a time'''
+    cursor = (
+        Order.get_motor_collection()
+        .find(query, projection=ORDER_EXPORT_PROJECTION)
+        .sort("created_at", 1)
+        .batch_size(EXPORT_BATCH_SIZE)
+    )
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ORDER_EXPORT_FIELDS)
+    if export_format == ExportFormat.csv:
+        writer.writeheader()
+
+    rows = 0
+    try:
+        async for order in cursor:
+            row = _export_row(order)
+            if export_format == ExportFormat.csv:
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row))
+                buffer.write("\n")
+            rows += 1
+            # Flush once per server batch so memory stays bounded
+            if rows % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        await cursor.close()
+
+
 async def get_order_by_id(order_id: str):
     try:
         if not ObjectId.is_valid(order_id):
@@ -58,15 +171,66 @@ async def get_order_by_id(order_id: str):
             raise HTTPException(status_code=404, detail="Order not found")
         return OrderResponse.from_mongo(order)
     except HTTPException as e:
-        print("Error fetching order: ", e)
+        logger.warning("Error fetching order: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
 
 
+def _lease_available_filter(admin_id: PydanticObjectId, now: datetime) -> dict:
+    '''Match orders this admin may act on: not being processed, already
+    leased by this admin, or leased by someone whose lease has expired'''
+    return {
+        "$or": [
+            {"order_status": {"$ne": OrderStatus.PROCESSING.value}},
+            {"processing_admin": admin_id},
+            {"processing_lease_expires_at": None},
+            {"processing_lease_expires_at": {"$lte": now}},
+        ]
+    }
+
+
+async def _raise_lease_conflict(order_id: PydanticObjectId, must_be_processing: bool = False):
+    '''Work out why a conditional update matched nothing and raise it'''
+    order = await Order.get_motor_collection().find_one(
+        {"_id": order_id},
+        projection={"order_status": 1}
+    )
+    if not order:
+        raise HTTPException(
+            status_code=404,
+            detail="Order not found"
+        )
+    if must_be_processing and order["order_status"] != OrderStatus.PROCESSING.value:
+        raise HTTPException(
+            status_code=400,
+            detail="Order is not being processed"
+        )
+    raise HTTPException(
+        status_code=403,
+        detail="Some one else is processing this order"
+    )
+
+
+def broadcast_order_update(order_response: OrderResponse):
+    '''Notify admins and the order owner, coalescing bursts per order'''
+    broadcaster.publish(
+        "order-updated",
+        OrderDeltaEvent.from_order(order_response, ORDER_STATUS_DELTA_FIELDS),
+        rooms=["admin", order_response.user_id],
+        key=order_response.id
+    )
+
+
+async def _order_response(order: Order) -> OrderResponse:
+    '''Populate the user link of an updated order and build its response'''
+    await order.fetch_link(Order.user)
+    return OrderResponse.from_mongo(order)
+
+
 async def add_to_orders_being_processed(order_id: str, admin_id: str) -> OrderResponse:
-    '''Function to add order to orders being processed'''
+    '''Function to claim the processing lease of an order'''
     try:
         if not ObjectId.is_valid(order_id):
             raise HTTPException(
@@ -78,29 +242,28 @@ async def add_to_orders_being_processed(order_id: str, admin_id: str) -> OrderRe
                 status_code=400,
                 detail="Invalid admin ID"
             )
-        order = await Order.find_one(Order.id == PydanticObjectId(order_id), fetch_links=True)
-        if not order:
-            raise HTTPException(
-                status_code=404,
-                detail="Order not found"
-            )
+        order_oid = PydanticObjectId(order_id)
+        admin_oid = PydanticObjectId(admin_id)
+        now = datetime.now(timezone.utc)
+
+        order = await Order.find_one(
+            {"_id": order_oid, **_lease_available_filter(admin_oid, now)}
+        ).update(
+            {"$set": {
+                "order_status": OrderStatus.PROCESSING.value,
+                "processing_admin": admin_oid,
+                "processing_lease_expires_at": now + timedelta(
+                    seconds=settings.ORDER_PROCESSING_LEASE_SECONDS),
+                "updated_at": now,
+            }, "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
         if not order:
-            raise HTTPException(
-                status_code=404,
-                detail="Order not found."
-            )
-        if order.order_status == OrderStatus.PROCESSING and order.processing_admin != PydanticObjectId(admin_id):
-            raise HTTPException(
-                status_code=403,
-                detail="Some one else is processing this order"
-            )
-        order.order_status = OrderStatus.PROCESSING
-        order.processing_admin = PydanticObjectId(admin_id)
-        await order.save()
-        order_response = OrderResponse.from_mongo(order)
-        await sio.emit("order-updated", order_response.model_dump_json(), room="admin")
-        await sio.emit("order-updated", order_response.model_dump_json(), room=str(order.user_id))
-        return order
+            await _raise_lease_conflict(order_oid)
+
+        order_response = await _order_response(order)
+        broadcast_order_update(order_response)
+        return order_response
     except HTTPException as e:
         raise HTTPException(
             status_code=e.status_code,
@@ -109,7 +272,7 @@ async def add_to_orders_being_processed(order_id: str, admin_id: str) -> OrderRe
 
 
 async def remove_from_orders_being_processed(order_id: str, admin_id: str) -> OrderResponse:
-    '''Function to remove order from orders being processed'''
+    '''Function to release the processing lease of an order'''
     try:
         if not ObjectId.is_valid(order_id):
             raise HTTPException(
@@ -121,31 +284,31 @@ async def remove_from_orders_being_processed(order_id: str, admin_id: str) -> Or
                 status_code=400,
                 detail="Invalid admin ID"
             )
-        order = await Order.find_one(Order.id == PydanticObjectId(order_id), fetch_links=True)
-        if not order:
-            raise HTTPException(
-                status_code=404,
-                detail="Order not found"
-            )
-        if order.order_status == OrderStatus.PROCESSING and order.processing_admin != PydanticObjectId(admin_id):
-            raise HTTPException(
-                status_code=403,
-                detail="Some one else is processing this order"
-            )
-        if order.order_status != OrderStatus.PROCESSING:
-            raise HTTPException(
-                status_code=400,
-                detail="Order is not being processed"
-            )
+        order_oid = PydanticObjectId(order_id)
+        admin_oid = PydanticObjectId(admin_id)
+        now = datetime.now(timezone.utc)
 
-        order.order_status = OrderStatus.REQUESTED
-        order.processing_admin = None
-        await order.save()
+        order = await Order.find_one(
+            {
+                "_id": order_oid,
+                "order_status": OrderStatus.PROCESSING.value,
+                **_lease_available_filter(admin_oid, now)
+            }
+        ).update(
+            {"$set": {
+                "order_status": OrderStatus.REQUESTED.value,
+                "processing_admin": None,
+                "processing_lease_expires_at": None,
+                "updated_at": now,
+            }, "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if not order:
+            await _raise_lease_conflict(order_oid, must_be_processing=True)
 
-        order_response = OrderResponse.from_mongo(order)
+        order_response = await _order_response(order)
 
-        await sio.emit("order-updated", order_response.model_dump_json(), room="admin")
-        await sio.emit("order-updated", order_response.model_dump_json(), room=str(order.user_id))
+        broadcast_order_update(order_response)
 
         return order_response
     except HTTPException as e:
@@ -156,24 +319,23 @@ async def remove_from_orders_being_processed(order_id: str, admin_id: str) -> Or
 
 
 async def is_order_being_processed(order_id: str, admin_id: str):
+    '''The order, when it is being processed and this admin holds its lease
+    or may take it over because it expired'''
     try:
-        order = await Order.find_one(Order.id == PydanticObjectId(order_id), fetch_links=True)
-        if not order:
-            raise HTTPException(
-                status_code=404,
-                detail="Order is not being processed"
-            )
-        if order.order_status != OrderStatus.PROCESSING:
+        if not ObjectId.is_valid(order_id):
             raise HTTPException(
                 status_code=400,
-                detail="Order is not being processed"
-            )
-        if order.order_status == OrderStatus.PROCESSING and order.processing_admin != PydanticObjectId(admin_id):
-            raise HTTPException(
-                status_code=403,
-                detail="Some one else is processing this order"
+                detail="Invalid order ID"
             )
-        return OrderResponse.from_mongo(order)
+        order_oid = PydanticObjectId(order_id)
+        order = await Order.find_one({
+            "_id": order_oid,
+            "order_status": OrderStatus.PROCESSING.value,
+            **_lease_available_filter(PydanticObjectId(admin_id), datetime.now(timezone.utc))
+        })
+        if not order:
+            await _raise_lease_conflict(order_oid, must_be_processing=True)
+        return await _order_response(order)
     except HTTPException as e:
         raise HTTPException(
             status_code=e.status_code,
@@ -189,23 +351,41 @@ async def update_order_status(order_id: str, order_status: OrderStatus, admin_id
                 status_code=400,
                 detail="Invalid order ID"
             )
-        order = await Order.find_one(Order.id == PydanticObjectId(order_id), fetch_links=True)
-        if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-        if order.order_status == OrderStatus.PROCESSING and order.processing_admin != PydanticObjectId(admin_id):
+        if not ObjectId.is_valid(admin_id):
             raise HTTPException(
-                status_code=403,
-                detail="Some one else is processing this order"
+                status_code=400,
+                detail="Invalid admin ID"
             )
+        order_oid = PydanticObjectId(order_id)
+        now = datetime.now(timezone.utc)
+
+        # Only the lease holder may move an order out of processing, unless
+        # the lease has expired.
+        order = await Order.find_one(
+            {"_id": order_oid, **_lease_available_filter(PydanticObjectId(admin_id), now)}
+        ).update(
+            {"$set": {
+                "order_status": OrderStatus(order_status).value,
+                "processing_admin": None,
+                "processing_lease_expires_at": None,
+                "updated_at": now,
+            }, "$inc": {"version": 1}},
+            response_type=UpdateResponse.OLD_DOCUMENT
+        )
+        if not order:
+            await _raise_lease_conflict(order_oid)
 
-        order.order_status = order_status
+        previous_status = order.order_status
+        order.order_status = OrderStatus(order_status).value
         order.processing_admin = None
-        await order.save()
+        order.processing_lease_expires_at = None
+        order.updated_at = now
+        order.version += 1
+        await record_status_change(order, previous_status)
 
         # Convert to response model
-        response_order = OrderResponse.from_mongo(order)
-        await sio.emit("order-updated", response_order.model_dump_json(), room=str(order.user_id))
-        await sio.emit("order-updated", response_order.model_dump_json(), room="admin")
+        response_order = await _order_response(order)
+        broadcast_order_update(response_order)
 
         return response_order
     except HTTPException as e:
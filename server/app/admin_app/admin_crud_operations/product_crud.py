@@ -1,5 +1,6 @@
 '''Product ADMIN CRUD Operations'''
 
+import logging
 from pprint import pformat
 from asyncio import gather  # For concurrent fetching of multiple end points
 from datetime import datetime, timezone
@@ -8,22 +9,27 @@ from fastapi import HTTPException, status, UploadFile
 from pydantic import ValidationError
 from bson import ObjectId
 from beanie import PydanticObjectId
+from beanie.operators import In
 
 from pymongo.errors import PyMongoError
 
 
-from app.utilities.cloudinary_utils import update_profile_image, delete_image_from_cloudinary
+from app.utilities.media_utils import upload_image_renditions
+from app.utilities.media_index import release_media
+from app.utilities.upload_utils import spool_image_uploads
 
 from app.model.product_models import (
     Product,
     ProductCreateRequest,
     ProductResponse,
     ProductDetailsRequest,
-    Image,
     ProductSizeStockRequest
 )
 from app.model.brand_models import Brand
 from app.model.category_model import Category
+from app.crud.product_crud import publish_product_delta
+
+logger = logging.getLogger(__name__)
 
 
 async def add_product(product_data: ProductCreateRequest):
@@ -79,28 +85,33 @@ async def add_images_product(product_id: str, images: list[UploadFile]):
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        file_bytes_list = await gather(*(image.read() for image in images))
-
         folder = "solestore_ecommerce_app/products"
 
-        # Upload images concurrently to Cloudinary - --
-        upload_tasks = [update_profile_image(
-            file_bytes, folder) for file_bytes in file_bytes_list]
-        upload_results = await gather(*upload_tasks)
-
-        new_images = []
-        for result in upload_results:
-            # Each result is assumed to be a dict with 'url' and 'public_id' keys.
-            image_obj = Image(
-                url=result.get("secure_url"),
-                public_id=result.get("public_id")
-            )
-            new_images.append(image_obj)
+        # Stream each upload to disk, then transcode in the image pool and
+        # upload the renditions concurrently
+        async with spool_image_uploads(images) as image_paths:
+            upload_tasks = [upload_image_renditions(
+                image_path, folder) for image_path in image_paths]
+            results = await gather(*upload_tasks, return_exceptions=True)
+
+        new_images = [result for result in results
+                      if not isinstance(result, BaseException)]
+        failed = [result for result in results
+                  if isinstance(result, BaseException)]
+        if failed:
+            # The other uploads took references, give them back
+            await release_media(new_images)
+            raise failed[0]
+
         if product.images is None:
             product.images = []
         product.images.extend(new_images)
 
-        await product.save()
+        try:
+            await product.save()
+        except Exception:
+            await release_media(new_images)
+            raise
         await product.fetch_all_links()
         return ProductResponse.from_mongo(product)
     except ValidationError as e:
@@ -116,16 +127,15 @@ async def delete_images_product(product_id: str, public_ids: list[str]):
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Delete images from Cloudinary concurrently
-        deletion_tasks = [delete_image_from_cloudinary(
-            public_id) for public_id in public_ids]
-        deletion_results = await gather(*deletion_tasks, return_exceptions=True)
-
         # Update product's images list by filtering out images with matching public_ids
+        removed = [img for img in product.images if img.public_id in public_ids]
         product.images = [
             img for img in product.images if img.public_id not in public_ids]
 
         await product.save()
+        # Images may be shared with other products, only unused ones are
+        # removed from storage, by the media deletion worker
+        await release_media(removed)
         await product.fetch_all_links()
 
         return ProductResponse.from_mongo(product)
@@ -171,10 +181,12 @@ async def update_product_details(product_data: ProductDetailsRequest, product_id
             if category:
                 update_data["category"] = category
 
+        price_changed = update_data.get("price") not in (None, product.price)
         for key, value in update_data.items():
             setattr(product, key, value)
         product.updated_at = datetime.now(timezone.utc)
         await product.save()
+        publish_product_delta(product, price=price_changed)
         await product.fetch_all_links()
 
         return ProductResponse.from_mongo(product)
@@ -184,7 +196,7 @@ async def update_product_details(product_data: ProductDetailsRequest, product_id
             detail=e.errors()
         ) from e
     except HTTPException as e:
-        print(f"Error editing product: {e}")
+        logger.warning("Error editing product: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -218,6 +230,7 @@ async def update_product_sizes(product_id: str, size_data: ProductSizeStockReque
 
         product.updated_at = datetime.now(timezone.utc)
         await product.save()
+        publish_product_delta(product, sizes=True)
         await product.fetch_all_links()
         return ProductResponse.from_mongo(product)
     except ValidationError as e:
@@ -240,18 +253,16 @@ async def delete_single_product(product_id: str) -> ProductResponse:
             raise HTTPException(
                 status_code=404, detail=f"Product not found: {product_id}")
 
-        # Delete all associated images concurrently from Cloudinary.
-        # Each image deletion is an independent async task.
-        deletion_tasks = [delete_image_from_cloudinary(
-            image.public_id) for image in product.images]
-        await gather(*deletion_tasks)
-
         # Optionally, store the product data (if you want to return it) before deletion.
         product_data = ProductResponse.from_mongo(product)
 
         # Delete the product document from the database.
         await product.delete()
 
+        # Only once the product is gone, unused images are removed from
+        # storage in the background
+        await release_media(product.images)
+
         return product_data
     except HTTPException as e:
         raise HTTPException(
@@ -263,15 +274,32 @@ async def delete_single_product(product_id: str) -> ProductResponse:
 async def delete_products(product_ids: list[str]) -> list[ProductResponse]:
     """
     Delete products whose IDs are in the provided list.
-    For each product, delete the associated images concurrently,
-    then delete the product document.
+    The products are read and deleted with one query each and their images
+    are queued for background deletion, nothing is deleted if an ID is
+    invalid or missing.
     Returns a list of ProductResponse objects representing the deleted products.
     """
     try:
-        # Create a list of deletion tasks for each product ID.
-        deletion_tasks = [delete_single_product(pid) for pid in product_ids]
-        # Run all deletions concurrently without blocking the thread.
-        deleted_products = await gather(*deletion_tasks)
+        for pid in product_ids:
+            if not ObjectId.is_valid(pid):
+                raise HTTPException(
+                    status_code=400, detail=f"Invalid product ID: {pid}")
+        object_ids = list({PydanticObjectId(pid) for pid in product_ids})
+
+        products = await Product.find(
+            In(Product.id, object_ids), fetch_links=True).to_list()
+        found = {str(product.id): product for product in products}
+        for pid in product_ids:
+            if pid not in found:
+                raise HTTPException(
+                    status_code=404, detail=f"Product not found: {pid}")
+
+        deleted_products = [ProductResponse.from_mongo(
+            found[pid]) for pid in dict.fromkeys(product_ids)]
+        await Product.find(In(Product.id, object_ids)).delete()
+        # After the delete, so a failed one leaves the images in place
+        await release_media(
+            image for product in products for image in product.images)
         return deleted_products
 
     except PyMongoError as e:
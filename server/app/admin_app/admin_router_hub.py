@@ -8,6 +8,7 @@ from app.admin_app.admin_routes.admin_category_routes import router as admin_cat
 from app.admin_app.admin_routes.all_admin_routes import router as all_admin_routes
 from app.admin_app.admin_routes.admin_product_routes import router as admin_product_router
 from app.admin_app.admin_routes.admin_order_routes import router as admin_order_router
+from app.admin_app.admin_routes.admin_socket_routes import router as admin_socket_router
 
 admin_router = APIRouter()
 
@@ -57,3 +58,8 @@ admin_router.include_router(
     prefix="/order",
     tags=["admin_order"]
 )
+admin_router.include_router(
+    admin_socket_router,
+    prefix="/socket",
+    tags=["admin_socket"]
+)
@@ -1,9 +1,10 @@
+import logging
 from fastapi import APIRouter, HTTPException, status, Depends, Response, Request
 from app.admin_app.admin_crud_operations.admin_crud import create_admin, add_admin_refresh_token, remove_admin_refresh_token, remove_all_admin_refresh_token, admin_refresh_token_is_saved, get_admin_details
 from app.admin_app.admin_models.admin import Admin, AdminResponse, AdminCreateRequest, AdminRole
 from app.model.auth_models import Token
 from app.utilities.password_utils import verify_password
-from app.utilities.auth_utils import create_access_token, create_refresh_token
+from app.utilities.auth_utils import create_access_token, create_refresh_token, PRINCIPAL_CLAIM, ADMIN_PRINCIPAL
 from beanie.operators import Or
 from fastapi.security import OAuth2PasswordRequestForm
 from app.admin_app.admin_utilities.admin_auth_utils import get_current_admin
@@ -12,6 +13,8 @@ from typing import Annotated
 import jwt
 from app.config.env_settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter()
 
@@ -38,13 +41,13 @@ async def create_new_admin(admin: AdminCreateRequest, logged_in_admin: Annotated
         created_admin = await create_admin(admin_data_dict)
         return created_admin
     except HTTPException as e:
-        print(f"Error creating admin. HTTPException: {e}")
+        logger.warning("Error creating admin. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(f"Error creating admin. Unexpected Exception: {e}")
+        logger.exception("Error creating admin. Unexpected Exception: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during sign up",
@@ -77,7 +80,7 @@ async def admin_login(admin_credentials: Annotated[OAuth2PasswordRequestForm, De
             )
 
         access_token = await create_access_token(
-            data={"sub": str(raw_admin.id)}
+            data={"sub": str(raw_admin.id), PRINCIPAL_CLAIM: ADMIN_PRINCIPAL}
         )
         refresh_token = await create_refresh_token(
             data={"sub": str(raw_admin.id)}
@@ -107,13 +110,13 @@ async def admin_login(admin_credentials: Annotated[OAuth2PasswordRequestForm, De
         )
 
     except HTTPException as e:
-        print(f"Error logging in admin. HTTPException: {e}")
+        logger.warning("Error logging in admin. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(f"Error logging in admin. Full exception details: {str(e)}")
+        logger.exception("Error logging in admin. Full exception details: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during admin login",
@@ -133,13 +136,13 @@ async def admin_logout(response: Response, request: Request, admin: Annotated[di
         )
         return {"message": "Logged out"}
     except HTTPException as e:
-        print(f"Error logging out admin. HTTPException: {e}")
+        logger.warning("Error logging out admin. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(f"Error logging out admin. Full exception details: {str(e)}")
+        logger.exception("Error logging out admin. Full exception details: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during logout",
@@ -154,14 +157,13 @@ async def admin_logout_all(response: Response, admin: Annotated[dict, Depends(ge
         response.delete_cookie(settings.ADMIN_REFRESH_COOKIE_NAME)
         return {"message": "Logged out of all devices"}
     except HTTPException as e:
-        print(f"Error logging out admin from all devices. HTTPException: {e}")
+        logger.warning("Error logging out admin from all devices. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(
-            f"Error logging out admin from all devices. Full exception details: {str(e)}")
+        logger.exception("Error logging out admin from all devices. Full exception details: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during logout",
@@ -232,7 +234,8 @@ async def admin_refresh_token_route(request: Request, response: Response):
                 headers={"WWW-Authenticate": "Bearer"}
             )
         await remove_admin_refresh_token(str(admin_id), admin_refresh_token)
-        access_token = await create_access_token(data={"sub": str(admin_id)})
+        access_token = await create_access_token(
+            data={"sub": str(admin_id), PRINCIPAL_CLAIM: ADMIN_PRINCIPAL})
         new_refresh_token = await create_refresh_token(data={"sub": str(admin_id)})
 
         await add_admin_refresh_token(str(admin_id), new_refresh_token)
@@ -249,20 +252,20 @@ async def admin_refresh_token_route(request: Request, response: Response):
             token_type="bearer"
         )
     except HTTPException as e:
-        print("ERROR HTTP: ", e)
+        logger.warning("ERROR HTTP: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except jwt.PyJWTError as e:
-        print("ERROR JWT: ", e)
+        logger.error("ERROR JWT: %s", e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unauthorized",
             headers={"WWW-Authenticate": "Bearer"}
         ) from e
     except Exception as e:
-        print("ERROR UNKNOWN: ", e)
+        logger.exception("ERROR UNKNOWN: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during admin token refresh",
@@ -1,5 +1,6 @@
 '''Admin brand routes'''
 
+import logging
 from typing import Annotated
 from fastapi import APIRouter, Depends, status
 from fastapi.exceptions import HTTPException
@@ -12,6 +13,8 @@ from app.crud.brand_crud import get_brands
 
 from app.utilities.query_models import CBQueryParams
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter()
 
@@ -60,13 +63,13 @@ async def brand_create(admin: Annotated[dict, Depends(get_current_admin)], brand
     try:
         return await create_brand(brand_dict)
     except HTTPException as e:
-        print("Error creating brand: ", e)
+        logger.warning("Error creating brand: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print("Unexpected error creating brand: ", e)
+        logger.exception("Unexpected error creating brand: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error creating brand"
@@ -83,7 +86,7 @@ async def brand_update(admin: Annotated[dict, Depends(get_current_admin)], brand
     try:
         return await edit_brand(brand_data=brand, brand_id=brand_id)
     except HTTPException as e:
-        print("Http exception edting brand")
+        logger.warning("Http exception edting brand")
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -110,7 +113,7 @@ async def brand_delete(admin: Annotated[dict, Depends(get_current_admin)], brand
             detail=e.detail
         ) from e
     except Exception as e:
-        print("Unexpected error in brand delete: ", e)
+        logger.exception("Unexpected error in brand delete: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error in brand delete"
@@ -1,5 +1,6 @@
 '''Admin Category routes'''
 
+import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, status
@@ -14,6 +15,8 @@ from app.crud.category_crud import get_categories
 from app.utilities.query_models import CBQueryParams
 from app.utilities.response_message_models import SuccessMessage
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -64,13 +67,13 @@ async def category_create(
     try:
         return await create_category(category_dict)
     except HTTPException as e:
-        print(f"Error creating category: {e}")
+        logger.warning("Error creating category: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print("Unexpected error creating category: ", e)
+        logger.exception("Unexpected error creating category: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error creating category"
@@ -94,7 +97,7 @@ async def category_update(
             category_id=category_id
         )
     except HTTPException as e:
-        print("Http exception edting category")
+        logger.warning("Http exception edting category")
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -119,7 +122,7 @@ async def category_delete(
     try:
         return await delete_category(str(category_id))
     except HTTPException as e:
-        print("Http exception deleting category")
+        logger.warning("Http exception deleting category")
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -1,20 +1,25 @@
 '''Admin Order Routes'''
 
+import logging
 from typing import Annotated
 from fastapi import APIRouter, Depends
 from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
 
-from app.admin_app.admin_crud_operations.order_crud import get_orders_admin, update_order_status, get_order_by_id, add_to_orders_being_processed, remove_from_orders_being_processed, is_order_being_processed
+from app.admin_app.admin_crud_operations.order_crud import get_orders_admin, update_order_status, get_order_by_id, add_to_orders_being_processed, remove_from_orders_being_processed, is_order_being_processed, build_export_query, stream_orders_export
 from app.admin_app.admin_utilities.admin_auth_utils import get_current_admin
 from app.admin_app.admin_models.admin import AdminRole
-from app.model.order_models import OrderResponse, OrderStatusUpdateRequest
-from app.utilities.query_models import OrderQueryParams
+from app.crud.order_rollup_crud import get_order_rollups
+from app.model.order_models import OrderResponse, OrderSummaryResponse, OrderRollupResponse, OrderStatusUpdateRequest
+from app.utilities.query_models import OrderQueryParams, OrderAnalyticsQueryParams, OrderExportQueryParams, ExportFormat
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter()
 
 
-@router.get("/", status_code=200, response_model=list[OrderResponse])
+@router.get("/", status_code=200, response_model=list[OrderResponse] | list[OrderSummaryResponse])
 async def get_all_orders_admin_route(
     admin: Annotated[dict, Depends(get_current_admin)],
     query: Annotated[OrderQueryParams, Depends()]
@@ -24,21 +29,86 @@ async def get_all_orders_admin_route(
         return await get_orders_admin(
             page=query.page,
             order_status=query.order_status,
+            summary=query.summary
         )
     except HTTPException as e:
-        print("Error fetching orders: ", e)
+        logger.warning("Error fetching orders: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error fetching orders: {e}")
+        logger.exception("Unexpected error fetching orders: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error fetching orders"
         ) from e
 
 
+@router.get("/analytics", status_code=200, response_model=list[OrderRollupResponse])
+async def get_order_analytics_route(
+    admin: Annotated[dict, Depends(get_current_admin)],
+    query: Annotated[OrderAnalyticsQueryParams, Depends()]
+):
+    '''Get precomputed order rollups for the dashboard'''
+    try:
+        return await get_order_rollups(
+            dimension=query.dimension,
+            start=query.start,
+            end=query.end,
+            key=query.key
+        )
+    except HTTPException as e:
+        logger.warning("Error fetching order analytics: %s", e)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        ) from e
+    except Exception as e:
+        logger.exception("Unexpected error fetching order analytics: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Unexpected error fetching order analytics"
+        ) from e
+
+
+@router.get("/export", status_code=200, response_class=StreamingResponse)
+async def export_orders_route(
+    admin: Annotated[dict, Depends(get_current_admin)],
+    query: Annotated[OrderExportQueryParams, Depends()]
+):
+    '''Stream orders as CSV or NDJSON'''
+    try:
+        orders_query = build_export_query(
+            order_status=query.order_status,
+            start=query.start,
+            end=query.end
+        )
+        if query.export_format == ExportFormat.csv:
+            media_type, extension = "text/csv", "csv"
+        else:
+            media_type, extension = "application/x-ndjson", "ndjson"
+        return StreamingResponse(
+            stream_orders_export(orders_query, query.export_format),
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f"attachment; filename=orders.{extension}"
+            }
+        )
+    except HTTPException as e:
+        logger.warning("Error exporting orders: %s", e)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        ) from e
+    except Exception as e:
+        logger.exception("Unexpected error exporting orders: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Unexpected error exporting orders"
+        ) from e
+
+
 @router.get("/{order_id}", response_model=OrderResponse, status_code=200)
 async def get_order_admin(
     admin: Annotated[dict, Depends(get_current_admin)],
@@ -50,13 +120,13 @@ async def get_order_admin(
             order_id=order_id
         )
     except HTTPException as e:
-        print("Error updating order status: ", e)
+        logger.warning("Error updating order status: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error updating order status: {e}")
+        logger.exception("Unexpected error updating order status: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error updating order status"
@@ -77,13 +147,13 @@ async def update_order_status_route(
             admin_id=admin["id"]
         )
     except HTTPException as e:
-        print("Error updating order status: ", e)
+        logger.warning("Error updating order status: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error updating order status: {e}")
+        logger.exception("Unexpected error updating order status: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error updating order status"
@@ -102,13 +172,13 @@ async def process_order_route(
             admin_id=admin["id"]
         )
     except HTTPException as e:
-        print("Error processing order: ", e)
+        logger.warning("Error processing order: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error processing order: {e}")
+        logger.exception("Unexpected error processing order: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error processing order"
@@ -127,13 +197,13 @@ async def stop_process_order_route(
             admin_id=admin["id"]
         )
     except HTTPException as e:
-        print("Error processing order: ", e)
+        logger.warning("Error processing order: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error processing order: {e}")
+        logger.exception("Unexpected error processing order: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error processing order"
@@ -152,13 +222,13 @@ async def is_order_processing_route(
             order_id=order_id
         )
     except HTTPException as e:
-        print("Error verying order being processing or not", e)
+        logger.warning("Error verying order being processing or not %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error verying order being processing or not: {e}")
+        logger.exception("Unexpected error verying order being processing or not: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error verying order being processing or not"
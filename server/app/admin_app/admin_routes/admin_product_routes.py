@@ -1,5 +1,6 @@
 '''Admin Product routes'''
 
+import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, status, UploadFile, File
@@ -28,6 +29,8 @@ from app.model.product_models import (
 )
 from app.utilities.query_models import ProductQueryParams
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -48,14 +51,14 @@ async def get_all_products_admin(
             sort_order=query_params.sort_order
         )
     except HTTPException as e:
-        print("Error fetching products: ", e)
+        logger.warning("Error fetching products: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
 
     except Exception as e:
-        print("Unexpected error fetching products route: ", e)
+        logger.exception("Unexpected error fetching products route: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error fetching products"
@@ -76,13 +79,13 @@ async def product_create(
     try:
         return await add_product(product)
     except HTTPException as e:
-        print(f"Error in adding product, HTTPException: {e}")
+        logger.warning("Error in adding product, HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected Error in adding product: {e}")
+        logger.exception("Unexpected Error in adding product: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected Error in adding product"
@@ -122,7 +125,7 @@ async def product_by_id(
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Error fetching product: {e}")
+        logger.exception("Error fetching product: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Error fetching product"
@@ -149,7 +152,7 @@ async def prodcut_details_update(
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected Error editing product: {e}")
+        logger.exception("Unexpected Error editing product: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected Error editing product"
@@ -203,7 +206,7 @@ async def product_size_stock_update(
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Error updating size and stock: {e}")
+        logger.exception("Error updating size and stock: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Error updating size and stock"
@@ -224,20 +227,21 @@ async def add_images(
                 detail="You are not authorized for this action"
             )
         for image in images:
-            if image.content_type.lower() not in ["image/jpeg", "image/png", "image/jpg",]:
+            if image.content_type.lower() not in ["image/jpeg", "image/png", "image/jpg", "image/webp"]:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Only jpeg, png and jpg images are accepted"
                 )
-            return await add_images_product(product_id, images)
+        # File headers and sizes are checked again while spooling
+        return await add_images_product(product_id, images)
     except HTTPException as e:
-        print(f"Error adding image HTTP: {e}")
+        logger.warning("Error adding image HTTP: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Error adding image Unexpected: {e}")
+        logger.exception("Error adding image Unexpected: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error adding product images"
@@ -267,7 +271,7 @@ async def delete_images(
             detail=e.detail
         )from e
     except Exception as e:
-        print("Error deleting images: ", e)
+        logger.exception("Error deleting images: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Error deleting images"
@@ -1,12 +1,17 @@
+import logging
 from fastapi import APIRouter, HTTPException, Depends, status, Body, UploadFile
 from app.admin_app.admin_utilities.admin_auth_utils import get_current_admin
 from typing import Annotated
 from app.admin_app.admin_models.admin import Admin, AdminResponse, AdminUpdateRequest, AdminRole, AdminRoleUpdateRequest
 from beanie import PydanticObjectId
 from app.admin_app.admin_crud_operations.admin_crud import update_admin_details, update_admin_role
-from app.utilities.cloudinary_utils import delete_image_from_cloudinary, update_profile_image
+from app.utilities.media_utils import update_profile_image
+from app.utilities.media_index import release_media
+from app.utilities.upload_utils import spool_image_upload
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter()
 
@@ -16,13 +21,13 @@ async def get_admin_profile_details(admin: Annotated[dict, Depends(get_current_a
     try:
         return admin
     except HTTPException as e:
-        print("AdminProfile error", e)
+        logger.warning("AdminProfile error %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print("Unexpected admin profile error: ", e)
+        logger.exception("Unexpected admin profile error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unexpected admin profile error"
@@ -48,13 +53,13 @@ async def update_admin_profile_details(admin: Annotated[dict, Depends(get_curren
             current_password=current_password
         )
     except HTTPException as e:
-        print("Update admin profile error: ", e)
+        logger.warning("Update admin profile error: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error updating admin profile: {e}")
+        logger.exception("Unexpected error updating admin profile: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error updating admin profile"
@@ -76,13 +81,13 @@ async def update_admin_role_route(
             )
         return await update_admin_role(str(admin["id"]), body.role)
     except HTTPException as e:
-        print(f"Error updating admin role: {e}")
+        logger.warning("Error updating admin role: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected Error updating admin role: {e}")
+        logger.exception("Unexpected Error updating admin role: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during admin role updation"
@@ -101,52 +106,52 @@ async def update_admin_profile_image_route(
         )
 
     try:
-        # Read file as bytes
-        file_bytes = await file.read()
+        # Streamed to a temporary file, never read into memory whole
+        async with spool_image_upload(file) as image_path:
+            admin_id = str(admin["id"])
 
-        admin_id = str(admin["id"])
+            current_admin = await Admin.get(PydanticObjectId(admin_id))
 
-        current_admin = await Admin.get(PydanticObjectId(admin_id))
+            if not current_admin:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Admin not found"
+                )
 
-        if not current_admin:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Admin not found"
-            )
+            folder = "solestore_ecommerce_app/admins"
 
-        if current_admin.profile_img_public_id and current_admin.profile_img_url:
-            await delete_image_from_cloudinary(
-                str(current_admin.profile_img_public_id)
+            upload_result = await update_profile_image(
+                image_path, folder
             )
 
-        folder = "solestore_ecommerce_app/admins"
+            old_public_id = current_admin.profile_img_url and current_admin.profile_img_public_id
 
-        upload_result = await update_profile_image(
-            file_bytes, folder
-        )
+            current_admin.profile_img_url = upload_result.url
+            current_admin.profile_img_public_id = upload_result.public_id
+            current_admin.updated_at = datetime.now(timezone.utc)
 
-        current_admin.profile_img_url = upload_result["secure_url"]
-        current_admin.profile_img_public_id = upload_result["public_id"]
-        current_admin.updated_at = datetime.now(timezone.utc)
+            await current_admin.save()
 
-        await current_admin.save()
+            # The old image is released once replaced, it is deleted if unused
+            if old_public_id:
+                await release_media([str(old_public_id)])
 
-        updated_profile_data = current_admin.model_dump(
-            exclude=["password", "refresh_tokens"]
-        )
-        updated_profile_data["id"] = str(
-            current_admin.id
-        )
-        return updated_profile_data
+            updated_profile_data = current_admin.model_dump(
+                exclude=["password", "refresh_tokens"]
+            )
+            updated_profile_data["id"] = str(
+                current_admin.id
+            )
+            return updated_profile_data
 
     except HTTPException as e:
-        print(f"Error in admin profile image update route:{e}")
+        logger.warning("Error in admin profile image update route:%s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Error in admin profile image update route 500:{e}")
+        logger.exception("Error in admin profile image update route 500:%s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error in admin profile image undate"
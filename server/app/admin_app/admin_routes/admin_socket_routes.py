@@ -0,0 +1,24 @@
+'''Admin Socket Routes'''
+
+from typing import Annotated
+from fastapi import APIRouter, Depends
+
+from app.admin_app.admin_utilities.admin_auth_utils import get_current_admin
+from app.config.socket_manager import connections, handshake_metrics
+from app.utilities.principal_cache import principal_cache
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", status_code=200)
+async def get_socket_metrics_route(admin: Annotated[dict, Depends(get_current_admin)]):
+    '''Socket handshake latency, outcomes and open connections of this worker'''
+    return {
+        **handshake_metrics.snapshot(),
+        "open_connections": connections.total,
+        "principal_cache": {
+            "hits": principal_cache.hits,
+            "misses": principal_cache.misses
+        }
+    }
@@ -1,5 +1,6 @@
 '''ll Admin routes'''
 
+import logging
 from typing import Annotated
 
 from fastapi import APIRouter, HTTPException, status, Depends
@@ -10,6 +11,8 @@ from app.admin_app.admin_models.admin import AdminResponse, AdminRole, AdminRole
 from app.utilities.query_models import AdminQueryParams
 from app.utilities.response_message_models import SuccessMessage
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -82,13 +85,13 @@ async def update_other_admin_role(
             )
         return await update_admin_role(str(admin_id), body.role)
     except HTTPException as e:
-        print(f"Error updating another admin's role: {e}")
+        logger.warning("Error updating another admin's role: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected Error updating another admin's role: {e}")
+        logger.exception("Unexpected Error updating another admin's role: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during another admin's role updation"
@@ -115,7 +118,7 @@ async def admin_delete(
     try:
         return await delete_admin(str(admin_id))
     except HTTPException as e:
-        print(f"Error deleting admin: {e}")
+        logger.warning("Error deleting admin: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -7,6 +7,8 @@ from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
 from typing import Annotated
 from fastapi import HTTPException, status, Depends, Request, Response
 from app.admin_app.admin_crud_operations.admin_crud import get_admin_details, admin_refresh_token_is_saved
+from app.utilities.auth_utils import PRINCIPAL_CLAIM, ADMIN_PRINCIPAL
+from app.utilities.principal_cache import principal_cache
 
 admin_oauth2_scheme = OAuth2PasswordBearer("/api/admin/login")
 
@@ -73,10 +75,11 @@ async def get_current_admin_ws(token: str):
             algorithms=[settings.ALGORITHM]
         )
         admin_id: str = payload.get("sub")
-        if not admin_id:
+        if not admin_id or payload.get(PRINCIPAL_CLAIM, ADMIN_PRINCIPAL) != ADMIN_PRINCIPAL:
             await invalidate_token()
 
-        admin = await get_admin_details(admin_id)
+        admin = await principal_cache.get_or_load(
+            (ADMIN_PRINCIPAL, admin_id), lambda: get_admin_details(admin_id))
         if not admin:
             await invalidate_token()
         return admin
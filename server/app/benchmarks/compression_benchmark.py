@@ -0,0 +1,156 @@
+'''CPU cost against bytes saved for compressing typical API responses.
+
+Run from the server directory:
+
+    python -m app.benchmarks.compression_benchmark [--json]
+
+Payloads are generated with the shapes the API returns: a product page,
+a product listing, the admin order list with embedded cart snapshots and
+a small error body. Each is compressed with the gzip levels and brotli
+qualities worth considering for dynamic responses.
+'''
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.utilities.compression import compress_body
+
+SETTINGS = [("gzip", 1), ("gzip", 6), ("gzip", 9),
+            ("br", 1), ("br", 4), ("br", 6), ("br", 11)]
+BRANDS = ["Nike", "Adidas", "Puma", "Reebok", "New Balance", "Asics"]
+CATEGORIES = ["Running", "Basketball", "Casual", "Training", "Sandals"]
+COLOURS = ["Black", "White", "Red", "Blue", "Grey", "Olive"]
+
+
+def _timestamp(rng: random.Random) -> str:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return (start + timedelta(minutes=rng.randrange(500_000))).isoformat()
+
+
+def _object_id(rng: random.Random) -> str:
+    return f"{rng.getrandbits(96):024x}"
+
+
+def _image(rng: random.Random) -> dict:
+    name = f"solestore_ecommerce_app/products/{rng.getrandbits(64):016x}"
+    return {
+        "url": f"https://res.cloudinary.com/demo/image/upload/{name}-1280.webp",
+        "public_id": f"{name}-1280",
+        "width": 1280,
+        "height": 960,
+        "renditions": [
+            {
+                "width": width,
+                "height": width * 3 // 4,
+                "format": "webp",
+                "url": f"https://res.cloudinary.com/demo/image/upload/{name}-{width}.webp",
+                "public_id": f"{name}-{width}"
+            }
+            for width in (320, 640, 1280)
+        ]
+    }
+
+
+def _product(rng: random.Random) -> dict:
+    brand = rng.choice(BRANDS)
+    return {
+        "id": _object_id(rng),
+        "title": f"{brand} {rng.choice(COLOURS)} {rng.choice(CATEGORIES)} {rng.randint(1, 99)}",
+        "description": " ".join(rng.choice(
+            ["breathable", "mesh", "upper", "cushioned", "sole", "for", "daily",
+             "runs", "with", "responsive", "foam", "and", "durable", "grip"])
+            for _ in range(40)),
+        "price": round(rng.uniform(40, 250), 2),
+        "brand": {"id": _object_id(rng), "name": brand, "created_at": _timestamp(rng)},
+        "category": {"id": _object_id(rng), "name": rng.choice(CATEGORIES), "created_at": _timestamp(rng)},
+        "images": [_image(rng) for _ in range(rng.randint(2, 5))],
+        "sizes": [{"size": size, "stock": rng.randint(0, 40)} for size in range(6, 13)],
+        "created_at": _timestamp(rng),
+        "updated_at": _timestamp(rng)
+    }
+
+
+def _order(rng: random.Random) -> dict:
+    items = [
+        {"product": _product(rng), "size": rng.randint(6, 12), "quantity": rng.randint(1, 3)}
+        for _ in range(rng.randint(1, 4))
+    ]
+    return {
+        "id": _object_id(rng),
+        "user": {"id": _object_id(rng), "username": f"user{rng.randint(1, 9999)}",
+                 "email": f"user{rng.randint(1, 9999)}@example.com"},
+        "order_details": {"items": items, "total": sum(
+            item["product"]["price"] * item["quantity"] for item in items)},
+        "address": f"{rng.randint(1, 999)} Market Street, Springfield",
+        "phone": f"+91{rng.randint(7000000000, 9999999999)}",
+        "razorpay_order_id": f"order_{rng.getrandbits(56):014x}",
+        "amount": round(rng.uniform(40, 900), 2),
+        "payment_verified": True,
+        "order_status": rng.choice(["requested", "processing", "shipped", "delivered"]),
+        "version": rng.randint(0, 6),
+        "created_at": _timestamp(rng),
+        "updated_at": _timestamp(rng)
+    }
+
+
+def payloads(seed: int = 42) -> dict[str, bytes]:
+    rng = random.Random(seed)
+    return {
+        "error": json.dumps({"detail": "Product not found"}).encode(),
+        "product_page": json.dumps(_product(rng)).encode(),
+        "product_list_24": json.dumps([_product(rng) for _ in range(24)]).encode(),
+        "admin_orders_50": json.dumps([_order(rng) for _ in range(50)]).encode()
+    }
+
+
+def measure(body: bytes, encoding: str, level: int, min_seconds: float) -> dict:
+    compressed = compress_body(body, encoding, brotli_quality=level, gzip_level=level)
+    runs = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < min_seconds:
+        compress_body(body, encoding, brotli_quality=level, gzip_level=level)
+        runs += 1
+    per_call = elapsed / runs
+    return {
+        "encoding": encoding,
+        "level": level,
+        "bytes": len(compressed),
+        "saved_bytes": len(body) - len(compressed),
+        "ratio": round(len(compressed) / len(body), 3),
+        "cpu_ms": round(per_call * 1000, 4),
+        "saved_kb_per_cpu_ms": round((len(body) - len(compressed)) / 1024 / (per_call * 1000), 1)
+    }
+
+
+def run(min_seconds: float = 0.2) -> list[dict]:
+    results = []
+    for name, body in payloads().items():
+        for encoding, level in SETTINGS:
+            results.append({"payload": name, "size": len(body),
+                            **measure(body, encoding, level, min_seconds)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--min-seconds", type=float, default=0.2,
+                        help="time spent measuring each setting")
+    args = parser.parse_args()
+
+    results = run(args.min_seconds)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'payload':<16}{'size':>9}{'enc':>6}{'lvl':>5}{'bytes':>9}"
+          f"{'ratio':>8}{'cpu ms':>11}{'KB saved/ms':>13}")
+    for row in results:
+        print(f"{row['payload']:<16}{row['size']:>9}{row['encoding']:>6}{row['level']:>5}"
+              f"{row['bytes']:>9}{row['ratio']:>8}{row['cpu_ms']:>11}{row['saved_kb_per_cpu_ms']:>13}")
+
+
+if __name__ == "__main__":
+    main()
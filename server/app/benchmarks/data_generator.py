@@ -0,0 +1,569 @@
+'''Deterministic synthetic catalogs, carts and orders for local performance work.
+
+Run from the server directory:
+
+    python -m app.benchmarks.data_generator --database solestore_benchmark \\
+        --products 100000 --users 50000 --orders 1000000
+
+Popularity is skewed the way a shop's is: a few brands and categories
+hold most of the catalog, a small share of products get most of the cart
+lines and orders, and a few customers place many orders while most place
+one or two. Order statuses follow their age and the admin dashboard
+rollups are built from the generated orders, so analytics match them.
+
+The same seed gives the same documents, ids and timestamps included; only
+password salts differ between runs. Documents are written with
+`insert_many` in batches sized to stay well under Mongo's message limit,
+and the next batch is generated while the previous one is being written.
+'''
+
+import argparse
+import asyncio
+import hashlib
+import random
+import struct
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Iterable, Iterator, Optional
+
+import bson
+from bson import DBRef, ObjectId
+
+DEFAULT_DATABASE = "solestore_benchmark"
+PASSWORD = "benchmark-password"
+USER_PREFIX = "bench_user"
+ADMIN_PREFIX = "bench_admin"
+
+BRANDS = [
+    "Nike", "Adidas", "Puma", "Reebok", "New Balance", "Asics", "Skechers", "Converse",
+    "Vans", "Fila", "Under Armour", "Saucony", "Brooks", "Hoka", "Mizuno", "Salomon",
+    "On", "Merrell", "Clarks", "Crocs", "Birkenstock", "Timberland", "Dr. Martens",
+    "Bata", "Woodland", "Red Tape", "Campus", "Sparx", "Liberty", "Lotto"
+]
+CATEGORIES = [
+    "Running", "Casual", "Training", "Basketball", "Sandals", "Boots", "Walking",
+    "Football", "Tennis", "Trail", "Formal", "Slides"
+]
+COLOURS = ["Black", "White", "Red", "Blue", "Grey", "Olive", "Navy", "Beige", "Pink", "Green"]
+MODELS = ["Air", "Zoom", "Ultra", "Boost", "Gel", "Fresh", "Classic", "Flex", "Pro", "Swift",
+          "Glide", "Nova", "Pulse", "Edge", "Drift", "Core", "Wave", "Peak"]
+DESCRIPTION_WORDS = ["breathable", "mesh", "upper", "cushioned", "sole", "daily", "runs",
+                     "responsive", "foam", "durable", "grip", "lightweight", "support", "knit"]
+STREETS = ["Market Street", "MG Road", "Park Avenue", "Lake View", "Station Road", "Hill Road"]
+SIZES = range(7, 13)
+# Share of sizes sold out, and the extra stock middle sizes carry
+SOLD_OUT_SHARE = 0.12
+SIZE_DEMAND = {7: 0.5, 8: 0.8, 9: 1.0, 10: 1.0, 11: 0.7, 12: 0.4}
+RENDITION_WIDTHS = (320, 640, 1280)
+
+# Mongo accepts messages up to 48MB, batches this size keep memory flat too
+TARGET_BATCH_BYTES = 8 * 1024 * 1024
+MIN_BATCH = 100
+MAX_BATCH = 10_000
+
+COLLECTIONS = ("brands", "categories", "products", "users", "admins",
+               "product_in_cart", "orders", "order_rollups")
+PASSWORD_HASHES = ("fast", "shared", "bcrypt")
+
+
+def zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    '''Cumulative weights where rank r is picked in proportion to 1 / r**exponent'''
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def batch_size_for(document: dict, target_bytes: int = TARGET_BATCH_BYTES) -> int:
+    '''How many documents like this one fit a batch of `target_bytes`'''
+    size = len(bson.encode(document))
+    return max(MIN_BATCH, min(MAX_BATCH, target_bytes // size))
+
+
+@dataclass
+class GeneratorConfig:
+    '''Sizes and shape of a generated dataset'''
+    products: int = 10_000
+    users: int = 5_000
+    orders: int = 50_000
+    admins: int = 4
+    brands: int = len(BRANDS)
+    categories: int = len(CATEGORIES)
+    # Share of users with something in their cart
+    cart_share: float = 0.3
+    # Zipf exponent of brand, product and customer popularity
+    skew: float = 1.1
+    # fast (bcrypt at its lowest cost), shared (one hash for everyone) or bcrypt
+    password_hash: str = "fast"
+    seed: int = 42
+    start: datetime = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    days: int = 730
+
+
+class DataGenerator:
+    '''Build the documents of one dataset.
+
+    Collections must be generated in order, brands and categories first and
+    orders before rollups, since each step uses the ids of the earlier ones.
+    '''
+
+    def __init__(self, config: GeneratorConfig):
+        if config.password_hash not in PASSWORD_HASHES:
+            raise ValueError(f"password_hash must be one of {', '.join(PASSWORD_HASHES)}")
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.end = config.start + timedelta(days=config.days)
+        self.brand_ids: list[ObjectId] = []
+        self.brand_titles: list[str] = []
+        self.category_ids: list[ObjectId] = []
+        self.category_titles: list[str] = []
+        # Parallel lists describing the catalog, indexed by product
+        self.product_ids: list[ObjectId] = []
+        self.product_titles: list[str] = []
+        self.product_prices: list[float] = []
+        self.product_images: list[Optional[str]] = []
+        self.product_brands: list[int] = []
+        self.product_categories: list[int] = []
+        self.product_weights: list[float] = []
+        self.user_ids: list[ObjectId] = []
+        self.user_weights: list[float] = []
+        self.admin_ids: list[ObjectId] = []
+        # (day, dimension, key) to revenue, order count, units and fulfilled counts
+        self._rollups: dict[tuple, list] = {}
+
+    # Helpers
+
+    def object_id(self, created: datetime) -> ObjectId:
+        '''An id carrying `created` as its timestamp, so _id order matches created_at'''
+        return ObjectId(struct.pack(">I", int(created.timestamp())) +
+                        self.rng.getrandbits(64).to_bytes(8, "big"))
+
+    def moment(self, after: Optional[datetime] = None) -> datetime:
+        start = after or self.config.start
+        seconds = int((self.end - start).total_seconds())
+        return start + timedelta(seconds=self.rng.randrange(max(seconds, 1)))
+
+    def skewed_order(self, count: int) -> list[float]:
+        '''Zipf weights over a shuffled ranking, so popularity is not insertion order'''
+        ranks = list(range(1, count + 1))
+        self.rng.shuffle(ranks)
+        return list(accumulate(1 / rank ** self.config.skew for rank in ranks))
+
+    def pick(self, cum_weights: list[float]) -> int:
+        return bisect_left(cum_weights, self.rng.random() * cum_weights[-1])
+
+    def _password_hasher(self):
+        from passlib.hash import bcrypt
+
+        from app.utilities.password_utils import hash_password
+
+        if self.config.password_hash == "bcrypt":
+            return lambda: hash_password(PASSWORD)
+        if self.config.password_hash == "fast":
+            # Still verified by the app's context, the cost is in the hash
+            fast = bcrypt.using(rounds=4)
+            return lambda: fast.hash(PASSWORD)
+        shared = hash_password(PASSWORD)
+        return lambda: shared
+
+    # Catalog
+
+    def brands(self) -> list[dict]:
+        return self._named(BRANDS, self.config.brands, self.brand_ids, self.brand_titles)
+
+    def categories(self) -> list[dict]:
+        return self._named(CATEGORIES, self.config.categories, self.category_ids, self.category_titles)
+
+    def _named(self, names: list[str], count: int, ids: list[ObjectId], titles: list[str]) -> list[dict]:
+        documents = []
+        for number in range(count):
+            title = names[number] if number < len(names) else f"{names[number % len(names)]} {number}"
+            created = self.config.start + timedelta(days=number)
+            ids.append(self.object_id(created))
+            titles.append(title)
+            documents.append({"_id": ids[-1], "title": title,
+                              "created_at": created, "updated_at": created})
+        return documents
+
+    def _image(self, product_id: ObjectId, number: int) -> dict:
+        name = f"solestore_ecommerce_app/products/{product_id}-{number}"
+        url = "https://res.cloudinary.com/demo/image/upload/{}-{}.webp"
+        return {
+            "url": url.format(name, 1280),
+            "public_id": f"{name}-1280",
+            "width": 1280,
+            "height": 960,
+            "renditions": [
+                {"width": width, "height": width * 3 // 4, "format": "webp",
+                 "url": url.format(name, width), "public_id": f"{name}-{width}"}
+                for width in RENDITION_WIDTHS
+            ]
+        }
+
+    def _sizes(self, popularity: float) -> list[dict]:
+        sizes = []
+        for size in SIZES:
+            if self.rng.random() < SOLD_OUT_SHARE:
+                stock = 0
+            else:
+                stock = max(1, int(self.rng.randint(5, 60) * SIZE_DEMAND[size] * popularity))
+            sizes.append({"size": size, "stock": stock})
+        return sizes
+
+    def products(self) -> Iterator[dict]:
+        brand_weights = zipf_cum_weights(len(self.brand_ids), self.config.skew)
+        category_weights = zipf_cum_weights(len(self.category_ids), self.config.skew)
+        self.product_weights = self.skewed_order(self.config.products)
+        mean_weight = self.product_weights[-1] / max(self.config.products, 1) if self.product_weights else 1
+        previous = 0.0
+        for number in range(self.config.products):
+            weight = self.product_weights[number] - previous
+            previous = self.product_weights[number]
+            brand = self.pick(brand_weights)
+            category = self.pick(category_weights)
+            created = self.moment()
+            product_id = self.object_id(created)
+            title = (f"{self.brand_titles[brand]} {self.rng.choice(MODELS)} "
+                     f"{self.rng.choice(COLOURS)} {self.category_titles[category]} {number}")
+            price = round(self.rng.lognormvariate(4.6, 0.45), 2)
+            images = [self._image(product_id, image) for image in range(self.rng.randint(1, 5))]
+            description = " ".join(self.rng.choice(DESCRIPTION_WORDS)
+                                   for _ in range(self.rng.randint(3, 9)))
+
+            self.product_ids.append(product_id)
+            self.product_titles.append(title)
+            self.product_prices.append(price)
+            self.product_images.append(images[0]["renditions"][0]["url"] if images else None)
+            self.product_brands.append(brand)
+            self.product_categories.append(category)
+            yield {
+                "_id": product_id,
+                "title": title,
+                "description": description[:100],
+                "price": price,
+                "brand": DBRef("brands", self.brand_ids[brand]),
+                "category": DBRef("categories", self.category_ids[category]),
+                "images": images,
+                # Popular products carry more stock, up to 20 times the rest
+                "sizes": self._sizes(min(20.0, 1 + weight / mean_weight)),
+                "created_at": created,
+                "updated_at": self.moment(created)
+            }
+
+    # Accounts
+
+    def _accounts(self, prefix: str, count: int, ids: list[ObjectId], extra) -> Iterator[dict]:
+        password = self._password_hasher()
+        for number in range(count):
+            created = self.moment() if prefix == USER_PREFIX else self.config.start
+            ids.append(self.object_id(created))
+            yield {
+                "_id": ids[-1],
+                "username": f"{prefix}_{number}",
+                "email": f"{prefix}_{number}@example.com",
+                "name": f"Benchmark {prefix.split('_')[-1]} {number}",
+                "password": password(),
+                "profile_img_url": None,
+                "profile_img_public_id": None,
+                "refresh_tokens": [],
+                "created_at": created,
+                "updated_at": created,
+                **extra()
+            }
+
+    def users(self) -> Iterator[dict]:
+        def contact() -> dict:
+            has_address = self.rng.random() < 0.7
+            return {
+                "address": (f"{self.rng.randint(1, 999)} {self.rng.choice(STREETS)}"
+                            if has_address else None),
+                "phone": f"{self.rng.randint(7_000_000_000, 9_999_999_999)}" if has_address else None,
+                "google_id": None
+            }
+
+        yield from self._accounts(USER_PREFIX, self.config.users, self.user_ids, contact)
+        self.user_weights = self.skewed_order(len(self.user_ids))
+
+    def admins(self) -> Iterator[dict]:
+        roles = ["ADMIN", "ORDER_MANAGER", "PRODUCT_MANAGER"]
+        numbers = iter(range(self.config.admins))
+        yield from self._accounts(
+            ADMIN_PREFIX, self.config.admins, self.admin_ids,
+            lambda: {"role": roles[next(numbers) % len(roles)], "phone": None})
+
+    # Carts and orders
+
+    def _line(self, user_id: ObjectId, product: int, created: datetime) -> dict:
+        return {
+            "_id": self.object_id(created),
+            "user_id": user_id,
+            "product_id": self.product_ids[product],
+            "title": self.product_titles[product],
+            "price": self.product_prices[product],
+            "size": self.rng.choice(SIZES),
+            "quantity": self.rng.choices((1, 2, 3), (80, 15, 5))[0],
+            "image_url": self.product_images[product],
+            "created_at": created,
+            "updated_at": created
+        }
+
+    def _products_for_basket(self) -> list[int]:
+        count = self.rng.choices((1, 2, 3, 4), (55, 25, 12, 8))[0]
+        return list(dict.fromkeys(self.pick(self.product_weights) for _ in range(count)))
+
+    def carts(self) -> Iterator[dict]:
+        recent = self.end - timedelta(days=30)
+        for user_id in self.user_ids:
+            if self.rng.random() < self.config.cart_share:
+                for product in self._products_for_basket():
+                    yield self._line(user_id, product, self.moment(recent))
+
+    def _status(self, created: datetime) -> tuple[str, bool]:
+        age = self.end - created
+        if age < timedelta(days=2):
+            status = self.rng.choices(("REQUESTED", "PROCESSING"), (70, 30))[0]
+        elif age < timedelta(days=10):
+            status = self.rng.choices(("PROCESSING", "SHIPPED", "DELIVERED"), (10, 60, 30))[0]
+        else:
+            status = self.rng.choices(("SHIPPED", "DELIVERED"), (2, 98))[0]
+        # Some recent requested orders were never paid
+        paid = status != "REQUESTED" or self.rng.random() < 0.8
+        return status, paid
+
+    def orders(self) -> Iterator[dict]:
+        for _ in range(self.config.orders):
+            user_id = self.user_ids[self.pick(self.user_weights)]
+            created = self.moment()
+            products = self._products_for_basket()
+            lines = [self._line(user_id, product, created) for product in products]
+            items = []
+            for line in lines:
+                item = {**line, "id": str(line["_id"]), "user_id": str(user_id),
+                        "product_id": str(line["product_id"])}
+                del item["_id"]
+                items.append(item)
+            total = round(sum(item["price"] * item["quantity"] for item in items), 2)
+            status, paid = self._status(created)
+            processing = status == "PROCESSING" and self.admin_ids
+            order = {
+                "_id": self.object_id(created),
+                "user": DBRef("users", user_id),
+                "user_id": user_id,
+                "order_details": {
+                    "items": items,
+                    "total_price": total,
+                    "total_count": sum(item["quantity"] for item in items)
+                },
+                "address": f"{self.rng.randint(1, 999)} {self.rng.choice(STREETS)}",
+                "phone": f"{self.rng.randint(7_000_000_000, 9_999_999_999)}",
+                "processing_admin": self.rng.choice(self.admin_ids) if processing else None,
+                # Expired, so benchmark admins can claim these orders
+                "processing_lease_expires_at": created + timedelta(minutes=15) if processing else None,
+                "razorpay_order_id": f"order_{self.rng.getrandbits(56):014x}",
+                "razorpay_payment_id": f"pay_{self.rng.getrandbits(56):014x}" if paid else None,
+                "amount": total,
+                "payment_verified": paid,
+                "order_status": status,
+                "version": 0 if status == "REQUESTED" else self.rng.randint(1, 3),
+                "created_at": created,
+                "updated_at": created
+            }
+            if paid:
+                self._add_to_rollups(order, products)
+            yield order
+
+    def _add_to_rollups(self, order: dict, products: list[int]):
+        '''What record_paid_order and record_status_change would have stored'''
+        created = order["created_at"]
+        day = datetime(created.year, created.month, created.day, tzinfo=timezone.utc)
+        buckets: dict[tuple[str, str], list] = defaultdict(lambda: [0.0, 0])
+        for product, item in zip(products, order["order_details"]["items"]):
+            line_total = item["price"] * item["quantity"]
+            keys = [("all", "all"),
+                    ("brand", str(self.brand_ids[self.product_brands[product]])),
+                    ("category", str(self.category_ids[self.product_categories[product]]))]
+            for key in keys:
+                buckets[key][0] += line_total
+                buckets[key][1] += item["quantity"]
+        for (dimension, key), (revenue, units) in buckets.items():
+            totals = self._rollups.setdefault((day, dimension, key), [0.0, 0, 0, {}])
+            totals[0] += round(revenue, 2)
+            totals[1] += 1
+            totals[2] += units
+        if order["order_status"] in ("SHIPPED", "DELIVERED"):
+            status_counts = self._rollups[(day, "all", "all")][3]
+            status_counts[order["order_status"]] = status_counts.get(order["order_status"], 0) + 1
+
+    def rollups(self) -> Iterator[dict]:
+        for (day, dimension, key), (revenue, count, units, status_counts) in sorted(
+                self._rollups.items()):
+            yield {
+                "_id": self.object_id(day),
+                "day": day,
+                "dimension": dimension,
+                "key": key,
+                "revenue": round(revenue, 2),
+                "order_count": count,
+                "units": units,
+                "status_counts": status_counts,
+                "updated_at": day
+            }
+
+    def collections(self) -> Iterator[tuple[str, Iterable[dict]]]:
+        '''Collection names and their documents, in the order they must be built'''
+        yield "brands", self.brands()
+        yield "categories", self.categories()
+        yield "products", self.products()
+        yield "users", self.users()
+        yield "admins", self.admins()
+        yield "product_in_cart", self.carts()
+        yield "orders", self.orders()
+        yield "order_rollups", self.rollups()
+
+
+async def _insert_batches(collection, documents: Iterable[dict], batch_size: Optional[int]) -> int:
+    '''Write while the next batch is generated, Motor sends from its own threads'''
+    inserted = 0
+    pending: Optional[asyncio.Task] = None
+    batch: list[dict] = []
+    size = batch_size
+    for document in documents:
+        if size is None:
+            size = batch_size_for(document)
+        batch.append(document)
+        if len(batch) >= size:
+            if pending is not None:
+                inserted += await pending
+            pending = asyncio.ensure_future(_insert_many(collection, batch))
+            batch = []
+            # Let the write start before generating the next batch
+            await asyncio.sleep(0)
+    if pending is not None:
+        inserted += await pending
+    if batch:
+        inserted += await _insert_many(collection, batch)
+    return inserted
+
+
+async def _insert_many(collection, batch: list[dict]) -> int:
+    await collection.insert_many(batch, ordered=False, bypass_document_validation=True)
+    return len(batch)
+
+
+async def insert_dataset(
+        database,
+        config: GeneratorConfig,
+        batch_size: Optional[int] = None,
+        log=print
+) -> dict[str, int]:
+    '''Drop the dataset's collections and write a freshly generated one.
+
+    Indexes are left to `init_beanie`, building them once after the load
+    is faster than maintaining them during it. `batch_size` None sizes
+    the batches of each collection from its first document.
+    '''
+    generator = DataGenerator(config)
+    for name in COLLECTIONS:
+        await database.drop_collection(name)
+
+    counts = {}
+    for name, documents in generator.collections():
+        started = time.perf_counter()
+        counts[name] = await _insert_batches(database[name], documents, batch_size)
+        elapsed = time.perf_counter() - started
+        log(f"{name}: {counts[name]} documents in {elapsed:.1f}s "
+            f"({counts[name] / max(elapsed, 1e-9):.0f}/s)")
+    return counts
+
+
+def dataset_digest(config: GeneratorConfig) -> tuple[dict[str, int], str]:
+    '''Counts and a hash of a dataset without writing it, to check determinism'''
+    digest = hashlib.sha256()
+    counts = {}
+    for name, documents in DataGenerator(config).collections():
+        counts[name] = 0
+        for document in documents:
+            document.pop("password", None)
+            digest.update(bson.encode(document))
+            counts[name] += 1
+    return counts, digest.hexdigest()
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser):
+    '''Dataset options, shared with the load benchmark'''
+    defaults = GeneratorConfig()
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--admins", type=int, default=defaults.admins)
+    parser.add_argument("--brands", type=int, default=defaults.brands)
+    parser.add_argument("--categories", type=int, default=defaults.categories)
+    parser.add_argument("--cart-share", type=float, default=defaults.cart_share,
+                        help="share of users with a cart")
+    parser.add_argument("--skew", type=float, default=defaults.skew,
+                        help="zipf exponent of popularity, 0 for uniform")
+    parser.add_argument("--password-hash", choices=PASSWORD_HASHES, default=defaults.password_hash,
+                        help="fast: bcrypt at its lowest cost, shared: one hash for every account")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="documents per insert_many, sized per collection by default")
+
+
+def config_from_arguments(args: argparse.Namespace) -> GeneratorConfig:
+    return GeneratorConfig(
+        products=args.products,
+        users=args.users,
+        orders=args.orders,
+        admins=args.admins,
+        brands=args.brands,
+        categories=args.categories,
+        cart_share=args.cart_share,
+        skew=args.skew,
+        password_hash=args.password_hash,
+        seed=args.seed
+    )
+
+
+def use_database(name: str):
+    '''Point the app at `name`, refusing the configured app database.
+
+    Call before anything imports `app.config.db`, which opens its database
+    on import.
+    '''
+    from app.config.env_settings import settings
+
+    if name == settings.DATABASE_NAME:
+        raise SystemExit(f"Refusing to replace {name}, it is the configured app database")
+    settings.DATABASE_NAME = name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default=DEFAULT_DATABASE,
+                        help="database to replace with the generated data")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="generate without writing, print the counts and a digest")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+    config = config_from_arguments(args)
+
+    if args.dry_run:
+        started = time.perf_counter()
+        counts, digest = dataset_digest(config)
+        print(f"{counts} in {time.perf_counter() - started:.1f}s, sha256 {digest}")
+        return
+
+    use_database(args.database)
+    from app.config.db import database
+
+    async def generate():
+        started = time.perf_counter()
+        await insert_dataset(database, config, args.batch_size)
+        print(f"Generated {args.database} in {time.perf_counter() - started:.1f}s")
+
+    asyncio.run(generate())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+'''Throughput and latency of the storefront and admin APIs under a scenario mix.
+
+Run from the server directory against a local Mongo:
+
+    python -m app.benchmarks.load_benchmark --seed-data --products 100000 \\
+        --orders 1000000 --users 50000 --duration 60 --output run.json
+
+The app runs in process with its lifespan, driven through httpx, so the
+numbers cover routing, validation, serialization and Mongo but no network
+or server workers. Virtual users loop over browsing, searching, adding to
+the cart, checking out and processing orders as admins. Percentiles and
+requests per second are written as JSON; pass an earlier run to
+--compare to see what changed between commits.
+
+Checkout calls Razorpay to create the payment order. Unless
+--live-payments is given, an offline stand-in answers instead so a run
+makes no outside calls.
+'''
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import secrets
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Awaitable, Callable, Optional
+
+from app.benchmarks.data_generator import (
+    ADMIN_PREFIX,
+    CATEGORIES,
+    COLOURS,
+    DEFAULT_DATABASE,
+    PASSWORD,
+    SIZES,
+    USER_PREFIX,
+    add_dataset_arguments,
+    config_from_arguments,
+    insert_dataset,
+    use_database
+)
+
+SCENARIO_WEIGHTS = {
+    "browse": 45,
+    "search": 20,
+    "add_to_cart": 20,
+    "checkout": 5,
+    "admin_orders": 10
+}
+# Ids the scenarios pick from, sampled from the seeded collections
+POOL_SIZE = 5000
+
+
+# Load
+
+class OfflinePaymentOrders:
+    '''Answers Razorpay order creation locally, like the real API would'''
+
+    def create(self, data: dict) -> dict:
+        return {
+            "id": f"order_{secrets.token_hex(7)}",
+            "entity": "order",
+            "amount": int(data["amount"]),
+            "amount_due": int(data["amount"]),
+            "amount_paid": 0,
+            "attempts": 0,
+            "created_at": int(time.time()),
+            "currency": data["currency"],
+            "receipt": data["receipt"],
+            "status": "created",
+            "notes": []
+        }
+
+
+@dataclass
+class Pools:
+    '''Ids the scenarios choose from'''
+    product_ids: list[str]
+    brand_ids: list[str]
+    category_ids: list[str]
+    search_terms: list[str] = field(default_factory=lambda: [
+        term.lower() for term in COLOURS + CATEGORIES])
+
+
+async def load_pools(database) -> Pools:
+    async def sample(collection) -> list[str]:
+        cursor = collection.aggregate([{"$sample": {"size": POOL_SIZE}}, {"$project": {"_id": 1}}])
+        return [str(document["_id"]) async for document in cursor]
+
+    pools = Pools(
+        product_ids=await sample(database.products),
+        brand_ids=await sample(database.brands),
+        category_ids=await sample(database.categories)
+    )
+    if not pools.product_ids:
+        raise SystemExit("The benchmark database has no products, run with --seed-data")
+    return pools
+
+
+class Recorder:
+    '''Latencies and statuses per endpoint and scenario, kept after the warm-up'''
+
+    def __init__(self):
+        self.measuring = False
+        self.endpoints: dict[str, list[float]] = defaultdict(list)
+        self.scenarios: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def request(self, label: str, seconds: float, status: int):
+        if self.measuring:
+            self.endpoints[label].append(seconds)
+            self.statuses[label][status] += 1
+
+    def scenario(self, name: str, seconds: float):
+        if self.measuring:
+            self.scenarios[name].append(seconds)
+
+
+class VirtualUser:
+    '''One shopper and, for the admin scenario, one admin with their own sessions'''
+
+    def __init__(self, app, number: int, admins: int, recorder: Recorder, pools: Pools, seed: int):
+        from httpx import ASGITransport, AsyncClient
+
+        self.number = number
+        self.admins = admins
+        self.recorder = recorder
+        self.pools = pools
+        self.rng = random.Random(seed * 1000 + number)
+        transport = ASGITransport(app=app)
+        self.client = AsyncClient(transport=transport, base_url="http://benchmark")
+        self.admin_client = AsyncClient(transport=transport, base_url="http://benchmark")
+
+    async def login(self):
+        from app.config.env_settings import settings
+
+        await self._login(self.client, "/api/auth/login",
+                          f"{USER_PREFIX}_{self.number}", settings.USER_REFRESH_COOKIE_NAME)
+        if self.admins:
+            await self._login(self.admin_client, "/api/admin/auth/login",
+                              f"{ADMIN_PREFIX}_{self.number % self.admins}",
+                              settings.ADMIN_REFRESH_COOKIE_NAME)
+
+    @staticmethod
+    async def _login(client, path: str, username: str, cookie_name: str):
+        response = await client.post(path, data={"username": username, "password": PASSWORD})
+        if response.status_code != 200:
+            raise SystemExit(f"Could not log in {username}: {response.status_code} {response.text}")
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        client.cookies.set(cookie_name, response.cookies[cookie_name])
+
+    async def close(self):
+        await self.client.aclose()
+        await self.admin_client.aclose()
+
+    async def call(self, label: str, method: str, url: str, admin: bool = False, **kwargs):
+        client = self.admin_client if admin else self.client
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.recorder.request(label, time.perf_counter() - started, 599)
+            raise
+        self.recorder.request(label, time.perf_counter() - started, response.status_code)
+        return response
+
+    # Scenarios
+
+    async def browse(self):
+        await self.call("GET /api/product/", "GET", "/api/product/",
+                        params={"page": self.rng.randint(1, 20)})
+        for _ in range(self.rng.randint(1, 3)):
+            product_id = self.rng.choice(self.pools.product_ids)
+            await self.call("GET /api/product/{product_id}", "GET", f"/api/product/{product_id}")
+
+    async def search(self):
+        await self.call("GET /api/brand/", "GET", "/api/brand/")
+        await self.call("GET /api/category/", "GET", "/api/category/")
+        params = {"search": self.rng.choice(self.pools.search_terms)}
+        if self.rng.random() < 0.5:
+            params["brand"] = self.rng.choice(self.pools.brand_ids)
+        if self.rng.random() < 0.3:
+            params["size"] = self.rng.choice(SIZES)
+        await self.call("GET /api/product/ search", "GET", "/api/product/", params=params)
+
+    async def add_to_cart(self):
+        await self.call("POST /api/cart/add", "POST", "/api/cart/add", json={
+            "product_id": self.rng.choice(self.pools.product_ids),
+            "size": self.rng.choice(SIZES),
+            "quantity": 1
+        })
+        await self.call("GET /api/cart/", "GET", "/api/cart/")
+
+    async def checkout(self):
+        await self.add_to_cart()
+        await self.call("POST /api/order/create-order", "POST", "/api/order/create-order",
+                        json={"address": "221B Market Street, Springfield", "phone": "9876543210"})
+        await self.call("GET /api/order/", "GET", "/api/order/", params={"summary": True})
+
+    async def admin_orders(self):
+        if not self.admins:
+            return
+        response = await self.call(
+            "GET /api/admin/order/", "GET", "/api/admin/order/", admin=True,
+            params={"order_status": "REQUESTED", "summary": True, "page": self.rng.randint(1, 5)})
+        orders = response.json() if response.status_code == 200 else []
+        if not orders:
+            return
+        order_id = self.rng.choice(orders)["id"]
+        await self.call("GET /api/admin/order/{order_id}", "GET",
+                        f"/api/admin/order/{order_id}", admin=True)
+        claimed = await self.call("POST /api/admin/order/{order_id}/process", "POST",
+                                  f"/api/admin/order/{order_id}/process", admin=True)
+        if claimed.status_code == 200:
+            await self.call("PUT /api/admin/order/{order_id}/update-status", "PUT",
+                            f"/api/admin/order/{order_id}/update-status", admin=True,
+                            json={"order_status": "SHIPPED"})
+
+    async def run(self, weights: dict[str, int], deadline: float):
+        names = list(weights)
+        scenario_weights = [weights[name] for name in names]
+        while time.perf_counter() < deadline:
+            name = self.rng.choices(names, scenario_weights)[0]
+            scenario: Callable[[], Awaitable[None]] = getattr(self, name)
+            started = time.perf_counter()
+            try:
+                await scenario()
+            except Exception as e:
+                # Recorded as a 599 by `call`, keep the user going
+                print(f"{name} failed: {e!r}", file=sys.stderr)
+            self.recorder.scenario(name, time.perf_counter() - started)
+
+
+async def run_load(
+        app,
+        pools: Pools,
+        concurrency: int,
+        duration: float,
+        warmup: float,
+        admins: int = 4,
+        weights: Optional[dict[str, int]] = None,
+        seed: int = 42
+) -> tuple[Recorder, float]:
+    '''Run `concurrency` virtual users, measuring for `duration` seconds after `warmup`'''
+    recorder = Recorder()
+    users = [VirtualUser(app, number, admins, recorder, pools, seed) for number in range(concurrency)]
+    try:
+        await asyncio.gather(*(user.login() for user in users))
+        started = time.perf_counter()
+        deadline = started + warmup + duration
+        tasks = [asyncio.create_task(user.run(weights or SCENARIO_WEIGHTS, deadline))
+                 for user in users]
+        await asyncio.sleep(warmup)
+        recorder.measuring = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*tasks)
+        return recorder, time.perf_counter() - measured_from
+    finally:
+        await asyncio.gather(*(user.close() for user in users))
+
+
+# Results
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    '''Linear interpolation between closest ranks, `q` in 0..100'''
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def latency_summary(values: list[float], elapsed: float) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0
+    }
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    every_request = [value for values in recorder.endpoints.values() for value in values]
+    endpoints = {}
+    for label, values in sorted(recorder.endpoints.items()):
+        statuses = recorder.statuses[label]
+        endpoints[label] = {
+            **latency_summary(values, elapsed),
+            "client_errors": sum(count for status, count in statuses.items() if 400 <= status < 500),
+            "server_errors": sum(count for status, count in statuses.items() if status >= 500),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())}
+        }
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": {
+            **latency_summary(every_request, elapsed),
+            "server_errors": sum(endpoint["server_errors"] for endpoint in endpoints.values())
+        },
+        "endpoints": endpoints,
+        "scenarios": {name: latency_summary(values, elapsed)
+                      for name, values in sorted(recorder.scenarios.items())}
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[dict]:
+    '''Change in p95 and throughput per endpoint against an earlier run'''
+    rows = []
+    labels = ["total"] + sorted(set(baseline["endpoints"]) | set(current["endpoints"]))
+    for label in labels:
+        before = baseline["total"] if label == "total" else baseline["endpoints"].get(label)
+        after = current["total"] if label == "total" else current["endpoints"].get(label)
+        if not before or not after:
+            continue
+        rows.append({
+            "endpoint": label,
+            "p95_ms": (before["p95_ms"], after["p95_ms"]),
+            "p95_change": _change(before["p95_ms"], after["p95_ms"]),
+            "rps": (before["rps"], after["rps"]),
+            "rps_change": _change(before["rps"], after["rps"])
+        })
+    return rows
+
+
+def _change(before: float, after: float) -> Optional[float]:
+    return round((after - before) / before * 100, 1) if before else None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(summary: dict):
+    print(f"{'endpoint':<48}{'count':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'5xx':>6}")
+    rows = [("total", summary["total"])] + list(summary["endpoints"].items())
+    for label, row in rows:
+        print(f"{label:<48}{row['count']:>8}{row['rps']:>9}{row['p50_ms']:>9}"
+              f"{row['p95_ms']:>9}{row['p99_ms']:>9}{row['server_errors']:>6}")
+
+
+def _print_comparison(rows: list[dict]):
+    print(f"\n{'endpoint':<48}{'p95 before':>11}{'after':>9}{'change':>9}"
+          f"{'rps before':>12}{'after':>9}{'change':>9}")
+    for row in rows:
+        p95_change = "" if row["p95_change"] is None else f"{row['p95_change']:+}%"
+        rps_change = "" if row["rps_change"] is None else f"{row['rps_change']:+}%"
+        print(f"{row['endpoint']:<48}{row['p95_ms'][0]:>11}{row['p95_ms'][1]:>9}{p95_change:>9}"
+              f"{row['rps'][0]:>12}{row['rps'][1]:>9}{rps_change:>9}")
+
+
+async def benchmark(args) -> dict:
+    from app.config.db import database
+    from app.crud import order_crud
+    from app.main import app
+
+    if args.seed_data:
+        started = time.perf_counter()
+        await insert_dataset(database, config_from_arguments(args), args.batch_size,
+                             log=lambda line: print(line, file=sys.stderr))
+        print(f"Seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    live_client = order_crud.razorpay_client
+    if not args.live_payments:
+        order_crud.razorpay_client = SimpleNamespace(order=OfflinePaymentOrders())
+    try:
+        async with app.router.lifespan_context(app):
+            pools = await load_pools(database)
+            recorder, elapsed = await run_load(
+                app, pools, concurrency=args.concurrency, duration=args.duration,
+                warmup=args.warmup, admins=args.admins, seed=args.seed)
+    finally:
+        order_crud.razorpay_client = live_client
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "database": args.database,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+            "scenario_weights": SCENARIO_WEIGHTS,
+            "live_payments": args.live_payments
+        },
+        **summarize(recorder, elapsed)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default=DEFAULT_DATABASE,
+                        help="database to seed and run against, replaced when seeding")
+    parser.add_argument("--seed-data", action="store_true",
+                        help="generate the dataset first, see app.benchmarks.data_generator")
+    # --seed also seeds the scenario choices of the virtual users
+    add_dataset_arguments(parser)
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds run before measuring")
+    parser.add_argument("--live-payments", action="store_true",
+                        help="create real Razorpay orders on checkout")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.concurrency > args.users:
+        raise SystemExit("Each virtual user logs in as its own seeded user, raise --users")
+    # Before the app is imported, the Mongo client picks its database on import
+    use_database(args.database)
+
+    results = asyncio.run(benchmark(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print_table(results)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            _print_comparison(compare(json.load(baseline), results))
+
+
+if __name__ == "__main__":
+    main()
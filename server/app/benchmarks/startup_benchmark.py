@@ -0,0 +1,162 @@
+'''Cold import time of the application and where it goes.
+
+Run from the server directory:
+
+    python -m app.benchmarks.startup_benchmark --runs 10 --top 25
+
+Each run imports `app.main` in a fresh interpreter, the way a new uvicorn
+worker does after a scaling event; one unrecorded run first writes the
+bytecode cache. A further run with `-X importtime` breaks the time down
+by module and by top-level package. The SDKs in LAZY_MODULES are loaded
+on first use, the report fails when one of them is imported at startup
+again, or when --budget is given and the fastest run exceeds it.
+'''
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+
+TARGET = "app.main"
+# Behind lazy facades, importing the app must not load them
+LAZY_MODULES = (
+    "razorpay",
+    "cloudinary",
+    "PIL",
+    "google.oauth2",
+    "google.auth.transport.requests"
+)
+# Fastest cold import allowed by the startup test
+IMPORT_BUDGET_SECONDS = 3.0
+
+MEASURE_SCRIPT = '''
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "lazy_loaded": [
+    name for name in {lazy!r} if name in sys.modules]}}))
+'''
+
+
+@dataclass
+class ImportRecord:
+    '''One line of the -X importtime report, times in microseconds'''
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def measure_import(module: str = TARGET, importtime: bool = False) -> tuple[dict, str]:
+    '''Import `module` in a new interpreter, return its timing and stderr.
+
+    The interpreter runs in the current directory, which the app resolves
+    its static file directories against.
+    '''
+    flags = ["-X", "importtime"] if importtime else []
+    result = subprocess.run(
+        [sys.executable, *flags, "-c", MEASURE_SCRIPT.format(module=module, lazy=LAZY_MODULES)],
+        capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(report: str) -> list[ImportRecord]:
+    '''Records of an -X importtime report, other stderr lines are skipped'''
+    records = []
+    for line in report.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line
+            continue
+        name = fields[2].rstrip()
+        # Nested imports are indented two spaces per level below the first
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append(ImportRecord(name.strip(), int(fields[0]), int(fields[1]), depth))
+    return records
+
+
+def by_package(records: list[ImportRecord]) -> dict[str, int]:
+    '''Self time per top-level package, largest first'''
+    totals: dict[str, int] = defaultdict(int)
+    for record in records:
+        totals[record.name.split(".")[0]] += record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def summarize(module: str, runs: list[dict], records: list[ImportRecord], top: int) -> dict:
+    seconds = [run["seconds"] for run in runs]
+    slowest = sorted(records, key=lambda record: record.cumulative_us, reverse=True)
+    return {
+        "module": module,
+        "runs": len(runs),
+        "import_s": {
+            "min": round(min(seconds), 4),
+            "median": round(statistics.median(seconds), 4),
+            "max": round(max(seconds), 4)
+        },
+        "lazy_loaded": sorted({name for run in runs for name in run["lazy_loaded"]}),
+        "packages_ms": {name: round(us / 1000, 1)
+                        for name, us in list(by_package(records).items())[:top]},
+        "modules": [asdict(record) for record in slowest[:top]]
+    }
+
+
+def _print_report(summary: dict):
+    times = summary["import_s"]
+    print(f"import {summary['module']}: min {times['min']}s  median {times['median']}s  "
+          f"max {times['max']}s over {summary['runs']} runs")
+    print(f"\n{'package':<40}{'self ms':>10}")
+    for name, ms in summary["packages_ms"].items():
+        print(f"{name:<40}{ms:>10}")
+    print(f"\n{'module':<60}{'cumulative ms':>15}{'self ms':>10}")
+    for record in summary["modules"]:
+        label = "  " * record["depth"] + record["name"]
+        print(f"{label:<60}{record['cumulative_us'] / 1000:>15.1f}{record['self_us'] / 1000:>10.1f}")
+    if summary["lazy_loaded"]:
+        print(f"\nLoaded at startup, expected lazily: {', '.join(summary['lazy_loaded'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default=TARGET, help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="timed cold imports")
+    parser.add_argument("--top", type=int, default=20, help="packages and modules listed")
+    parser.add_argument("--budget", type=float,
+                        help=f"fail when the fastest import takes longer, in seconds "
+                             f"(the test uses {IMPORT_BUDGET_SECONDS})")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # Writes the bytecode cache, so the timed runs compile nothing
+    measure_import(args.module)
+    runs = [measure_import(args.module)[0] for _ in range(args.runs)]
+    _, report = measure_import(args.module, importtime=True)
+    summary = summarize(args.module, runs, parse_importtime(report), args.top)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(summary, output, indent=2)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_report(summary)
+
+    over_budget = args.budget is not None and summary["import_s"]["min"] > args.budget
+    if over_budget:
+        print(f"\nOver the {args.budget}s budget", file=sys.stderr)
+    if over_budget or summary["lazy_loaded"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
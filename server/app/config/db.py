@@ -1,35 +1,98 @@
 '''Mongo DB initialization'''
 
+import asyncio
+import importlib.util
+import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
+from pymongo.errors import PyMongoError
 
 from app.config.env_settings import Settings, get_settings
+# Registers the command and pool listeners for /metrics before the client is created
+from app.config.metrics import pool_max_size
 from app.model.user import User
 from app.admin_app.admin_models.admin import Admin
 from app.model.brand_models import Brand
 from app.model.category_model import Category
 from app.model.product_models import Product
 from app.model.cart_models import ProductInCart
-from app.model.order_models import Order
+from app.model.order_models import Order, OrderRollup
+from app.model.media_models import MediaAsset, MediaDeletion
+
+logger = logging.getLogger(__name__)
 settings: Settings = get_settings()
 
-client: AsyncIOMotorClient = AsyncIOMotorClient(settings.MONGODB_URI)
+
+# Compressors PyMongo implements with an optional package
+COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy"}
+
+
+def _compressors(value: str) -> list[str]:
+    '''Configured compressors whose package is installed, in order'''
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    missing = [name for name in names if name in COMPRESSOR_PACKAGES
+               and importlib.util.find_spec(COMPRESSOR_PACKAGES[name]) is None]
+    if missing:
+        logger.warning("Mongo compressors %s need %s, not installed", ", ".join(missing),
+                       ", ".join(COMPRESSOR_PACKAGES[name] for name in missing))
+    return [name for name in names if name not in missing]
+
+
+def client_options(settings: Settings) -> dict:
+    '''Pool, timeout, compression and read preference options for the client'''
+    return {
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "compressors": _compressors(settings.MONGO_COMPRESSORS),
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+    }
+
+
+# Connects lazily, the pool is opened by warm_up_pool during startup
+client: AsyncIOMotorClient = AsyncIOMotorClient(settings.MONGODB_URI, **client_options(settings))
+pool_max_size.set(value=settings.MONGO_MAX_POOL_SIZE)
 database = client[settings.DATABASE_NAME]
 
+DOCUMENT_MODELS = [
+    User,
+    Admin,
+    Brand,
+    Category,
+    Product,
+    ProductInCart,
+    Order,
+    OrderRollup,
+    MediaDeletion,
+    MediaAsset,
+]
+
 
 # Function to initialize Beanie with the database
 async def init_db():
     '''Initialize database'''
-    print("Initializing Beanie with the database")
-    await init_beanie(
-        database,
-        document_models=[
-            User,
-            Admin,
-            Brand,
-            Category,
-            Product,
-            ProductInCart,
-            Order,
-        ]
-    )
+    logger.info("Initializing Beanie with the database")
+    await init_beanie(database, document_models=DOCUMENT_MODELS)
+
+
+async def warm_up_pool():
+    '''Open the minimum pool now, so the first requests skip the handshakes'''
+    size = settings.MONGO_MIN_POOL_SIZE
+    if size <= 0:
+        return
+    try:
+        # Concurrent commands each check out a connection of their own
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(size)))
+    except PyMongoError as e:
+        # The pool keeps filling to its minimum in the background
+        logger.warning("Mongo pool warm-up failed: %s", e)
+        return
+    logger.info("Mongo pool warmed up with %d connections", size)
+
+
+def close_db():
+    '''Close the pool's connections'''
+    client.close()
+    logger.info("Database connections closed")
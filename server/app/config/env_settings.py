@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -19,6 +20,63 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str
     RAZOR_PAY_API_KEY: str
     RAZOR_PAY_API_SECRET: str
+    # Connections per Mongo server; MIN are opened at startup and kept open
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MAX_IDLE_TIME_MS: int = 300_000
+    # Fail fast instead of queueing behind a saturated pool or a missing primary
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: int = 2_000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5_000
+    # Comma separated, in order of preference; zstd needs zstandard, snappy python-snappy
+    MONGO_COMPRESSORS: str = "zstd,zlib"
+    # primary, primaryPreferred, secondary, secondaryPreferred or nearest
+    MONGO_READ_PREFERENCE: str = "primary"
+    ORDER_PROCESSING_LEASE_SECONDS: int = 900
+    # memory (single process), mongo or redis
+    SOCKETIO_MANAGER: str = "memory"
+    SOCKETIO_CHANNEL: str = "solestore"
+    SOCKETIO_REDIS_URL: Optional[str] = None
+    # default (JSON) or msgpack; clients must use the matching parser
+    SOCKETIO_SERIALIZER: str = "default"
+    # Comma separated; clients connect with websocket only
+    SOCKETIO_TRANSPORTS: str = "websocket"
+    SOCKETIO_MAX_CONNECTIONS_PER_USER: int = 5
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    # Uploaded images are re-encoded at these widths and formats (webp, avif)
+    IMAGE_RENDITION_WIDTHS: str = "320,640,1280"
+    IMAGE_OUTPUT_FORMATS: str = "webp"
+    IMAGE_QUALITY: int = 80
+    PROFILE_IMAGE_WIDTH: int = 512
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_MAX_CONCURRENCY: int = 4
+    # Per image and per multipart request
+    MAX_IMAGE_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    MAX_UPLOAD_REQUEST_BYTES: int = 50 * 1024 * 1024
+    # cloudinary or local; local files are served from MEDIA_URL_PATH
+    MEDIA_STORAGE: str = "cloudinary"
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL_PATH: str = "/media"
+    MEDIA_BASE_URL: Optional[str] = None
+    # Deleted media is removed in batches by a background worker
+    MEDIA_DELETION_WORKER: bool = True
+    MEDIA_DELETE_CALLS_PER_MINUTE: int = 30
+    MEDIA_DELETE_MAX_ATTEMPTS: int = 8
+    # API responses smaller than this are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_GZIP_LEVEL: int = 6
+    # Send X-DB-Roundtrips and X-DB-Time-Ms on every response, on in development and testing
+    METRICS_DEBUG_HEADERS: Optional[bool] = None
+    # Bearer token required by /metrics when set; without one, production serves no /metrics
+    METRICS_TOKEN: Optional[str] = None
+    # Flag requests repeating one query shape this often, on unless in production
+    QUERY_DETECTOR: Optional[bool] = None
+    QUERY_DETECTOR_THRESHOLD: int = 5
+    # json or text; per-module levels and sample rates are name=value lists
+    LOG_FORMAT: str = "json"
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""
+    LOG_SAMPLE_RATES: str = "app.config.socket_manager=0.1"
 
     model_config = SettingsConfigDict(env_file=".env")
 
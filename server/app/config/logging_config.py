@@ -0,0 +1,170 @@
+'''Structured, non-blocking logging.
+
+Records are put on a queue by the calling code and formatted and written
+by a `QueueListener` thread, so a log call on the event loop never waits
+for stdout. Each record carries the id of the request or socket it was
+logged for, taken from a context variable.
+'''
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config.env_settings import settings
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+def parse_levels(value: str) -> dict[str, int]:
+    '''"app.routes=INFO,app.config.socket_manager=WARNING" to logger levels'''
+    levels = {}
+    for item in value.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def parse_rates(value: str) -> dict[str, float]:
+    '''"app.config.socket_manager=0.1" to the share of records kept'''
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class RequestIdFilter(logging.Filter):
+    '''Stamp records with the current request id, runs in the calling thread'''
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    '''Keep a share of the records of high-volume loggers.
+
+    Rates apply to a logger and its children. Warnings and errors are
+    always kept.
+    '''
+
+    def __init__(self, rates: dict[str, float], rng: Optional[random.Random] = None):
+        super().__init__()
+        # Longest name first so the most specific logger wins
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self.random = (rng or random.Random()).random
+
+    def rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or self.random() < rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    '''QueueHandler that leaves formatting to the listener thread.
+
+    The message is merged with its arguments here, since they may change
+    after the call, but tracebacks and the output format are rendered by
+    the listener.
+    '''
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    '''One JSON object per line, with `extra` fields at the top level'''
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(
+        level: str = None,
+        levels: str = None,
+        sample_rates: str = None,
+        log_format: str = None,
+        stream=None
+) -> QueueListener:
+    '''Route the `app` loggers through a queue to a background writer.
+
+    Settings are read from LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE_RATES and
+    LOG_FORMAT unless given. Calling it again replaces the previous setup.
+    '''
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if (log_format or settings.LOG_FORMAT) == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter(parse_rates(
+        sample_rates if sample_rates is not None else settings.LOG_SAMPLE_RATES)))
+
+    app_logger = logging.getLogger("app")
+    for existing in list(app_logger.handlers):
+        app_logger.removeHandler(existing)
+    app_logger.addHandler(handler)
+    app_logger.setLevel(level or settings.LOG_LEVEL)
+    app_logger.propagate = False
+    for name, module_level in parse_levels(
+            levels if levels is not None else settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    '''Write out queued records and stop the writer thread'''
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,322 @@
+'''Process metrics in the Prometheus text format.
+
+Counters, gauges and histograms are kept in memory per worker and rendered
+by the `/metrics` route. Mongo commands are counted by a PyMongo command
+listener; commands issued while a request is handled are also added to
+that request's `DbStats` through a context variable, which Motor carries
+into its executor threads. A connection pool listener tracks open, idle
+and checked out connections and the time requests wait for one.
+'''
+
+import threading
+from bisect import bisect_left
+from collections import Counter as CollectionCounter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from pymongo import monitoring
+
+from app.utilities.query_detector import command_shape
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+ROUNDTRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.kind}",
+                *self._samples()]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, values)} {_number(value)}"
+                for values, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+@dataclass
+class _HistogramSeries:
+    buckets: list[int]
+    count: int = 0
+    total: float = 0.0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.bounds = tuple(sorted(buckets))
+        self._series: dict[tuple, _HistogramSeries] = {}
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = _HistogramSeries(
+                    buckets=[0] * len(self.bounds))
+            # Non-cumulative here, summed when rendered
+            index = bisect_left(self.bounds, value)
+            if index < len(self.bounds):
+                series.buckets[index] += 1
+            series.count += 1
+            series.total += value
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return series.count if series else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((values, _HistogramSeries(list(series.buckets), series.count, series.total))
+                           for values, series in self._series.items())
+        lines = []
+        for values, series in items:
+            cumulative = 0
+            for bound, bucket in zip(self.bounds, series.buckets):
+                cumulative += bucket
+                le = _labels(self.label_names, values, f'le="{_number(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            inf = _labels(self.label_names, values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf} {series.count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {_number(series.total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    '''Metrics of this process and callbacks for state owned elsewhere'''
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], Iterable[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Iterable[str] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        '''Add a callback building metrics from other state at render time'''
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "Time to the end of the response body", ("method", "route"))
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests being handled", ("method",))
+http_db_roundtrips = registry.histogram(
+    "http_request_db_roundtrips", "Mongo commands issued per request", ("method", "route"),
+    buckets=ROUNDTRIP_BUCKETS)
+db_commands = registry.counter(
+    "mongodb_commands_total", "Mongo commands by name and outcome", ("command", "outcome"))
+repeated_queries = registry.counter(
+    "http_repeated_query_requests_total",
+    "Requests that repeated one query shape past the detector threshold", ("method", "route"))
+db_latency = registry.histogram(
+    "mongodb_command_duration_seconds", "Mongo command round trip time", ("command",),
+    buckets=DB_LATENCY_BUCKETS)
+pool_connections = registry.gauge(
+    "mongodb_pool_connections", "Open connections per server", ("address",))
+pool_checked_out = registry.gauge(
+    "mongodb_pool_checked_out_connections", "Connections in use per server", ("address",))
+pool_waiting = registry.gauge(
+    "mongodb_pool_wait_queue", "Operations waiting for a connection per server", ("address",))
+pool_max_size = registry.gauge(
+    "mongodb_pool_max_size", "Configured maximum connections per server")
+pool_wait = registry.histogram(
+    "mongodb_pool_checkout_duration_seconds", "Time to check a connection out of the pool",
+    ("address",), buckets=POOL_WAIT_BUCKETS)
+pool_checkout_failures = registry.counter(
+    "mongodb_pool_checkout_failures_total", "Failed connection checkouts by reason",
+    ("address", "reason"))
+pool_clears = registry.counter(
+    "mongodb_pool_clears_total", "Pools cleared after a network error or failover", ("address",))
+
+
+@dataclass
+class DbStats:
+    '''Mongo commands issued while handling one request'''
+    commands: int = 0
+    seconds: float = 0.0
+    names: list[str] = field(default_factory=list)
+    # Commands per query shape, only kept when repeated queries are detected
+    shapes: Optional[CollectionCounter] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, command: str, seconds: float):
+        with self._lock:
+            self.commands += 1
+            self.seconds += seconds
+            self.names.append(command)
+
+    def add_shape(self, shape: str):
+        with self._lock:
+            self.shapes[shape] += 1
+
+
+current_db_stats: ContextVar[Optional[DbStats]] = ContextVar("current_db_stats", default=None)
+
+
+class DbCommandListener(monitoring.CommandListener):
+    '''Count Mongo commands and their time, globally and for the current request'''
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        stats = current_db_stats.get()
+        if stats is not None and stats.shapes is not None:
+            shape = command_shape(event.command_name, event.command)
+            if shape is not None:
+                stats.add_shape(shape)
+
+    def _finished(self, event, outcome: str):
+        seconds = event.duration_micros / 1_000_000
+        db_commands.inc(event.command_name, outcome)
+        db_latency.observe(seconds, event.command_name)
+        stats = current_db_stats.get()
+        if stats is not None:
+            stats.add(event.command_name, seconds)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finished(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finished(event, "error")
+
+
+db_command_listener = DbCommandListener()
+# Registered for every client, including the ones test suites create
+monitoring.register(db_command_listener)
+
+
+def _address(address) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class DbPoolListener(monitoring.ConnectionPoolListener):
+    '''Track connection pool usage per server'''
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent):
+        pool_clears.inc(_address(event.address))
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent):
+        pool_connections.inc(_address(event.address))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent):
+        pool_connections.dec(_address(event.address))
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent):
+        pool_waiting.inc(_address(event.address))
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent):
+        address = _address(event.address)
+        pool_waiting.dec(address)
+        pool_checkout_failures.inc(address, event.reason)
+        if event.duration is not None:
+            pool_wait.observe(event.duration, address)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent):
+        address = _address(event.address)
+        pool_waiting.dec(address)
+        pool_checked_out.inc(address)
+        if event.duration is not None:
+            pool_wait.observe(event.duration, address)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent):
+        pool_checked_out.dec(_address(event.address))
+
+
+db_pool_listener = DbPoolListener()
+monitoring.register(db_pool_listener)
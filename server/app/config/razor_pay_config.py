@@ -1,8 +1,28 @@
 '''Razor pay config'''
 
-import razorpay
+from functools import cached_property
+
 from app.config.env_settings import settings
+from app.utilities.lazy_import import lazy_module
+
+# For `except razorpay_errors.SignatureVerificationError`, loaded when an
+# exception reaches that clause
+razorpay_errors = lazy_module("razorpay.errors")
+
+
+class RazorpayClient:
+    '''razorpay.Client, created the first time it is used'''
+
+    @cached_property
+    def _client(self):
+        import razorpay
+        return razorpay.Client(  # type: ignore[attr-defined]
+            auth=(settings.RAZOR_PAY_API_KEY, settings.RAZOR_PAY_API_SECRET))
+
+    def __getattr__(self, name: str):
+        if name == "_client":
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
 
-razorpay_client = razorpay.Client(
-    # type: ignore[attr-defined]
-    auth=(settings.RAZOR_PAY_API_KEY, settings.RAZOR_PAY_API_SECRET))
+razorpay_client = RazorpayClient()
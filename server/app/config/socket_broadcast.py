@@ -0,0 +1,143 @@
+'''Background socket broadcasting with per-key coalescing'''
+
+import logging
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Hashable, Iterable, Optional
+
+from pydantic import BaseModel
+
+from app.config.socket_manager import sio
+
+logger = logging.getLogger(__name__)
+
+COALESCE_WINDOW_SECONDS = 0.25
+MAX_PENDING_BROADCASTS = 1000
+
+
+@dataclass
+class _Broadcast:
+    event: str
+    payload: Any
+    rooms: set[str]
+    due: float
+    coalesced: int = field(default=0)
+
+
+class SocketBroadcaster:
+    '''Queue socket events and send them from a background task.
+
+    Each event is serialized once and sent to all of its rooms in a single
+    emit. Events published with the same key inside the coalescing window
+    are merged, so a burst of updates to one order produces one event.
+    Payloads with a `merge` method (such as delta events) are combined with
+    it, otherwise the latest payload wins; rooms are always combined. The
+    queue is bounded; when it is full new events are dropped rather than
+    slowing requests down.
+    '''
+
+    def __init__(
+            self,
+            server,
+            window: float = COALESCE_WINDOW_SECONDS,
+            max_pending: int = MAX_PENDING_BROADCASTS
+    ):
+        self.server = server
+        self.window = window
+        self.max_pending = max_pending
+        self._pending: dict[Hashable, _Broadcast] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._pending.clear()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def publish(
+            self,
+            event: str,
+            payload: Any,
+            rooms: Iterable[str],
+            key: Optional[Hashable] = None
+    ) -> bool:
+        '''Schedule an event for the given rooms. Returns False if dropped.'''
+        self._ensure_worker()
+        rooms = {str(room) for room in rooms}
+        if key is not None:
+            key = (event, key)
+            pending = self._pending.get(key)
+            if pending:
+                if hasattr(pending.payload, "merge") and type(pending.payload) is type(payload):
+                    pending.payload = pending.payload.merge(payload)
+                else:
+                    pending.payload = payload
+                pending.rooms |= rooms
+                pending.coalesced += 1
+                return True
+        else:
+            key = object()
+
+        if self._queue.full():
+            self.dropped += 1
+            logger.warning("Socket broadcast queue full, dropping %s", event)
+            return False
+        self._pending[key] = _Broadcast(
+            event=event,
+            payload=payload,
+            rooms=rooms,
+            due=asyncio.get_running_loop().time() + self.window
+        )
+        self._queue.put_nowait(key)
+        return True
+
+    @staticmethod
+    def serialize(payload: Any):
+        # Send plain objects so the packet serializer (JSON or msgpack)
+        # encodes them once for every recipient
+        if isinstance(payload, BaseModel):
+            return payload.model_dump(mode="json")
+        return payload
+
+    async def _send(self, broadcast: _Broadcast):
+        try:
+            await self.server.emit(
+                broadcast.event,
+                self.serialize(broadcast.payload),
+                to=sorted(broadcast.rooms)
+            )
+        except Exception as e:
+            logger.exception("Error broadcasting %s: %s", broadcast.event, e)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key = await self._queue.get()
+            broadcast = self._pending[key]
+            delay = broadcast.due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            del self._pending[key]
+            await self._send(broadcast)
+            self._queue.task_done()
+
+    async def flush(self):
+        '''Wait until every queued event has been sent'''
+        if self._queue is not None and self._worker and not self._worker.done():
+            await self._queue.join()
+
+    async def close(self):
+        '''Send what is queued and stop the background task'''
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+broadcaster = SocketBroadcaster(sio)
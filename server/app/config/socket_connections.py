@@ -0,0 +1,83 @@
+'''Per-principal socket connection limits and handshake metrics'''
+
+from collections import Counter, deque
+from typing import Optional
+
+LATENCY_SAMPLES = 1024
+
+
+class ConnectionRegistry:
+    '''Track the open sockets of each user or admin in this process.
+
+    With several workers each one enforces the limit on its own sockets,
+    which is enough to stop a single client from opening hundreds of them.
+    '''
+
+    def __init__(self, max_per_principal: int):
+        self.max_per_principal = max_per_principal
+        self._sids: dict[str, set[str]] = {}
+
+    def count(self, principal: str) -> int:
+        return len(self._sids.get(principal, ()))
+
+    def add(self, principal: str, sid: str) -> bool:
+        '''Register a socket, returns False if the principal is at its limit'''
+        sids = self._sids.setdefault(principal, set())
+        if self.max_per_principal > 0 and len(sids) >= self.max_per_principal:
+            if not sids:
+                del self._sids[principal]
+            return False
+        sids.add(sid)
+        return True
+
+    def remove(self, principal: Optional[str], sid: str):
+        sids = self._sids.get(principal)
+        if sids is None:
+            return
+        sids.discard(sid)
+        if not sids:
+            del self._sids[principal]
+
+    @property
+    def total(self) -> int:
+        return sum(len(sids) for sids in self._sids.values())
+
+
+def _percentile(samples: list[float], percentile: float) -> float:
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(percentile * (len(samples) - 1))))
+    return samples[index]
+
+
+class HandshakeMetrics:
+    '''Latency of socket handshakes and the outcome of each attempt.
+
+    `connect` covers the whole handler, `auth` only token verification and
+    the principal lookup. Only the latest samples are kept.
+    '''
+
+    def __init__(self, samples: int = LATENCY_SAMPLES):
+        self._latencies: dict[str, deque] = {
+            "connect": deque(maxlen=samples),
+            "auth": deque(maxlen=samples)
+        }
+        self.outcomes: Counter = Counter()
+
+    def observe(self, stage: str, seconds: float):
+        self._latencies[stage].append(seconds)
+
+    def record(self, outcome: str):
+        self.outcomes[outcome] += 1
+
+    def snapshot(self) -> dict:
+        latencies = {}
+        for stage, values in self._latencies.items():
+            samples = sorted(values)
+            latencies[stage] = {
+                "count": len(samples),
+                "p50_ms": round(_percentile(samples, 0.5) * 1000, 3),
+                "p95_ms": round(_percentile(samples, 0.95) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3) if samples else 0.0
+            }
+        return {"latency": latencies, "outcomes": dict(self.outcomes)}
@@ -1,16 +1,33 @@
 '''Web socket manager'''
+import logging
 from pprint import pformat
+import time
 
 import socketio
-from app.utilities.auth_utils import get_current_user_ws
+from app.utilities.auth_utils import get_current_user_ws, get_token_principal, USER_PRINCIPAL, ADMIN_PRINCIPAL
 from app.admin_app.admin_utilities.admin_auth_utils import get_current_admin_ws
 from app.config.origins import origins
+from app.config.env_settings import settings
+from app.config.socket_pubsub import build_client_manager
+from app.config.socket_connections import ConnectionRegistry, HandshakeMetrics
+from app.config import metrics
+from app.config.logging_config import request_id_var
 
+from bson import ObjectId
 from fastapi.exceptions import HTTPException
 
+logger = logging.getLogger(__name__)
+
 
 sio = socketio.AsyncServer(
     async_mode='asgi',
+    # Shares emits and rooms across workers when SOCKETIO_MANAGER is set
+    client_manager=build_client_manager(),
+    # msgpack makes order events smaller and cheaper to encode for busy rooms
+    serializer=settings.SOCKETIO_SERIALIZER,
+    # Websocket only skips the long-polling handshake and upgrade round trips
+    transports=[transport.strip()
+                for transport in settings.SOCKETIO_TRANSPORTS.split(",")],
     cors_allowed_origins=origins,
     ping_timeout=30,  # Longer timeout if clients are on slow networks
     ping_interval=10,  # Ping every 10 seconds
@@ -18,45 +35,164 @@ sio = socketio.AsyncServer(
     # engineio_logger=True  # Enable engine.io logging
 )
 
+connections = ConnectionRegistry(settings.SOCKETIO_MAX_CONNECTIONS_PER_USER)
+handshake_metrics = HandshakeMetrics()
 
-@sio.event
-async def connect(sid, environ, auth):
-    token = auth.get("token") if auth and isinstance(auth, dict) else None
-    if not token:
-        raise ConnectionRefusedError("Authentication required")
 
-    # First, try authenticating as a regular user.
-    user = None
+def _socket_metrics():
+    '''Open connections and handshake outcomes for /metrics'''
+    open_connections = metrics.Gauge(
+        "socketio_connections_open", "Open socket connections in this worker")
+    open_connections.set(value=connections.total)
+    handshakes = metrics.Counter(
+        "socketio_handshakes_total", "Socket handshakes by outcome", ("outcome",))
+    for outcome, count in handshake_metrics.outcomes.items():
+        handshakes.inc(outcome, amount=count)
+    return [open_connections, handshakes]
+
+
+metrics.registry.register_collector(_socket_metrics)
+
+PRODUCT_ROOM_PREFIX = "product:"
+MAX_PRODUCT_SUBSCRIPTIONS = 20
+
+
+def product_room(product_id: str) -> str:
+    '''Room of the sockets viewing a product'''
+    return f"{PRODUCT_ROOM_PREFIX}{product_id}"
+
+
+async def authenticate_socket(token: str):
+    '''Return (principal type, user or admin) for a socket token.
+
+    New tokens name their principal, so only one lookup runs. Tokens issued
+    before the claim existed try the user first, then the admin.
+    '''
+    principal = get_token_principal(token)
+    try:
+        if principal == ADMIN_PRINCIPAL:
+            return ADMIN_PRINCIPAL, await get_current_admin_ws(token=token)
+        if principal == USER_PRINCIPAL:
+            return USER_PRINCIPAL, (await get_current_user_ws(token=token)).model_dump()
+    except HTTPException as e:
+        raise ConnectionRefusedError(e.detail) from e
+
+    # Legacy token without a principal claim
     try:
         user = await get_current_user_ws(token=token)
+        return USER_PRINCIPAL, user.model_dump()
     except HTTPException as e:
         # If the error indicates the user was not found, then try admin auth.
         if e.status_code != 404:
             raise ConnectionRefusedError(e.detail) from e
-
-    if user:
-        user = user.model_dump()
-        await sio.save_session(sid, {"user_id": str(user["id"])})
-        print(f"User {user['username']} connected with SID {sid}")
-        await sio.enter_room(sid, str(user["id"]))
-        return
-
-    # If no regular user was found, try authenticating as an admin.
     try:
-        admin = await get_current_admin_ws(token=token)
+        return ADMIN_PRINCIPAL, await get_current_admin_ws(token=token)
     except HTTPException as e:
         raise ConnectionRefusedError(e.detail) from e
 
-    if admin:
-        await sio.save_session(sid, {"admin_id": str(admin["id"])})
-        print(f"Admin {admin['username']} connected with SID {sid}")
-        await sio.enter_room(sid, "admin")
-        return
 
-    # If neither user nor admin authenticated, refuse the connection.
-    raise ConnectionRefusedError("Authentication failed")
+@sio.event
+async def connect(sid, environ, auth):
+    # Each handler runs in its own task, so this only tags its records
+    request_id_var.set(f"sio:{sid}")
+    started = time.perf_counter()
+    token = auth.get("token") if auth and isinstance(auth, dict) else None
+    if not token:
+        handshake_metrics.record("missing_token")
+        raise ConnectionRefusedError("Authentication required")
+
+    try:
+        principal, account = await authenticate_socket(token)
+    except ConnectionRefusedError:
+        handshake_metrics.record("auth_failed")
+        raise
+    finally:
+        handshake_metrics.observe("auth", time.perf_counter() - started)
+
+    if not account:
+        handshake_metrics.record("auth_failed")
+        raise ConnectionRefusedError("Authentication failed")
+
+    account_id = str(account["id"])
+    connection_key = f"{principal}:{account_id}"
+    if not connections.add(connection_key, sid):
+        handshake_metrics.record("limited")
+        raise ConnectionRefusedError("Too many connections")
+
+    if principal == ADMIN_PRINCIPAL:
+        await sio.save_session(sid, {"admin_id": account_id, "principal": connection_key})
+        await sio.enter_room(sid, "admin")
+    else:
+        await sio.save_session(sid, {"user_id": account_id, "principal": connection_key})
+        await sio.enter_room(sid, account_id)
+    logger.info("%s %s connected with SID %s", principal.capitalize(), account['username'], sid)
+    handshake_metrics.record(f"{principal}_connected")
+    handshake_metrics.observe("connect", time.perf_counter() - started)
 
 
 @sio.event
 async def disconnect(sid):
-    print(f"Client disconnected: {sid}")
+    request_id_var.set(f"sio:{sid}")
+    try:
+        session = await sio.get_session(sid)
+    except KeyError:
+        session = {}
+    connections.remove(session.get("principal"), sid)
+    logger.info("Client disconnected: %s", sid)
+
+
+@sio.on("order-resync")
+async def order_resync(sid, data):
+    '''Send the full order to a client that detected a version gap'''
+    request_id_var.set(f"sio:{sid}")
+    # Imported here, the order CRUD modules broadcast through this server
+    from app.crud.order_crud import get_order_by_id as get_user_order
+    from app.admin_app.admin_crud_operations.order_crud import get_order_by_id as get_admin_order
+
+    order_id = data.get("order_id") if isinstance(data, dict) else None
+    if not order_id:
+        return {"error": "order_id is required"}
+
+    session = await sio.get_session(sid)
+    try:
+        if "admin_id" in session:
+            order = await get_admin_order(order_id=order_id)
+        elif "user_id" in session:
+            order = await get_user_order(
+                user_id=session["user_id"], order_id=order_id)
+        else:
+            return {"error": "Unauthorized"}
+    except HTTPException as e:
+        return {"error": e.detail}
+    return order.model_dump(mode="json")
+
+
+def _product_id(data):
+    product_id = data.get("product_id") if isinstance(data, dict) else None
+    if not product_id or not ObjectId.is_valid(product_id):
+        return None
+    return str(product_id)
+
+
+@sio.on("product-subscribe")
+async def product_subscribe(sid, data):
+    '''Join the room that receives live price and stock of a product'''
+    product_id = _product_id(data)
+    if not product_id:
+        return {"error": "Invalid product ID"}
+    room = product_room(product_id)
+    joined = [name for name in sio.rooms(sid)
+              if name.startswith(PRODUCT_ROOM_PREFIX)]
+    if room not in joined and len(joined) >= MAX_PRODUCT_SUBSCRIPTIONS:
+        return {"error": "Too many product subscriptions"}
+    await sio.enter_room(sid, room)
+    return {"product_id": product_id}
+
+
+@sio.on("product-unsubscribe")
+async def product_unsubscribe(sid, data):
+    product_id = _product_id(data)
+    if not product_id:
+        return {"error": "Invalid product ID"}
+    await sio.leave_room(sid, product_room(product_id))
+    return {"product_id": product_id}
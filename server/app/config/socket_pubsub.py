@@ -0,0 +1,151 @@
+'''Cross-process client managers for the Socket.IO server'''
+
+import asyncio
+from datetime import datetime, timezone
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from app.config.env_settings import settings
+
+CAPPED_COLLECTION_BYTES = 16 * 1024 * 1024
+CAPPED_COLLECTION_MAX_DOCUMENTS = 10000
+
+
+class AsyncMongoManager(AsyncPubSubManager):
+    '''Socket.IO client manager that fans events out to every worker through
+    a tailable cursor on a capped MongoDB collection.
+
+    Every worker inserts the messages it emits and tails the collection for
+    messages from the others, so `sio.emit(..., room=...)` reaches clients
+    connected to any process. Messages are stored as plain BSON documents,
+    never pickled. Change streams would need a replica set, a capped
+    collection works on a standalone server as well.
+    '''
+    name = "asyncmongo"
+
+    def __init__(
+            self,
+            database: AsyncIOMotorDatabase,
+            collection: str = "socketio_messages",
+            channel: str = "socketio",
+            write_only: bool = False,
+            logger=None,
+            poll_interval: float = 0.1
+    ):
+        self.database = database
+        self.collection_name = collection
+        self.poll_interval = poll_interval
+        self._collection_ready = False
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    @property
+    def collection(self):
+        return self.database[self.collection_name]
+
+    async def _ensure_collection(self):
+        if self._collection_ready:
+            return
+        try:
+            await self.database.create_collection(
+                self.collection_name,
+                capped=True,
+                size=CAPPED_COLLECTION_BYTES,
+                max=CAPPED_COLLECTION_MAX_DOCUMENTS
+            )
+        except CollectionInvalid:
+            # Already created by another worker
+            pass
+        # A tailable cursor on an empty capped collection dies at once, keep
+        # one document in it so listeners can tail from the start.
+        if await self.collection.estimated_document_count() == 0:
+            await self.collection.insert_one({"channel": None})
+        self._collection_ready = True
+
+    async def _publish(self, data):
+        try:
+            await self._ensure_collection()
+            await self.collection.insert_one({
+                "channel": self.channel,
+                "message": data,
+                "created_at": datetime.now(timezone.utc)
+            })
+        except PyMongoError as e:
+            self._get_logger().error(f"Cannot publish to mongo: {e}")
+
+    async def _latest_id(self):
+        latest = await self.collection.find_one(
+            {}, projection={"_id": 1}, sort=[("$natural", -1)]
+        )
+        return latest["_id"] if latest else None
+
+    def _tail(self):
+        # No filter: ObjectIds from different processes are not in insert
+        # order, so `_id > last` would skip messages, and a tailable cursor
+        # whose filter matches nothing dies at once. Channels are checked
+        # as documents arrive, in $natural (insert) order.
+        return self.collection.find(
+            {},
+            projection={"channel": 1, "message": 1},
+            cursor_type=CursorType.TAILABLE_AWAIT
+        )
+
+    async def _listen(self):
+        await self._ensure_collection()
+        # Everything up to the latest document was sent before this worker
+        # listened; a rebuilt cursor skips up to the last document it saw
+        last_id = await self._latest_id()
+        while True:
+            resume_after = last_id
+            cursor = self._tail()
+            try:
+                # One cursor stays open, each getMore waits on the server
+                while cursor.alive:
+                    async for document in cursor:
+                        if resume_after is not None:
+                            if document["_id"] == resume_after:
+                                resume_after = None
+                            continue
+                        last_id = document["_id"]
+                        if document.get("channel") == self.channel:
+                            yield document["message"]
+                    # Caught up without meeting the resume point: the capped
+                    # collection overwrote it, carry on from here
+                    resume_after = None
+                    await asyncio.sleep(self.poll_interval)
+            except PyMongoError as e:
+                self._get_logger().error(
+                    f"Cannot receive from mongo, retrying: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await cursor.close()
+
+
+def build_client_manager(database: AsyncIOMotorDatabase = None, write_only: bool = False):
+    '''Create the client manager selected by SOCKETIO_MANAGER.
+
+    `memory` keeps the default single-process manager, `mongo` shares events
+    through MongoDB and `redis` uses python-socketio's Redis manager.
+    '''
+    backend = settings.SOCKETIO_MANAGER.lower()
+    if backend == "memory":
+        return None
+    if backend == "mongo":
+        if database is None:
+            from app.config.db import database as app_database
+            database = app_database
+        return AsyncMongoManager(
+            database,
+            channel=settings.SOCKETIO_CHANNEL,
+            write_only=write_only
+        )
+    if backend == "redis":
+        return socketio.AsyncRedisManager(
+            settings.SOCKETIO_REDIS_URL,
+            channel=settings.SOCKETIO_CHANNEL,
+            write_only=write_only
+        )
+    raise ValueError(f"Unknown SOCKETIO_MANAGER: {settings.SOCKETIO_MANAGER}")
@@ -1,23 +1,191 @@
 '''Cart Crud functions'''
 
+import logging
+import re
 from asyncio import gather
+from datetime import datetime, timezone
+from typing import Optional
 
 from bson import ObjectId
-from app.model.cart_models import CartResponse, ProductInCart, CartItemResponse
+from app.model.cart_models import (
+    CartResponse,
+    ProductInCart,
+    CartItemResponse,
+    CartOperation,
+    CartAction,
+    CartItemChange,
+    CartChangeReason
+)
 from app.model.user import User
 from app.model.product_models import Product
 from fastapi import HTTPException
 from beanie import PydanticObjectId
+from beanie.odm.bulk import BulkWriter
 from beanie.operators import And
 
+logger = logging.getLogger(__name__)
+
+CART_PAGE_SIZE = 20
+
+# Only the product fields a cart line snapshots or checks
+CART_PRODUCT_PROJECTION = {
+    "title": 1,
+    "price": 1,
+    "sizes": 1,
+    "images": {"$slice": 1},
+}
+
+
+async def _check_cart(
+        user_id: str,
+        product_ids: set[PydanticObjectId] = frozenset()
+) -> tuple[list[ProductInCart], list[CartItemChange], list[ProductInCart], dict]:
+    '''Correct the price, title, image and quantity of every cart line
+    against the current products, in memory. Returns the lines kept, the
+    changes, the lines to remove and the products by id. The products of
+    `product_ids` are loaded by the same query.'''
+    cart_items = await ProductInCart.find(
+        ProductInCart.user_id == PydanticObjectId(user_id)
+    ).to_list()
+    product_ids = set(product_ids) | {item.product_id for item in cart_items}
+    products = await Product.get_motor_collection().find(
+        {"_id": {"$in": list(product_ids)}},
+        projection=CART_PRODUCT_PROJECTION
+    ).to_list(length=None) if product_ids else []
+    products = {product["_id"]: product for product in products}
+
+    now = datetime.now(timezone.utc)
+    valid_items: list[ProductInCart] = []
+    changes: list[CartItemChange] = []
+    removed: list[ProductInCart] = []
+    for item in cart_items:
+        product = products.get(item.product_id)
+        stock = (_size_stock(product, item.size) or 0) if product else 0
+
+        if stock <= 0:
+            changes.append(CartItemChange(
+                cart_id=str(item.id),
+                product_id=str(item.product_id),
+                reason=CartChangeReason.REMOVED,
+                old_value=item.quantity,
+                new_value=0
+            ))
+            removed.append(item)
+            continue
+
+        changed = False
+        if item.price != product["price"]:
+            changes.append(CartItemChange(
+                cart_id=str(item.id),
+                product_id=str(item.product_id),
+                reason=CartChangeReason.PRICE_CHANGED,
+                old_value=item.price,
+                new_value=product["price"]
+            ))
+            item.price = product["price"]
+            changed = True
+        if item.quantity > stock:
+            changes.append(CartItemChange(
+                cart_id=str(item.id),
+                product_id=str(item.product_id),
+                reason=CartChangeReason.QUANTITY_REDUCED,
+                old_value=item.quantity,
+                new_value=stock
+            ))
+            item.quantity = stock
+            changed = True
+        image_url = _first_image_url(product)
+        if item.title != product["title"] or item.image_url != image_url:
+            changes.append(CartItemChange(
+                cart_id=str(item.id),
+                product_id=str(item.product_id),
+                reason=CartChangeReason.DETAILS_CHANGED
+            ))
+            item.title = product["title"]
+            item.image_url = image_url
+            changed = True
+
+        if changed:
+            item.updated_at = now
+        valid_items.append(item)
+
+    return valid_items, changes, removed, products
+
+
+def _first_image_url(product: dict) -> Optional[str]:
+    images = product.get("images") or []
+    return images[0]["url"] if images else None
+
+
+def _size_stock(product: dict, size: int) -> Optional[int]:
+    '''Stock of a size of the product, None when it has no such size'''
+    return next(
+        (s["stock"] for s in product.get("sizes", []) if s["size"] == size),
+        None
+    )
+
+
+def _line_fields(item: ProductInCart) -> dict:
+    '''The fields of a cart line that revalidation or an operation changes'''
+    return {
+        "price": item.price,
+        "quantity": item.quantity,
+        "title": item.title,
+        "image_url": item.image_url,
+        "updated_at": item.updated_at
+    }
+
+
+async def _write_cart(
+        inserted: list[ProductInCart],
+        updated: list[ProductInCart],
+        deleted: list[ProductInCart]
+):
+    '''Save cart line changes in one bulk write'''
+    if not (inserted or updated or deleted):
+        return
+    # The collection is taken from the first operation, Beanie fails to
+    # record it when object_class is passed here
+    async with BulkWriter() as bulk_writer:
+        for item in inserted:
+            await ProductInCart.insert_one(item, bulk_writer=bulk_writer)
+        for item in updated:
+            await ProductInCart.find_one(
+                ProductInCart.id == item.id
+            ).update({"$set": _line_fields(item)}, bulk_writer=bulk_writer)
+        for item in deleted:
+            await ProductInCart.find_one(
+                ProductInCart.id == item.id
+            ).delete(bulk_writer=bulk_writer)
+
+
+async def revalidate_cart(
+        user_id: str,
+        persist: bool = True
+) -> tuple[list[ProductInCart], list[CartItemChange]]:
+    '''Refresh the price, title, image and quantity of every cart line
+    against the current products. Uses one product query and at most one
+    bulk write, whatever the size of the cart. With `persist` off the
+    corrected lines are only returned, nothing is written.'''
+    valid_items, changes, removed, _ = await _check_cart(user_id)
+    if persist:
+        changed = {change.cart_id for change in changes}
+        await _write_cart(
+            [],
+            [item for item in valid_items if str(item.id) in changed],
+            removed
+        )
+    return valid_items, changes
+
 
 async def get_cart_items(
         user_id: str,
         page: int = 1,
-        search: str = None
+        search: str = None,
+        revalidate: bool = False
 ) -> CartResponse:
     '''Function to get items in cart for the user'''
-    limit = 20
+    limit = CART_PAGE_SIZE
     skip = (page - 1) * limit
     try:
         if not ObjectId.is_valid(user_id):
@@ -32,6 +200,11 @@ async def get_cart_items(
                 detail="User not found"
             )
 
+        if revalidate:
+            # Corrected in the response only, checkout and sync persist them
+            cart_items, changes = await revalidate_cart(user_id, persist=False)
+            return _cart_summary(cart_items, page, search, changes)
+
         conditions = [ProductInCart.user_id == PydanticObjectId(user_id)]
         if search:
             conditions.append(ProductInCart.title.regex(search, "i"))
@@ -65,7 +238,7 @@ async def get_cart_items(
             total_count=total_count)
 
     except HTTPException as e:
-        print("Error creating cart: ", e)
+        logger.warning("Error creating cart: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -165,7 +338,7 @@ async def add_to_cart(
         return CartItemResponse.from_mongo(new_cart_item)
 
     except HTTPException as e:
-        print("Error adding to cart: ", e)
+        logger.warning("Error adding to cart: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -212,7 +385,7 @@ async def remove_item_from_cart(
         return cart_item_data
 
     except HTTPException as e:
-        print(f"Error removing item from cart: {e}")
+        logger.warning("Error removing item from cart: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -304,7 +477,183 @@ async def change_item_quantity(
         await cart_item.save()
         return CartItemResponse.from_mongo(cart_item)
     except HTTPException as e:
-        print(f"Error changing quatity of item in cart: {e}")
+        logger.warning("Error changing quatity of item in cart: %s", e)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        ) from e
+
+
+def _cart_summary(
+        items: list[ProductInCart],
+        page: int = 1,
+        search: str = None,
+        changes: list[CartItemChange] = None
+) -> CartResponse:
+    '''Build a cart page and totals from cart items in memory'''
+    total_price = sum(item.price * item.quantity for item in items)
+    total_count = sum(item.quantity for item in items)
+    if search:
+        pattern = re.compile(search, re.IGNORECASE)
+        items = [item for item in items if pattern.search(item.title)]
+    # Stored lines read back naive, lines added by a sync are UTC aware
+    items = sorted(
+        items,
+        key=lambda item: item.created_at.replace(tzinfo=timezone.utc),
+        reverse=True
+    )
+    skip = (page - 1) * CART_PAGE_SIZE
+    return CartResponse(
+        items=[CartItemResponse.from_mongo(item)
+               for item in items[skip:skip + CART_PAGE_SIZE]],
+        total_price=round(total_price, 2),
+        total_count=total_count,
+        changes=changes or []
+    )
+
+
+async def sync_cart(
+        user_id: str,
+        operations: list[CartOperation]
+) -> CartResponse:
+    '''Function to apply several cart operations with one product query
+    and one bulk write. Either every operation is applied or none is.
+    Stale lines are corrected as on checkout, and saved with the operations.'''
+    try:
+        if not ObjectId.is_valid(user_id):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid user ID"
+            )
+        for operation in operations:
+            if operation.product_id and not ObjectId.is_valid(operation.product_id):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Invalid product ID"
+                )
+            if operation.cart_id and not ObjectId.is_valid(operation.cart_id):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Invalid cart Id"
+                )
+
+        user_oid = PydanticObjectId(user_id)
+        # One product query covers the cart lines and the products added
+        cart_items, changes, removed, products = await _check_cart(
+            user_id,
+            {PydanticObjectId(operation.product_id) for operation in operations
+             if operation.product_id}
+        )
+        by_id = {str(item.id): item for item in cart_items}
+        by_key = {
+            (str(item.product_id), item.size): item for item in cart_items
+        }
+        # Every stored line, including those the revalidation removes
+        lines = {str(item.id): item for item in (*cart_items, *removed)}
+
+        now = datetime.now(timezone.utc)
+        inserted: set[str] = set()
+        # Lines corrected by the revalidation are saved with the operations
+        updated: set[str] = {change.cart_id for change in changes
+                             if change.cart_id in by_id}
+        deleted: set[str] = {str(item.id) for item in removed}
+
+        for operation in operations:
+            if operation.action == CartAction.ADD:
+                product = products.get(PydanticObjectId(operation.product_id))
+                if not product:
+                    raise HTTPException(
+                        status_code=404,
+                        detail="Product not found"
+                    )
+                if _size_stock(product, operation.size) is None:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Size {operation.size} is not available for this product"
+                    )
+                key = (operation.product_id, operation.size)
+                item = by_key.get(key)
+                if item:
+                    item.quantity += operation.quantity
+                    if str(item.id) not in inserted:
+                        updated.add(str(item.id))
+                    continue
+                item = ProductInCart(
+                    id=PydanticObjectId(),
+                    user_id=user_oid,
+                    product_id=PydanticObjectId(operation.product_id),
+                    title=product["title"],
+                    price=product["price"],
+                    size=operation.size,
+                    quantity=operation.quantity,
+                    image_url=_first_image_url(product),
+                    created_at=now,
+                    updated_at=now
+                )
+                by_id[str(item.id)] = item
+                by_key[key] = item
+                inserted.add(str(item.id))
+                continue
+
+            if operation.cart_id:
+                item = by_id.get(operation.cart_id)
+            else:
+                item = by_key.get((operation.product_id, operation.size))
+            if not item:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Product not in cart"
+                )
+            item_id = str(item.id)
+
+            if operation.action == CartAction.REMOVE:
+                del by_id[item_id]
+                del by_key[(str(item.product_id), item.size)]
+                if item_id in inserted:
+                    inserted.discard(item_id)
+                else:
+                    updated.discard(item_id)
+                    deleted.add(item_id)
+                continue
+
+            new_quantity = item.quantity + operation.quantity
+            if new_quantity <= 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Quantity is 0, Try removing the item"
+                )
+            item.quantity = new_quantity
+            if item_id not in inserted:
+                updated.add(item_id)
+
+        # Check stock once against the final quantities
+        for item_id in inserted | updated:
+            item = by_id[item_id]
+            product = products.get(item.product_id)
+            stock = _size_stock(product, item.size) if product else None
+            if stock is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Size {item.size} is not available for this product"
+                )
+            if item.quantity > stock:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Insufficient stock: available stock for size {item.size} is {stock}"
+                )
+
+        # Nothing was written so far, corrections and operations are saved together
+        for item_id in updated:
+            by_id[item_id].updated_at = now
+        await _write_cart(
+            [by_id[item_id] for item_id in inserted],
+            [by_id[item_id] for item_id in updated],
+            [lines[item_id] for item_id in deleted]
+        )
+
+        return _cart_summary(list(by_id.values()), changes=changes)
+    except HTTPException as e:
+        logger.warning("Error syncing cart: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -1,23 +1,35 @@
 '''Order crud'''
 
+import logging
 import hmac
 import hashlib
 from asyncio import gather
 from pprint import pprint
 import secrets
+from datetime import datetime, timezone
 
 from bson import ObjectId
 from fastapi import HTTPException
 from beanie import PydanticObjectId
 from beanie.operators import And
-from razorpay.errors import SignatureVerificationError
+from beanie.odm.queries.update import UpdateResponse
 
-from app.config.socket_manager import sio
+from app.config.socket_broadcast import broadcaster
 from app.model.user import User
-from app.model.cart_models import ProductInCart, CartItemResponse, CartResponse
-from app.model.order_models import Order, OrderResponse, OrderStatus
+from app.model.cart_models import CartItemResponse, CartResponse
+from app.crud.cart_crud import revalidate_cart
+from app.model.order_models import (
+    Order,
+    OrderResponse,
+    OrderStatus,
+    OrderSummaryResponse,
+    ORDER_SUMMARY_PROJECTION
+)
+from app.crud.order_rollup_crud import record_paid_order
 from app.config.env_settings import settings
-from app.config.razor_pay_config import razorpay_client
+from app.config.razor_pay_config import razorpay_client, razorpay_errors
+
+logger = logging.getLogger(__name__)
 
 
 def generate_signature(order_id: str, payment_id: str):
@@ -31,7 +43,8 @@ def generate_signature(order_id: str, payment_id: str):
 
 async def get_all_orders(
         user_id: str,
-        page: int = 1
+        page: int = 1,
+        summary: bool = False
 ):
     '''Function to fetch users'''
     if not ObjectId.is_valid(user_id):
@@ -44,6 +57,18 @@ async def get_all_orders(
     limit = 20
     skip = (page - 1) * limit
     try:
+        if summary:
+            orders = await (
+                Order.get_motor_collection()
+                .find({"user_id": PydanticObjectId(user_id)},
+                      projection=ORDER_SUMMARY_PROJECTION)
+                .sort("created_at", -1)
+                .skip(skip)
+                .limit(limit)
+                .to_list(length=limit)
+            )
+            return [OrderSummaryResponse.from_mongo(order) for order in orders]
+
         orders = await (
             Order.find(Order.user_id == PydanticObjectId(
                 user_id), fetch_links=True)
@@ -55,7 +80,7 @@ async def get_all_orders(
         orders_response = [OrderResponse.from_mongo(order) for order in orders]
         return orders_response
     except HTTPException as e:
-        print("Error fetching orders: ", e)
+        logger.warning("Error fetching orders: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -92,7 +117,7 @@ async def get_order_by_id(
             raise HTTPException(status_code=404, detail="Order not found")
         return OrderResponse.from_mongo(order)
     except HTTPException as e:
-        print("Error fetching order: ", e)
+        logger.warning("Error fetching order: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -117,31 +142,24 @@ async def create_order(
                 status_code=400,
                 detail="Please provide address and phone number for your order"
             )
-        cart_query = {"user_id": PydanticObjectId(user_id)}
-        cart_pipline = [
-            {"$match": cart_query},
-            {
-                "$group": {
-                    "_id": None,
-                    "totalPrice": {"$sum": {"$multiply": ["$price", "$quantity"]}},
-                    "totalCount": {"$sum": "$quantity"}
-                }
-            }
-        ]
-        agg_result, cart_items, user = await gather(
-            ProductInCart.aggregate(cart_pipline).to_list(),
-            ProductInCart.find(ProductInCart.user_id == PydanticObjectId(
-                user_id)).sort(("created_at", -1)).to_list(),
+        (cart_items, changes), user = await gather(
+            revalidate_cart(user_id),
             User.get(PydanticObjectId(user_id))
         )
-        total_price = agg_result[0]["totalPrice"]
-        total_count = agg_result[0]["totalCount"]
+        if changes:
+            raise HTTPException(
+                status_code=409,
+                detail="Prices or stock of items in your cart have changed, please review your cart"
+            )
 
+        total_count = sum(item.quantity for item in cart_items)
         if total_count == 0:
             raise HTTPException(
                 status_code=400,
                 detail="Cart is empty"
             )
+        total_price = sum(item.price * item.quantity for item in cart_items)
+        cart_items.sort(key=lambda item: item.created_at, reverse=True)
 
         cart_items_response = [
             CartItemResponse.from_mongo(item) for item in cart_items]
@@ -185,7 +203,7 @@ async def create_order(
         return razorpay_order  # This includes the generated order id
 
     except HTTPException as e:
-        print(f"Error ordering: {e}")
+        logger.warning("Error ordering: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -224,22 +242,40 @@ async def verify_payment(payment_id: str, order_id: str, signature: str, user_id
         if not verified_payment:
             raise HTTPException(status_code=400, detail="Payment failed")
 
-        order.razorpay_payment_id = payment_id
-        order.payment_verified = True
-        await order.save()
+        # Only the call that flips payment_verified adds the order to the
+        # rollups, a retried or concurrent verification matches nothing
+        paid = await Order.find_one(
+            {"_id": order.id, "payment_verified": False}
+        ).update(
+            {"$set": {
+                "razorpay_payment_id": payment_id,
+                "payment_verified": True,
+                "updated_at": datetime.now(timezone.utc),
+            }, "$inc": {"version": 1}},
+            response_type=UpdateResponse.NEW_DOCUMENT
+        )
+        if not paid:
+            order = await Order.get(order.id, fetch_links=True)
+            return OrderResponse.from_mongo(order)
+
+        order.razorpay_payment_id = paid.razorpay_payment_id
+        order.payment_verified = paid.payment_verified
+        order.version = paid.version
+        order.updated_at = paid.updated_at
+        await record_paid_order(order)
 
         order_response = OrderResponse.from_mongo(order)
 
         # Emit an event to notify all admins (all admin clients should join the "admin" room)
-        await sio.emit("new-order", order_response.model_dump_json(), room="admin")
+        broadcaster.publish("new-order", order_response, rooms=["admin"])
 
         return order_response
 
-    except SignatureVerificationError as e:
-        print("SignatureVerificationError: ", e)
+    except razorpay_errors.SignatureVerificationError as e:
+        logger.error("SignatureVerificationError: %s", e)
         raise HTTPException(status_code=400, detail="Payment failed") from e
     except Exception as e:
-        print(f"Error verifying payment: {e}")
+        logger.exception("Error verifying payment: %s", e)
         # import traceback
         # traceback.print_exc()  # Print full stack trace
         raise HTTPException(
@@ -0,0 +1,142 @@
+'''Incrementally maintained order rollups for the admin dashboard'''
+
+import logging
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from beanie import PydanticObjectId
+
+from app.model.order_models import (
+    Order,
+    OrderRollup,
+    OrderRollupResponse,
+    OrderStatus,
+    RollupDimension
+)
+from app.model.product_models import Product
+
+logger = logging.getLogger(__name__)
+
+ALL_KEY = "all"
+FULFILLED_STATUSES = {OrderStatus.SHIPPED.value, OrderStatus.DELIVERED.value}
+
+
+def _bucket_day(moment: datetime) -> datetime:
+    '''Truncate a timestamp to its UTC day'''
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, moment.day, tzinfo=timezone.utc)
+
+
+def _bucket_filter(day: datetime, dimension: RollupDimension, key: str) -> dict:
+    return {"day": day, "dimension": dimension.value, "key": key}
+
+
+async def record_paid_order(order: Order):
+    '''Add a newly paid order to its day, brand and category buckets'''
+    try:
+        items = order.order_details.items
+        product_ids = list({PydanticObjectId(item.product_id)
+                           for item in items})
+        products = await Product.get_motor_collection().find(
+            {"_id": {"$in": product_ids}},
+            projection={"brand": 1, "category": 1}
+        ).to_list(length=None)
+        links = {
+            str(product["_id"]): (
+                str(product["brand"].id) if product.get("brand") else None,
+                str(product["category"].id) if product.get(
+                    "category") else None
+            )
+            for product in products
+        }
+
+        # revenue, units and whether the order touched the bucket
+        buckets: dict[tuple[RollupDimension, str], list] = {
+            (RollupDimension.ALL, ALL_KEY): [0.0, 0]
+        }
+        for item in items:
+            line_total = item.price * item.quantity
+            brand_id, category_id = links.get(item.product_id, (None, None))
+            keys = [(RollupDimension.ALL, ALL_KEY)]
+            if brand_id:
+                keys.append((RollupDimension.BRAND, brand_id))
+            if category_id:
+                keys.append((RollupDimension.CATEGORY, category_id))
+            for bucket_key in keys:
+                totals = buckets.setdefault(bucket_key, [0.0, 0])
+                totals[0] += line_total
+                totals[1] += item.quantity
+
+        day = _bucket_day(order.created_at)
+        now = datetime.now(timezone.utc)
+        operations = [
+            UpdateOne(
+                _bucket_filter(day, dimension, key),
+                {
+                    "$inc": {
+                        "revenue": round(revenue, 2),
+                        "order_count": 1,
+                        "units": units
+                    },
+                    "$set": {"updated_at": now}
+                },
+                upsert=True
+            )
+            for (dimension, key), (revenue, units) in buckets.items()
+        ]
+        await OrderRollup.get_motor_collection().bulk_write(operations, ordered=False)
+    except PyMongoError as e:
+        # Rollups are derived data, a failure must not fail the payment
+        logger.error("Error updating order rollups: %s", e)
+
+
+async def record_status_change(order: Order, previous_status: OrderStatus):
+    '''Move a paid order between the fulfilment counters of its day bucket'''
+    previous_status = OrderStatus(previous_status).value
+    new_status = OrderStatus(order.order_status).value
+    if not order.payment_verified or previous_status == new_status:
+        return
+
+    increments = {}
+    if previous_status in FULFILLED_STATUSES:
+        increments[f"status_counts.{previous_status}"] = -1
+    if new_status in FULFILLED_STATUSES:
+        increments[f"status_counts.{new_status}"] = 1
+    if not increments:
+        return
+
+    try:
+        await OrderRollup.get_motor_collection().update_one(
+            _bucket_filter(_bucket_day(order.created_at),
+                           RollupDimension.ALL, ALL_KEY),
+            {
+                "$inc": increments,
+                "$set": {"updated_at": datetime.now(timezone.utc)}
+            },
+            upsert=True
+        )
+    except PyMongoError as e:
+        logger.error("Error updating order rollups: %s", e)
+
+
+async def get_order_rollups(
+        dimension: RollupDimension = RollupDimension.ALL,
+        start: datetime = None,
+        end: datetime = None,
+        key: str = None
+) -> list[OrderRollupResponse]:
+    '''Function to read precomputed order buckets'''
+    query = {"dimension": RollupDimension(dimension).value}
+    if start or end:
+        query["day"] = {}
+        if start:
+            query["day"]["$gte"] = _bucket_day(start)
+        if end:
+            query["day"]["$lte"] = _bucket_day(end)
+    if key:
+        query["key"] = key
+
+    rollups = await OrderRollup.find(query).sort(("day", 1)).to_list()
+    return [OrderRollupResponse.from_mongo(rollup) for rollup in rollups]
@@ -7,10 +7,34 @@ from bson import ObjectId
 from fastapi import HTTPException
 from beanie import PydanticObjectId
 
-from app.model.product_models import Product, ProductResponse
+from app.model.product_models import Product, ProductResponse, ProductDeltaEvent
 from app.model.brand_models import Brand
 from app.model.category_model import Category
 from app.utilities.query_models import SortByProduct, SortOrder
+from app.config.socket_broadcast import broadcaster
+from app.config.socket_manager import product_room
+
+# Replace the brand and category references with their documents. A link
+# to a deleted brand or category is kept as it was, so the product is still
+# listed and its response carries no brand or category.
+PRODUCT_LINK_LOOKUPS = [
+    stage
+    for field, model in (("brand", Brand), ("category", Category))
+    for stage in (
+        {"$lookup": {
+            "from": model.Settings.name,
+            "localField": f"{field}.$id",
+            "foreignField": "_id",
+            "as": f"_link_{field}"
+        }},
+        {"$unwind": {
+            "path": f"$_link_{field}",
+            "preserveNullAndEmptyArrays": True
+        }},
+        {"$set": {field: {"$ifNull": [f"$_link_{field}", f"${field}"]}}},
+        {"$project": {f"_link_{field}": 0}}
+    )
+]
 
 
 async def get_products(
@@ -86,17 +110,18 @@ async def get_products(
         limit = 15
         skip = (page - 1) * limit
 
-        # Query products using Beanie's find API with sorting and pagination.
-        products = (
-            await Product.find(query)
-            .sort((sort_by, order))
-            .skip(skip)
-            .limit(limit)
-            .to_list()
-        )
-
-        # Populate all linked fields for each product concurrently
-        await gather(*(product.fetch_all_links() for product in products))
+        # One aggregation for the page and its links; the lookups run after
+        # $limit so only the products of the page are joined
+        products = await Product.aggregate(
+            [
+                {"$match": query},
+                {"$sort": {sort_by: order}},
+                {"$skip": skip},
+                {"$limit": limit},
+                *PRODUCT_LINK_LOOKUPS
+            ],
+            projection_model=Product
+        ).to_list()
 
         # Convert each product to a response model (assuming from_mongo handles conversion)
         product_responses = [ProductResponse.from_mongo(
@@ -130,3 +155,19 @@ async def get_product_by_id(product_id: str) -> ProductResponse:
             status_code=e.status_code,
             detail=e.detail
         ) from e
+
+
+def publish_product_delta(product: Product, price: bool = False, sizes: bool = False):
+    '''Push the new price and/or stock to viewers of the product.
+
+    Deltas for the same product are coalesced by the broadcaster, so a burst
+    of stock changes reaches each viewer as one event.
+    '''
+    if not price and not sizes:
+        return
+    broadcaster.publish(
+        "product-updated",
+        ProductDeltaEvent.from_product(product, price=price, sizes=sizes),
+        rooms=[product_room(str(product.id))],
+        key=str(product.id)
+    )
@@ -1,3 +1,4 @@
+import logging
 from app.model.user import User, UpdateProfileRequest, UpdateContactInfoRequest, UserResponse
 from beanie import PydanticObjectId
 from app.utilities.password_utils import hash_password, verify_password
@@ -8,6 +9,8 @@ from pydantic import ValidationError
 from datetime import datetime, timezone
 from beanie.operators import And
 
+logger = logging.getLogger(__name__)
+
 
 async def create_user(user_data: dict):
     user_data.setdefault("refresh_tokens", [])
@@ -27,7 +30,7 @@ async def create_user(user_data: dict):
             raise ValueError("Username already exists") from e
         if "email" in str(e):
             raise ValueError("Email already exists") from e
-        print("A duplicate key error occurred")
+        logger.error("A duplicate key error occurred")
         raise ValueError("A duplicate key error occurred") from e
 
 
@@ -254,7 +257,7 @@ async def update_user_contact_info(user_id: str, contact_info: UpdateContactInfo
         await user.save()
         return UserResponse.from_mongo(user)
     except ValueError as e:
-        print(f"Value Error: {e}")
+        logger.error("Value Error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Bad request"
@@ -299,14 +302,14 @@ async def create_or_get_google_user(google_user: dict):
         })
 
     except HTTPException as e:
-        print(f"Http exception in google login: {e}")
+        logger.warning("Http exception in google login: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
 
     except Exception as e:
-        print("Unexpected error during google user retrieval: ", e)
+        logger.exception("Unexpected error during google user retrieval: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unexpected error during google login"
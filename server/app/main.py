@@ -1,20 +1,21 @@
 '''Main app file'''
 
+import logging
 from contextlib import asynccontextmanager
 import os
 
 import socketio
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.exceptions import HTTPException
 from fastapi.routing import APIRoute
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 
 
 from app.config.env_settings import settings
-from app.config.db import init_db
+from app.config.logging_config import configure_logging
+from app.config.db import close_db, init_db, warm_up_pool
 
 
 from app.routes.profile_routes import router as profile_router
@@ -25,13 +26,28 @@ from app.routes.category_routes import router as category_router
 from app.routes.product_routes import router as product_router
 from app.routes.cart_routes import router as cart_router
 from app.routes.order_routes import router as order_router
+from app.routes.metrics_routes import router as metrics_router
 from app.config.socket_manager import sio
+from app.config.socket_broadcast import broadcaster
+from app.utilities.image_pipeline import shutdown_image_pool
+from app.utilities.upload_utils import UploadSizeLimitMiddleware
+from app.utilities.compression import CompressionMiddleware
+from app.utilities.metrics_middleware import MetricsMiddleware
+from app.utilities.request_id import RequestIdMiddleware
+from app.utilities.media_storage import MediaFiles
+from app.utilities.static_files import (
+    PrecompressedStaticFiles,
+    SpaShell,
+    rewrite_admin_asset_paths
+)
+from app.utilities.media_deletion import media_deletions
 from app.config.origins import origins
 
 
 from starlette.middleware.sessions import SessionMiddleware
 
-from app.config.cloudinary_config import cloudinary  # DO NOT REMOVE
+configure_logging()
+logger = logging.getLogger(__name__)
 
 client_build_dir = os.path.join("client", "dist")
 client_admin_build_dir = os.path.join("client_admin", "dist")
@@ -49,9 +65,16 @@ else:
 async def lifespan(app: FastAPI):
     '''# Initialize the database'''
     await init_db()
+    await warm_up_pool()
+    if settings.MEDIA_DELETION_WORKER:
+        media_deletions.start()
     yield  # The app will run here after the init
-    # Any shutdown logic can go here, if necessary (e.g., closing DB connections)
-    print("App shutdown. Closing database connections...")
+    await media_deletions.close()
+    await broadcaster.close()
+    shutdown_image_pool()
+    # Last, the workers above may still write while stopping
+    logger.info("App shutdown. Closing database connections...")
+    close_db()
 
 
 def custom_generate_unique_id(route: APIRoute):
@@ -72,6 +95,12 @@ socket_app = socketio.ASGIApp(
 
 app.mount("/api/ws", socket_app)
 
+# Added first so CORS headers are set on its 413 responses too
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.MAX_UPLOAD_REQUEST_BYTES
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -87,6 +116,31 @@ app.add_middleware(
     session_cookie="session"
 )
 
+# Outer to everything but metrics, so it compresses the final body
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL
+)
+
+# Outer to the rest of the stack, so latency covers all of it
+app.add_middleware(
+    MetricsMiddleware,
+    debug_headers=(
+        settings.METRICS_DEBUG_HEADERS if settings.METRICS_DEBUG_HEADERS is not None
+        else settings.ENVIRONMENT in ("development", "testing")
+    ),
+    detect_repeated_queries=(
+        settings.QUERY_DETECTOR if settings.QUERY_DETECTOR is not None
+        else settings.ENVIRONMENT != "production"
+    ),
+    repeated_query_threshold=settings.QUERY_DETECTOR_THRESHOLD
+)
+
+# Outermost, so records logged anywhere while handling a request carry its id
+app.add_middleware(RequestIdMiddleware)
+
 # Mount static files for both React apps
 # app.mount(
 #     "/admin",
@@ -94,11 +148,26 @@ app.add_middleware(
 #     name="admin-static"
 # )
 
-app.mount("/admin-assets", StaticFiles(directory=os.path.join(
+# Hashed build output, cached forever and served precompressed when the
+# .br/.gz files from `python -m app.utilities.static_files` are present
+app.mount("/admin-assets", PrecompressedStaticFiles(directory=os.path.join(
     client_admin_build_dir, "assets")), name="admin_assets")
-app.mount("/assets", StaticFiles(directory=os.path.join(
+app.mount("/assets", PrecompressedStaticFiles(directory=os.path.join(
     client_build_dir, "assets")), name="client_assets")
 
+# index.html of each app, read and compressed once per build
+admin_shell = SpaShell(
+    os.path.join(client_admin_build_dir, "index.html"),
+    rewrite=rewrite_admin_asset_paths
+)
+client_shell = SpaShell(os.path.join(client_build_dir, "index.html"))
+
+# Images stored by the local media backend
+if settings.MEDIA_STORAGE.lower() == "local":
+    os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+    app.mount(settings.MEDIA_URL_PATH, MediaFiles(
+        directory=settings.MEDIA_ROOT), name="media")
+
 
 # Include the routers for auth, profile, and admin
 app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
@@ -111,6 +180,8 @@ app.include_router(order_router, prefix="/api/order", tags=["Order"])
 
 app.include_router(admin_router, prefix="/api/admin", tags=["admin"])
 
+app.include_router(metrics_router)
+
 # Fallback route for serving the Admin React app
 
 
@@ -118,41 +189,28 @@ app.include_router(admin_router, prefix="/api/admin", tags=["admin"])
 # Note: removed the slash
 if settings.ENVIRONMENT != "testing":
     @app.get("/admin{full_path:path}", response_class=HTMLResponse)
-    async def serve_admin_react_app(full_path: str):
+    async def serve_admin_react_app(full_path: str, request: Request):
         '''Serve client app'''
         try:
-            print(f"Serving admin app for path: {full_path}")
-            index_path = os.path.join(client_admin_build_dir, 'index.html')
-
-            if not os.path.exists(index_path):
-                raise HTTPException(
-                    status_code=404, detail="Admin app not found")
-
             if full_path.startswith("api/"):
                 raise HTTPException(status_code=404, detail="Not Found")
 
-            with open(index_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Update all asset paths in the HTML
-            content = (
-                content
-                .replace('src="assets/', 'src="/admin-assets/')
-                .replace('href="assets/', 'href="/admin-assets/')
-                .replace('src="/assets/', 'src="/admin-assets/')
-                .replace('href="/assets/', 'href="/admin-assets/')
-            )
-
-            return HTMLResponse(content=content)
+            response = admin_shell.response(request.headers)
+            if response is None:
+                raise HTTPException(
+                    status_code=404, detail="Admin app not found")
+            return response
         except Exception as e:
-            print(f"Error serving admin app: {str(e)}")
+            logger.exception("Error serving admin app: %s", e)
             raise
 
     @app.get("/{full_path:path}", response_class=HTMLResponse)
-    async def serve_react_app(full_path: str):
+    async def serve_react_app(full_path: str, request: Request):
         '''Only serve the React app for paths that aren't API or admin routes'''
         if full_path.startswith("api/"):
             raise HTTPException(status_code=404, detail="Not Found")
         if not full_path.startswith("api/") and not full_path.startswith("admin"):
-            with open(os.path.join(client_build_dir, 'index.html'), "r", encoding="utf-8") as f:
-                return HTMLResponse(content=f.read())
+            response = client_shell.response(request.headers)
+            if response is None:
+                raise HTTPException(status_code=404, detail="App not found")
+            return response
@@ -1,9 +1,10 @@
 '''Models for cart item'''
 
 from datetime import datetime, timezone
+from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from beanie import Document,  before_event, Save, PydanticObjectId
 
 
@@ -54,6 +55,57 @@ class ChangeItemQtyRequest(BaseModel):
         return value
 
 
+class CartAction(str, Enum):
+    ADD = "ADD"
+    REMOVE = "REMOVE"
+    CHANGE_QUANTITY = "CHANGE_QUANTITY"
+
+
+class CartOperation(BaseModel):
+    '''One line operation of a cart sync request'''
+    action: CartAction
+    product_id: Optional[str] = None
+    cart_id: Optional[str] = None
+    size: Optional[int] = None
+    quantity: Optional[int] = None
+
+    @field_validator("size")
+    @classmethod
+    def validate_size(cls, value):
+        '''Ensure that all sizes in the array are between 7 and 12'''
+        if value:
+            if not (7 <= value <= 12):
+                raise ValueError(
+                    f"Size {value} must be between 7 and 12")
+
+        return value
+
+    @model_validator(mode="after")
+    def validate_operation(self):
+        '''Ensure each action carries the fields it needs'''
+        if self.action == CartAction.ADD:
+            if not self.product_id or self.size is None or not self.quantity:
+                raise ValueError(
+                    "ADD requires product_id, size and quantity")
+            if self.quantity < 1:
+                raise ValueError(
+                    "Quantity must be greater than or equal to 1")
+        elif self.action == CartAction.REMOVE:
+            if not self.cart_id and not (self.product_id and self.size is not None):
+                raise ValueError(
+                    "REMOVE requires cart_id or product_id and size")
+        elif not self.quantity or not (
+                self.cart_id or (self.product_id and self.size is not None)):
+            raise ValueError(
+                "CHANGE_QUANTITY requires cart_id or product_id and size, and quantity")
+        return self
+
+
+class CartSyncRequest(BaseModel):
+    '''Request model to apply several cart operations at once'''
+    operations: list[CartOperation] = Field(..., min_length=1, max_length=100)
+
+
 class ProductInCart(Document):
     """Cart model"""
     user_id: PydanticObjectId
@@ -108,7 +160,24 @@ class CartItemResponse(BaseModel):
         )
 
 
+class CartChangeReason(str, Enum):
+    PRICE_CHANGED = "PRICE_CHANGED"
+    DETAILS_CHANGED = "DETAILS_CHANGED"
+    QUANTITY_REDUCED = "QUANTITY_REDUCED"
+    REMOVED = "REMOVED"
+
+
+class CartItemChange(BaseModel):
+    '''A correction made to a cart line while revalidating it'''
+    cart_id: str
+    product_id: str
+    reason: CartChangeReason
+    old_value: Optional[float] = None
+    new_value: Optional[float] = None
+
+
 class CartResponse(BaseModel):
     items: list[CartItemResponse]
     total_price: float
     total_count: int
+    changes: list[CartItemChange] = []
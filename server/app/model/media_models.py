@@ -0,0 +1,56 @@
+'''Models for stored media'''
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+from beanie import Document
+
+from app.model.product_models import Image
+
+
+class MediaDeletion(Document):
+    '''A stored file waiting to be removed by the media deletion worker'''
+    public_id: str
+    backend: str
+    attempts: int = 0
+    next_attempt_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc))
+    # Set while a worker holds the entry
+    claim: Optional[str] = None
+    last_error: Optional[str] = None
+    # Gave up after too many attempts, kept for inspection
+    failed: bool = False
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "media_deletions"
+        indexes = [
+            IndexModel([("backend", ASCENDING), ("public_id", ASCENDING)], unique=True),
+            IndexModel([("failed", ASCENDING), ("next_attempt_at", ASCENDING)])
+        ]
+
+
+class MediaAsset(Document):
+    '''A stored image keyed by the hash of its upload.
+
+    `ref_count` is the number of users, admins and product images pointing
+    at it; the files are deleted once it drops to zero.
+    '''
+    backend: str
+    content_hash: str
+    image: Image
+    ref_count: int = 1
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "media_assets"
+        indexes = [
+            IndexModel([("backend", ASCENDING), ("content_hash", ASCENDING)], unique=True),
+            IndexModel([("backend", ASCENDING), ("image.public_id", ASCENDING)])
+        ]
@@ -1,10 +1,11 @@
 '''Models for orders'''
 
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Optional
 from enum import Enum
 
 from pydantic import BaseModel, Field
+from pymongo import ASCENDING, IndexModel
 from beanie import Document,  before_event, Save, PydanticObjectId, Link
 
 from app.model.user import User, UserResponse
@@ -50,11 +51,14 @@ class Order(Document):
     address: str
     phone: str
     processing_admin: Optional[PydanticObjectId] = None
+    processing_lease_expires_at: Optional[datetime] = None
     razorpay_order_id: str = Field(..., json_schema_extra={"unique": True})
     razorpay_payment_id: Optional[str] = None
     amount: float
     payment_verified: bool
     order_status: OrderStatus = Field(default=OrderStatus.REQUESTED)
+    # Bumped on every change so socket clients can detect missed deltas
+    version: int = 0
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(
@@ -83,6 +87,8 @@ class OrderResponse(BaseModel):
     payment_verified: bool
     order_status: OrderStatus = Field(default=OrderStatus.REQUESTED)
     processing_admin: Optional[str]
+    processing_lease_expires_at: Optional[datetime] = None
+    version: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -101,6 +107,177 @@ class OrderResponse(BaseModel):
             payment_verified=order.payment_verified,
             order_status=order.order_status,
             processing_admin=str(order.processing_admin),
+            processing_lease_expires_at=order.processing_lease_expires_at,
+            version=order.version,
             created_at=order.created_at.isoformat(),
             updated_at=order.updated_at.isoformat()
         )
+
+
+# Fields an order list needs, without the user link or the cart snapshot
+ORDER_SUMMARY_PROJECTION = {
+    "user_id": 1,
+    "amount": 1,
+    "payment_verified": 1,
+    "order_status": 1,
+    "processing_admin": 1,
+    "order_details.total_count": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+
+# Fields that change when an order is claimed, released or moved on
+ORDER_STATUS_DELTA_FIELDS = {
+    "order_status",
+    "processing_admin",
+    "processing_lease_expires_at",
+    "updated_at",
+}
+
+
+class OrderDeltaEvent(BaseModel):
+    '''Socket event with only the changed fields of an order.
+
+    `changes` applies on top of `base_version`; a client holding another
+    version has missed an event and should send `order-resync`.
+    '''
+    id: str
+    user_id: str
+    base_version: int
+    version: int
+    changes: dict[str, Any]
+
+    @classmethod
+    def from_order(cls, order: OrderResponse, fields: set[str]):
+        return cls(
+            id=order.id,
+            user_id=order.user_id,
+            base_version=order.version - 1,
+            version=order.version,
+            changes=order.model_dump(mode="json", include=fields)
+        )
+
+    def merge(self, newer: "OrderDeltaEvent") -> "OrderDeltaEvent":
+        '''Combine with a later delta of the same order'''
+        return OrderDeltaEvent(
+            id=self.id,
+            user_id=self.user_id,
+            base_version=self.base_version,
+            version=newer.version,
+            changes={**self.changes, **newer.changes}
+        )
+
+
+# Fields written by the admin order export
+ORDER_EXPORT_FIELDS = [
+    "id",
+    "user_id",
+    "razorpay_order_id",
+    "razorpay_payment_id",
+    "amount",
+    "payment_verified",
+    "order_status",
+    "total_count",
+    "address",
+    "phone",
+    "created_at",
+    "updated_at",
+]
+
+ORDER_EXPORT_PROJECTION = {
+    "user_id": 1,
+    "razorpay_order_id": 1,
+    "razorpay_payment_id": 1,
+    "amount": 1,
+    "payment_verified": 1,
+    "order_status": 1,
+    "order_details.total_count": 1,
+    "address": 1,
+    "phone": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+
+class OrderSummaryResponse(BaseModel):
+    '''Compact order model for list views'''
+    id: str
+    user_id: str
+    amount: float
+    payment_verified: bool
+    order_status: OrderStatus
+    processing_admin: Optional[str] = None
+    total_count: int
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_mongo(cls, order: dict):
+        '''Build from a raw document read with ORDER_SUMMARY_PROJECTION'''
+        processing_admin = order.get("processing_admin")
+        return cls(
+            id=str(order["_id"]),
+            user_id=str(order["user_id"]),
+            amount=order["amount"],
+            payment_verified=order["payment_verified"],
+            order_status=order["order_status"],
+            processing_admin=str(
+                processing_admin) if processing_admin else None,
+            total_count=order.get("order_details", {}).get("total_count", 0),
+            created_at=order["created_at"],
+            updated_at=order["updated_at"]
+        )
+
+
+class RollupDimension(str, Enum):
+    ALL = "all"
+    BRAND = "brand"
+    CATEGORY = "category"
+
+
+class OrderRollup(Document):
+    '''Pre-aggregated order totals for one day and one brand/category'''
+    day: datetime
+    dimension: RollupDimension
+    key: str
+    revenue: float = 0
+    order_count: int = 0
+    units: int = 0
+    # Orders of this bucket that have reached SHIPPED or DELIVERED
+    status_counts: dict[str, int] = Field(default_factory=dict)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "order_rollups"
+        use_enum_values = True
+        indexes = [
+            IndexModel(
+                [("dimension", ASCENDING), ("day", ASCENDING),
+                 ("key", ASCENDING)],
+                unique=True
+            )
+        ]
+
+
+class OrderRollupResponse(BaseModel):
+    day: datetime
+    dimension: RollupDimension
+    key: str
+    revenue: float
+    order_count: int
+    units: int
+    status_counts: dict[str, int] = {}
+
+    @classmethod
+    def from_mongo(cls, rollup):
+        return cls(
+            day=rollup.day,
+            dimension=rollup.dimension,
+            key=rollup.key,
+            revenue=round(rollup.revenue, 2),
+            order_count=rollup.order_count,
+            units=rollup.units,
+            status_counts=rollup.status_counts
+        )
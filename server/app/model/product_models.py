@@ -12,15 +12,36 @@ class Size(BaseModel):
     stock: int = 0
 
 
+class ImageRendition(BaseModel):
+    '''One re-encoded width and format of a product image'''
+    width: int
+    height: int
+    format: str
+    url: str
+    public_id: str
+
+
 class Image(BaseModel):
     url: str
     public_id: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    # Empty for images uploaded before renditions existed
+    renditions: List[ImageRendition] = []
+
+    def public_ids(self) -> list[str]:
+        '''Every stored file of the image, for deletion'''
+        return list(dict.fromkeys(
+            [self.public_id, *(rendition.public_id for rendition in self.renditions)]))
 
     @classmethod
     def from_mongo(cls, image):
         return cls(
             url=image.url,
-            public_id=image.public_id
+            public_id=image.public_id,
+            width=image.width,
+            height=image.height,
+            renditions=image.renditions
         )
 
 
@@ -182,8 +203,9 @@ class ProductResponse(BaseModel):
     title: str
     description: Optional[str] = None
     price: float
-    brand: BrandResponse
-    category: CategoryResponse
+    # None when the linked brand or category was deleted
+    brand: Optional[BrandResponse] = None
+    category: Optional[CategoryResponse] = None
     images: List[Image] = []
     sizes: List[Size]
     created_at: datetime
@@ -196,10 +218,42 @@ class ProductResponse(BaseModel):
             title=product.title,
             price=product.price,
             description=product.description,
-            brand=BrandResponse.from_mongo(product.brand),
-            category=CategoryResponse.from_mongo(product.category),
+            brand=BrandResponse.from_mongo(product.brand)
+            if isinstance(product.brand, Brand) else None,
+            category=CategoryResponse.from_mongo(product.category)
+            if isinstance(product.category, Category) else None,
             images=[Image.from_mongo(image) for image in product.images],
             sizes=product.sizes,
             created_at=product.created_at,
             updated_at=product.updated_at
         )
+
+
+class ProductDeltaEvent(BaseModel):
+    '''Socket event with the live price and stock of a product.
+
+    Fields left as None did not change.
+    '''
+    id: str
+    price: Optional[float] = None
+    sizes: Optional[List[Size]] = None
+    updated_at: datetime
+
+    @classmethod
+    def from_product(cls, product: Product, price: bool = False, sizes: bool = False):
+        return cls(
+            id=str(product.id),
+            price=product.price if price else None,
+            sizes=[Size(size=size.size, stock=size.stock)
+                   for size in product.sizes] if sizes else None,
+            updated_at=product.updated_at
+        )
+
+    def merge(self, newer: "ProductDeltaEvent") -> "ProductDeltaEvent":
+        '''Combine with a later delta of the same product'''
+        return ProductDeltaEvent(
+            id=self.id,
+            price=newer.price if newer.price is not None else self.price,
+            sizes=newer.sizes if newer.sizes is not None else self.sizes,
+            updated_at=newer.updated_at
+        )
@@ -1,19 +1,25 @@
+import logging
 from fastapi import APIRouter, HTTPException, status, Depends, Response, Request
 from app.crud.user_crud import create_user, get_user_details, add_refresh_token, remove_refresh_token, remove_all_refresh_tokens, refresh_token_is_saved, create_or_get_google_user
 from app.model.user import User, UserResponse, UserCreateRequest
 from app.model.auth_models import Token
 from app.utilities.password_utils import verify_password
-from app.utilities.auth_utils import create_access_token, create_refresh_token, get_current_user
+from app.utilities.auth_utils import create_access_token, create_refresh_token, get_current_user, PRINCIPAL_CLAIM, USER_PRINCIPAL
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated
 import jwt
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
 from app.config.env_settings import settings
 from beanie.operators import Or
+from app.utilities.lazy_import import lazy_module
 
+# google-auth loads requests and its crypto backends, only Google sign-in needs them
+id_token = lazy_module("google.oauth2.id_token")
+google_requests = lazy_module("google.auth.transport.requests")
 
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter()
@@ -48,13 +54,13 @@ async def create_new_user(user: UserCreateRequest):
         created_user = await create_user(user_data_dict)
         return created_user
     except HTTPException as e:
-        print(f"Error creating user. HTTPException: {e}")
+        logger.warning("Error creating user. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(f"Error creating user. Unexpected Exception: {e}")
+        logger.exception("Error creating user. Unexpected Exception: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during sign up",
@@ -85,7 +91,7 @@ async def login(user_credentials: Annotated[OAuth2PasswordRequestForm, Depends()
                 detail="Incorrect email or password"
             )
         access_token = await create_access_token(
-            data={"sub": str(raw_user.id)}
+            data={"sub": str(raw_user.id), PRINCIPAL_CLAIM: USER_PRINCIPAL}
         )
         refresh_token = await create_refresh_token(data={"sub": str(raw_user.id)})
 
@@ -110,13 +116,13 @@ async def login(user_credentials: Annotated[OAuth2PasswordRequestForm, Depends()
             token_type="bearer"
         )
     except HTTPException as e:
-        print(f"Error logging in user. HTTPException: {e}")
+        logger.warning("Error logging in user. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(f"Error logging in user. Full exception details: {str(e)}")
+        logger.exception("Error logging in user. Full exception details: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during login",
@@ -149,7 +155,8 @@ async def google_callback(request: Request, response: Response):
         user = await create_or_get_google_user(user_info)
 
         # Generate access and refresh tokens
-        access_token = await create_access_token(data={"sub": str(user["id"])})
+        access_token = await create_access_token(
+            data={"sub": str(user["id"]), PRINCIPAL_CLAIM: USER_PRINCIPAL})
         refresh_token = await create_refresh_token(data={"sub": str(user["id"])})
 
         add_refresh_token_to_user = await add_refresh_token(
@@ -172,13 +179,13 @@ async def google_callback(request: Request, response: Response):
 
         return Token(access_token=access_token, token_type="bearer")
     except HTTPException as e:
-        print("Google login http exception: ", e)
+        logger.warning("Google login http exception: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print("Unexpected error in google login: ", e)
+        logger.exception("Unexpected error in google login: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error in google login"
@@ -193,13 +200,13 @@ async def logout(response: Response, request: Request, user: Annotated[dict, Dep
         response.delete_cookie(settings.USER_REFRESH_COOKIE_NAME)
         return {"message": "Logged out"}
     except HTTPException as e:
-        print(f"Error logging out user. HTTPException: {e}")
+        logger.warning("Error logging out user. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(f"Error logging out user. Full exception details: {str(e)}")
+        logger.exception("Error logging out user. Full exception details: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during logout",
@@ -215,13 +222,13 @@ async def logout_all(response: Response, user: Annotated[dict, Depends(get_curre
         response.delete_cookie(settings.USER_REFRESH_COOKIE_NAME)
         return {"message": "Logged out of all devices"}
     except HTTPException as e:
-        print(f"Error logging out user. HTTPException: {e}")
+        logger.warning("Error logging out user. HTTPException: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail,
         ) from e
     except Exception as e:
-        print(f"Error logging out user. Full exception details: {str(e)}")
+        logger.exception("Error logging out user. Full exception details: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during logout",
@@ -273,7 +280,8 @@ async def refresh_token_route(request: Request, response: Response):
                 headers={"WWW-Authenticate": "Bearer"}
             )
         await remove_refresh_token(str(user_id), refresh_token)
-        access_token = await create_access_token(data={"sub": str(user_id)})
+        access_token = await create_access_token(
+            data={"sub": str(user_id), PRINCIPAL_CLAIM: USER_PRINCIPAL})
         new_refresh_token = await create_refresh_token(data={"sub": str(user_id)})
         await add_refresh_token(str(user_id), new_refresh_token)
         response.set_cookie(
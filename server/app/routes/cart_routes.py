@@ -1,15 +1,18 @@
 '''Cart Routes'''
 
+import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Depends
 from fastapi.exceptions import HTTPException
 
-from app.crud.cart_crud import get_cart_items, add_to_cart, remove_item_from_cart, change_item_quantity
-from app.model.cart_models import CartResponse, CartItemResponse, AddToCartRequest, ChangeItemQtyRequest
+from app.crud.cart_crud import get_cart_items, add_to_cart, remove_item_from_cart, change_item_quantity, sync_cart
+from app.model.cart_models import CartResponse, CartItemResponse, AddToCartRequest, ChangeItemQtyRequest, CartSyncRequest
 from app.utilities.auth_utils import get_current_user
 from app.utilities.query_models import CartQueryParams
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter()
 
@@ -24,16 +27,17 @@ async def get_cart_route(
         return await get_cart_items(
             user_id=str(user.id),
             page=query_params.page,
-            search=query_params.search
+            search=query_params.search,
+            revalidate=query_params.revalidate
         )
     except HTTPException as e:
-        print("Error fetching cart from route: ", e)
+        logger.warning("Error fetching cart from route: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error fetching cart: {e}")
+        logger.exception("Unexpected error fetching cart: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error fetching cart"
@@ -54,19 +58,44 @@ async def add_to_cart_route(
             size=body.size
         )
     except HTTPException as e:
-        print("Error adding to from route: ", e)
+        logger.warning("Error adding to from route: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error adding cart: {e}")
+        logger.exception("Unexpected error adding cart: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error adding cart"
         ) from e
 
 
+@router.post("/sync", status_code=200, response_model=CartResponse)
+async def sync_cart_route(
+    user: Annotated[dict, Depends(get_current_user)],
+    body: CartSyncRequest
+):
+    '''Route to apply several cart operations in one request'''
+    try:
+        return await sync_cart(
+            user_id=str(user.id),
+            operations=body.operations
+        )
+    except HTTPException as e:
+        logger.warning("Error syncing cart from route: %s", e)
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail
+        ) from e
+    except Exception as e:
+        logger.exception("Unexpected error syncing cart: %s", e)
+        raise HTTPException(
+            status_code=500,
+            detail="Unexpected error syncing cart"
+        ) from e
+
+
 @router.delete("/{cart_id}", status_code=200, response_model=CartItemResponse)
 async def remove_item_from_cart_route(
     user: Annotated[dict, Depends(get_current_user)],
@@ -79,13 +108,13 @@ async def remove_item_from_cart_route(
             cart_id=cart_id
         )
     except HTTPException as e:
-        print("Error changing item quantity from route: ", e)
+        logger.warning("Error changing item quantity from route: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected changing item quantity: {e}")
+        logger.exception("Unexpected changing item quantity: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error changing item quantity"
@@ -108,13 +137,13 @@ async def change_item_quantity_route(
             size=body.size
         )
     except HTTPException as e:
-        print("Error removing item from route: ", e)
+        logger.warning("Error removing item from route: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error removing item from cart: {e}")
+        logger.exception("Unexpected error removing item from cart: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error removing item from cart"
@@ -0,0 +1,30 @@
+'''Prometheus metrics route'''
+
+import secrets
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.config.env_settings import settings
+from app.config.metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics_route(authorization: Annotated[Optional[str], Header()] = None):
+    '''Metrics of this worker in the Prometheus text format'''
+    if not settings.METRICS_TOKEN and settings.ENVIRONMENT == "production":
+        # Not exposed publicly, production scrapers must be given a token
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not secrets.compare_digest(authorization, expected):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token"
+            )
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
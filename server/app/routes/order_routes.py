@@ -1,21 +1,24 @@
 '''Order routes user'''
 
+import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Request
 from fastapi.exceptions import HTTPException
 
-from app.model.order_models import OrderResponse, OrderCreateRequest, CreateOrderResponse
+from app.model.order_models import OrderResponse, OrderSummaryResponse, OrderCreateRequest, CreateOrderResponse
 from app.utilities.query_models import OrderQueryParams
 from app.crud.order_crud import create_order, verify_payment, get_all_orders, get_order_by_id
 from app.utilities.auth_utils import get_current_user
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter()
 
 
 @router.get("/", status_code=200,
-            response_model=list[OrderResponse])
+            response_model=list[OrderResponse] | list[OrderSummaryResponse])
 async def get_all_orders_route(
     user: Annotated[dict, Depends(get_current_user)],
     query: Annotated[OrderQueryParams, Depends()]
@@ -24,16 +27,17 @@ async def get_all_orders_route(
     try:
         return await get_all_orders(
             user_id=str(user.id),
-            page=query.page
+            page=query.page,
+            summary=query.summary
         )
     except HTTPException as e:
-        print("Error fetching orders: ", e)
+        logger.warning("Error fetching orders: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error fetching orders: {e}")
+        logger.exception("Unexpected error fetching orders: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error fetching orders"
@@ -52,13 +56,13 @@ async def get_order_by_id_route(
             order_id=order_id
         )
     except HTTPException as e:
-        print("Error fetching order: ", e)
+        logger.warning("Error fetching order: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error fetching order: {e}")
+        logger.exception("Unexpected error fetching order: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error fetching order"
@@ -78,13 +82,13 @@ async def create_order_route(
             user_id=str(user.id)
         )
     except HTTPException as e:
-        print("Error fetching creating order: ", e)
+        logger.warning("Error fetching creating order: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error creating order: {e}")
+        logger.exception("Unexpected error creating order: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error creating order"
@@ -105,13 +109,13 @@ async def verify_payment_route(
             user_id=str(user.id)
         )
     except HTTPException as e:
-        print("Error verifying payment order: ", e)
+        logger.warning("Error verifying payment order: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected error verifying payment order: {e}")
+        logger.exception("Unexpected error verifying payment order: %s", e)
         import traceback
         traceback.print_exc()  # Print full stack trace
         raise HTTPException(
@@ -1,5 +1,6 @@
 '''Shop Product Routes'''
 
+import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Depends
@@ -11,6 +12,8 @@ from app.model.product_models import ProductResponse
 from app.utilities.auth_utils import get_current_user
 from app.utilities.query_models import ProductQueryParams
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -31,13 +34,13 @@ async def get_all_products(
             sort_order=query_params.sort_order
         )
     except HTTPException as e:
-        print("Error fetching products: ", e)
+        logger.warning("Error fetching products: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print("Unexpected error fetching products route: ", e)
+        logger.exception("Unexpected error fetching products route: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected error fetching products"
@@ -58,7 +61,7 @@ async def get_product_by_id_route(
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Error fetching product: {e}")
+        logger.exception("Error fetching product: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Error fetching product"
@@ -1,13 +1,18 @@
+import logging
 from fastapi import APIRouter, HTTPException, Depends, status, Body, UploadFile
 from app.utilities.auth_utils import get_current_user
 from app.model.user import UserResponse, UpdateProfileRequest, UpdateContactInfoRequest
 from typing import Annotated
 from app.crud.user_crud import update_user_details, update_user_contact_info
-from app.utilities.cloudinary_utils import delete_image_from_cloudinary, update_profile_image
+from app.utilities.media_utils import update_profile_image
+from app.utilities.media_index import release_media
+from app.utilities.upload_utils import spool_image_upload
 from app.model.user import User
 from beanie import PydanticObjectId
 from datetime import datetime, timezone
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter()
 
@@ -17,7 +22,7 @@ async def get_profile_details(user: Annotated[dict, Depends(get_current_user)]):
     try:
         return user
     except HTTPException as e:
-        print("Profile error", e)
+        logger.warning("Profile error %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -39,7 +44,7 @@ async def update_profile_details(user: Annotated[dict, Depends(get_current_user)
     try:
         return await update_user_details(user_id=str(user.id), details=profile_details, current_password=current_password)
     except HTTPException as e:
-        print("Update profile error: ", e)
+        logger.warning("Update profile error: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
@@ -69,13 +74,13 @@ async def update_contact_info(
             contact_info=contact_info, current_password=current_password
         )
     except HTTPException as e:
-        print(f"Error in update profile info route: {e}")
+        logger.warning("Error in update profile info route: %s", e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.detail
         ) from e
     except Exception as e:
-        print(f"Unexpected Error in user contact info update:{e}")
+        logger.exception("Unexpected Error in user contact info update:%s", e)
         raise HTTPException(
             status_code=500,
             detail="Unexpected Error in user contact info update"
@@ -93,42 +98,50 @@ async def update_profile_image_route(
             detail="Only jpeg, png and jpg images are accepted"
         )
     try:
-        # Read file as bytes
-        file_bytes = await file.read()
+        # Streamed to a temporary file, never read into memory whole
+        async with spool_image_upload(file) as image_path:
+            user_id = str(user.id)
 
-        user_id = str(user.id)
+            current_user = await User.get(PydanticObjectId(user_id))
+            if not current_user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
 
-        current_user = await User.get(PydanticObjectId(user_id))
-        if not current_user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+            # Store the new image
+            folder = "solestore_ecommerce_app/users"
 
-        if current_user.profile_img_public_id and current_user.profile_img_url:
-            await delete_image_from_cloudinary(str(current_user.profile_img_public_id))
+            upload_result = await update_profile_image(image_path, folder)
 
-        # Upload the new image to Cloudinary
-        folder = "solestore_ecommerce_app/users"
+            old_public_id = current_user.profile_img_url and current_user.profile_img_public_id
 
-        upload_result = await update_profile_image(file_bytes, folder)
+            current_user.profile_img_url = upload_result.url
+            current_user.profile_img_public_id = upload_result.public_id
+            current_user.updated_at = datetime.now(timezone.utc)
 
-        current_user.profile_img_url = upload_result["secure_url"]
-        current_user.profile_img_public_id = upload_result["public_id"]
-        current_user.updated_at = datetime.now(timezone.utc)
+            await current_user.save()
 
-        await current_user.save()
+            # The old image is released once replaced, it is deleted if unused
+            if old_public_id:
+                await release_media([str(old_public_id)])
 
-        return UserResponse.from_mongo(current_user)
+            return UserResponse.from_mongo(current_user)
 
     except HTTPException as e:
-        print(f"Error in profile image update route:{e}")
+        logger.warning("Error in profile image update route:%s", e)
+        if e.status_code in (status.HTTP_400_BAD_REQUEST, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE):
+            # Rejected upload, tell the client why
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=e.detail
+            ) from e
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating profile image"
         ) from e
     except Exception as e:
-        print(f"Error in profile image update route:{e}")
+        logger.exception("Error in profile image update route:%s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating profile image"
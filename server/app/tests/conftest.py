@@ -0,0 +1,169 @@
+'''Shared pytest fixtures and markers
+
+Tests that touch Mongo request the `db` fixture. The session opens one
+client and initializes Beanie once, on a database of its own per xdist
+worker, so `pytest -n auto` runs modules in parallel without them wiping
+each other's data. Before each test the collections written since the
+previous reset are emptied; indexes stay, so Beanie is not re-initialized.
+
+Run with `--mongo memory` (or TEST_MONGO=memory) to use mongomock-motor
+instead of a server. It lacks tailable cursors, async iteration of a
+sorted cursor and resolving links of fetched documents, tests that need
+them are marked `mongo_server` and skipped with it.
+'''
+
+import asyncio
+import os
+
+import pytest
+import pytest_asyncio
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pytest_asyncio import is_async_test
+
+from app.config.db import DOCUMENT_MODELS
+from app.config.env_settings import settings
+from app.utilities.query_detector import QueryRecorder
+
+MONGO_BACKENDS = ("server", "memory")
+# Commands that can leave documents behind, keyed to the collection they name
+WRITE_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--mongo",
+        choices=MONGO_BACKENDS,
+        default=os.environ.get("TEST_MONGO", "server"),
+        help="run database tests against a Mongo server or the in-memory mongomock-motor"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(route, max_queries, max_repeats=None): fail if a request to the "
+        "route template issues more Mongo commands, or repeats one query shape more often"
+    )
+    config.addinivalue_line(
+        "markers",
+        "mongo_server: needs a real Mongo server, skipped with --mongo memory"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # The session's Motor client is bound to the loop it first ran on, so
+    # every test shares the session loop
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    memory = config.getoption("--mongo") == "memory"
+    skip_memory = pytest.mark.skip(reason="needs a Mongo server")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+        if memory and item.get_closest_marker("mongo_server"):
+            item.add_marker(skip_memory)
+
+
+def worker_database_name() -> str:
+    '''The testing database, suffixed with the xdist worker id when running in parallel'''
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    return f"{settings.DATABASE_TESTING}_{worker}" if worker else settings.DATABASE_TESTING
+
+
+class WrittenCollections(monitoring.CommandListener):
+    '''Collections of the test database written since the last reset'''
+
+    def __init__(self):
+        self.database_name = None
+        self.names: set[str] = set()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name in WRITE_COMMANDS and event.database_name == self.database_name:
+            self.names.add(event.command[event.command_name])
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def take(self) -> set[str]:
+        names, self.names = self.names, set()
+        return names
+
+
+written_collections = WrittenCollections()
+
+
+def _patch_mongomock():
+    '''Accept the bulk_write options Beanie passes and mongomock does not know'''
+    from mongomock.collection import Collection
+
+    bulk_write = Collection.bulk_write
+    if getattr(bulk_write, "accepts_comment", False):
+        return
+
+    def bulk_write_with_comment(self, requests, *args, comment=None, **kwargs):
+        return bulk_write(self, requests, *args, **kwargs)
+
+    bulk_write_with_comment.accepts_comment = True
+    Collection.bulk_write = bulk_write_with_comment
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def session_database(request):
+    '''One client and one Beanie init for the whole session'''
+    name = worker_database_name()
+    if request.config.getoption("--mongo") == "memory":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError as e:
+            raise pytest.UsageError("--mongo memory needs mongomock-motor installed") from e
+        client = AsyncMongoMockClient()
+        _patch_mongomock()
+    else:
+        client = AsyncIOMotorClient(settings.MONGODB_URI, event_listeners=[written_collections])
+        written_collections.database_name = name
+        # Left over by an interrupted run
+        await client.drop_database(name)
+
+    database = client[name]
+    await init_beanie(database=database, document_models=DOCUMENT_MODELS)
+    written_collections.take()
+    yield database
+
+    if request.config.getoption("--mongo") == "server":
+        await client.drop_database(name)
+    client.close()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def db(session_database):
+    '''The test database, emptied of what earlier tests wrote'''
+    if written_collections.database_name is None:
+        names = await session_database.list_collection_names()
+    else:
+        names = written_collections.take()
+    await asyncio.gather(*(session_database[name].delete_many({}) for name in names))
+    yield session_database
+
+
+@pytest.fixture
+def query_recorder():
+    '''Queries of every request made during the test'''
+    with QueryRecorder() as recorder:
+        yield recorder
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request):
+    '''Enforce the query_budget markers of a test'''
+    markers = list(request.node.iter_markers("query_budget"))
+    if not markers:
+        yield
+        return
+    with QueryRecorder() as recorder:
+        yield
+    for marker in markers:
+        recorder.assert_budget(*marker.args, **marker.kwargs)
@@ -2,8 +2,6 @@ import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
 from app.admin_app.admin_models.admin import Admin, AdminResponse
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 from app.config.env_settings import settings
 from app.admin_app.admin_crud_operations.admin_crud import create_admin
@@ -12,20 +10,9 @@ from beanie import PydanticObjectId
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_db():
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[Admin]
-    )
-
-    await Admin.delete_all()
+async def setup_db(db):
     await create_admin({
         "username": "testadmin",
         "email": "testadmin@123.com",
@@ -35,11 +22,8 @@ async def setup_db():
 
     yield
 
-    await Admin.delete_all()
-    client.close()
 
-
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     return {
         "username": "testadmin",
@@ -116,7 +100,7 @@ class TestAdminUpdateProfile:
             refresh_token = cookies.get(settings.ADMIN_REFRESH_COOKIE_NAME)
             return {"access_token": access_token, "refresh_token": refresh_token}
 
-    @pytest_asyncio.fixture(scope="function", loop_scope="function")
+    @pytest_asyncio.fixture(scope="function")
     def update_info(self):
         return {
             "name": "Admin John",
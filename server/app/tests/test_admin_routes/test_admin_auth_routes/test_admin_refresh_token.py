@@ -3,26 +3,14 @@ from httpx import AsyncClient, ASGITransport
 from app.main import app
 from app.admin_app.admin_models.admin import Admin
 from app.model.auth_models import Token
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.config.env_settings import settings
 from app.admin_app.admin_crud_operations.admin_crud import create_admin
 
 
-@pytest_asyncio.fixture(autouse=True, scope="function", loop_scope="function")
-async def setup_db():
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI)
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[Admin]
-    )
-
-    # Clear admins collection before each test
-    await Admin.delete_all()
-
+@pytest_asyncio.fixture(autouse=True, scope="function")
+async def setup_db(db):
     await create_admin({
         "username": "testadmin",
         "email": "testadmin@123.com",
@@ -32,12 +20,8 @@ async def setup_db():
 
     yield
 
-    # Cleanup after test
-    await Admin.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     return {
         "username": "testadmin",
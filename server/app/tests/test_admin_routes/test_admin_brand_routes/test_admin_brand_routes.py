@@ -2,31 +2,17 @@ import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
 from app.model.brand_models import Brand
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.config.env_settings import settings
-from app.admin_app.admin_models.admin import Admin
 from app.admin_app.admin_crud_operations.admin_crud import create_admin
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_bd():
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[Admin, Brand]
-    )
-
-    await Admin.delete_all()
+async def setup_bd(db):
     await create_admin({
         "username": "testadmin",
         "email": "testadmin@123.com",
@@ -34,16 +20,10 @@ async def setup_bd():
         "name": "Test Admin"
     })
 
-    await Brand.delete_all()
-
     yield
 
-    await Admin.delete_all()
-    await Brand.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     '''Login info for admin'''
     return {
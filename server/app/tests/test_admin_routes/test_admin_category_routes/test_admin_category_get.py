@@ -1,34 +1,20 @@
 '''Test admin category get'''
 import pytest
 from httpx import AsyncClient, ASGITransport
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.main import app
 from app.model.category_model import Category
 from app.config.env_settings import settings
-from app.admin_app.admin_models.admin import Admin
 from app.admin_app.admin_crud_operations.admin_crud import create_admin
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_db():
+async def setup_db(db):
     '''Set up database for testing'''
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[Admin, Category]
-    )
-
-    await Admin.delete_all()
     await create_admin({
         "username": "testadmin",
         "email": "testadmin@123.com",
@@ -36,7 +22,6 @@ async def setup_db():
         "name": "Test Admin"
     })
 
-    await Category.delete_all()
     categories = [
         Category(title="Category 1"),
         Category(title="Category 2"),
@@ -50,12 +35,8 @@ async def setup_db():
 
     yield
 
-    await Admin.delete_all()
-    await Category.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     '''Login info for admin'''
     return {
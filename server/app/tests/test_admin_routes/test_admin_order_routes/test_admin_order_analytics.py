@@ -0,0 +1,152 @@
+'''Test order summaries and rollups'''
+
+from asyncio import gather
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from app.admin_app.admin_models.admin import Admin
+from app.admin_app.admin_crud_operations.order_crud import get_orders_admin, update_order_status
+from app.crud import order_crud
+from app.crud.order_rollup_crud import record_paid_order, get_order_rollups
+from app.model.user import User
+from app.model.brand_models import Brand
+from app.model.category_model import Category
+from app.model.product_models import Product
+from app.model.cart_models import CartItemResponse, CartResponse
+from app.model.order_models import (
+    Order,
+    OrderStatus,
+    OrderSummaryResponse,
+    RollupDimension
+)
+from app.crud.user_crud import create_user
+
+
+@pytest_asyncio.fixture(
+    autouse=True,
+    scope="function"
+)
+async def setup_bd(db):
+    '''Set up database for testing'''
+    await Admin(
+        name="Admin",
+        email="admin@1.com",
+        username="admin1",
+        password="password",
+        role="ORDER_MANAGER"
+    ).insert()
+
+    user = await create_user({
+        "username": "testuser",
+        "email": "testuser@123.com",
+        "password": "password",
+        "name": "Test User"
+    })
+    user = await User.get(user["id"])
+
+    brand = await Brand(title="Brand1").insert()
+    category = await Category(title="Category 1").insert()
+    product = await Product(
+        title="Product1",
+        price=50,
+        brand=brand,
+        category=category,
+    ).insert()
+
+    item = CartItemResponse(
+        id="64b7f0c2e1d3a2b4c5d6e7f8",
+        user_id=str(user.id),
+        product_id=str(product.id),
+        title=product.title,
+        price=product.price,
+        size=10,
+        quantity=3,
+        created_at=product.created_at,
+        updated_at=product.updated_at
+    )
+    await Order(
+        user=user,
+        user_id=user.id,
+        order_details=CartResponse(
+            items=[item], total_price=150, total_count=3),
+        address="Test address",
+        phone="1234567890",
+        razorpay_order_id="order_test_1",
+        amount=150,
+        payment_verified=True,
+    ).insert()
+
+    yield
+
+
+class TestOrderAnalytics:
+    '''Test order list summaries and rollup buckets'''
+
+    @pytest.mark.asyncio
+    async def test_orders_summary(self):
+        '''Summary mode returns compact orders'''
+        orders = await get_orders_admin(page=1, summary=True)
+        assert len(orders) == 1
+        assert isinstance(orders[0], OrderSummaryResponse)
+        assert orders[0].amount == 150
+        assert orders[0].total_count == 3
+
+    @pytest.mark.asyncio
+    async def test_paid_order_rollups(self):
+        '''Paid orders are added to day, brand and category buckets'''
+        order = await Order.find_one()
+        await record_paid_order(order)
+
+        totals = await get_order_rollups()
+        assert len(totals) == 1
+        assert totals[0].revenue == 150
+        assert totals[0].order_count == 1
+        assert totals[0].units == 3
+
+        brand = await Brand.find_one()
+        by_brand = await get_order_rollups(dimension=RollupDimension.BRAND)
+        assert len(by_brand) == 1
+        assert by_brand[0].key == str(brand.id)
+        assert by_brand[0].units == 3
+
+        by_category = await get_order_rollups(dimension=RollupDimension.CATEGORY)
+        assert len(by_category) == 1
+        assert by_category[0].revenue == 150
+
+    @pytest.mark.asyncio
+    async def test_status_change_rollups(self):
+        '''Fulfilment counters follow order status changes'''
+        order = await Order.find_one()
+        admin = await Admin.find_one()
+        await record_paid_order(order)
+
+        await update_order_status(str(order.id), OrderStatus.SHIPPED, str(admin.id))
+        totals = await get_order_rollups()
+        assert totals[0].status_counts == {"SHIPPED": 1}
+
+        await update_order_status(str(order.id), OrderStatus.DELIVERED, str(admin.id))
+        totals = await get_order_rollups()
+        assert totals[0].status_counts == {"SHIPPED": 0, "DELIVERED": 1}
+
+    @pytest.mark.asyncio
+    # verify_payment fetches the order's user link, which mongomock does not resolve
+    @pytest.mark.mongo_server
+    async def test_concurrent_verification_counts_once(self, monkeypatch):
+        '''A retried payment verification adds the order to the rollups once'''
+        order = await Order.find_one()
+        order.payment_verified = False
+        await order.save()
+        monkeypatch.setattr(order_crud, "razorpay_client", SimpleNamespace(
+            utility=SimpleNamespace(verify_payment_signature=lambda params: True)))
+
+        responses = await gather(*(
+            order_crud.verify_payment("pay_1", "order_test_1", "signature", str(order.user_id))
+            for _ in range(2)
+        ))
+
+        assert all(response.payment_verified for response in responses)
+        totals = await get_order_rollups()
+        assert totals[0].order_count == 1
+        assert totals[0].units == 3
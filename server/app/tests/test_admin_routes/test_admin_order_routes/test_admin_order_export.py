@@ -0,0 +1,143 @@
+'''Test admin order export'''
+
+import csv
+import io
+import json
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+import pytest_asyncio
+
+from app.main import app
+from app.config.env_settings import settings
+from app.admin_app.admin_crud_operations.admin_crud import create_admin
+from app.model.user import User
+from app.model.cart_models import CartResponse
+from app.model.order_models import Order, OrderStatus
+from app.crud.user_crud import create_user
+
+
+@pytest_asyncio.fixture(
+    autouse=True,
+    scope="function"
+)
+async def setup_db(db):
+    '''Set up database for testing'''
+    await create_admin({
+        "username": "testadmin",
+        "email": "testadmin@123.com",
+        "password": "password",
+        "name": "Test Admin"
+    })
+    user = await create_user({
+        "username": "testuser",
+        "email": "testuser@123.com",
+        "password": "password",
+        "name": "Test User"
+    })
+    user = await User.get(user["id"])
+
+    await Order.insert_many([
+        Order(
+            user=user,
+            user_id=user.id,
+            order_details=CartResponse(
+                items=[], total_price=0, total_count=i + 1),
+            address="Test address",
+            phone="1234567890",
+            razorpay_order_id=f"order_test_{i}",
+            amount=100 + i,
+            payment_verified=True,
+            order_status=OrderStatus.DELIVERED if i % 2 else OrderStatus.REQUESTED
+        ) for i in range(5)
+    ])
+
+    yield
+
+
+@pytest_asyncio.fixture(scope="function")
+def login_info():
+    '''Login info for admin'''
+    return {
+        "username": "testadmin",
+        "password": "password"
+    }
+
+
+class TestAdminOrderExport:
+    '''Test streaming order export'''
+    @pytest_asyncio.fixture(scope="function", autouse=True)
+    async def login_admin(self, login_info):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(
+                "/api/admin/auth/login",
+                data={
+                    "username": login_info["username"],
+                    "password": login_info["password"]
+                }
+            )
+            assert response.status_code == 200
+            access_token = response.json()["access_token"]
+            refresh_token = response.cookies.get(
+                settings.ADMIN_REFRESH_COOKIE_NAME)
+            return {"access_token": access_token, "refresh_token": refresh_token}
+
+    @pytest.mark.asyncio
+    # The export iterates a sorted Motor cursor, mongomock-motor's is not async
+    @pytest.mark.mongo_server
+    async def test_export_csv(self, login_admin):
+        '''Export all orders as CSV'''
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            client.cookies.set(
+                settings.ADMIN_REFRESH_COOKIE_NAME, login_admin["refresh_token"])
+            response = await client.get(
+                "/api/admin/order/export",
+                headers={
+                    "Authorization": f"Bearer {login_admin['access_token']}"},
+                follow_redirects=True
+            )
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/csv")
+            rows = list(csv.DictReader(io.StringIO(response.text)))
+            assert len(rows) == 5
+            assert "order_details" not in rows[0]
+            assert rows[0]["razorpay_order_id"] == "order_test_0"
+
+    @pytest.mark.asyncio
+    # The export iterates a sorted Motor cursor, mongomock-motor's is not async
+    @pytest.mark.mongo_server
+    async def test_export_ndjson_with_status(self, login_admin):
+        '''Export filtered orders as NDJSON'''
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            client.cookies.set(
+                settings.ADMIN_REFRESH_COOKIE_NAME, login_admin["refresh_token"])
+            response = await client.get(
+                "/api/admin/order/export",
+                params={"export_format": "ndjson",
+                        "order_status": "DELIVERED"},
+                headers={
+                    "Authorization": f"Bearer {login_admin['access_token']}"},
+                follow_redirects=True
+            )
+            assert response.status_code == 200
+            rows = [json.loads(line)
+                    for line in response.text.splitlines() if line]
+            assert len(rows) == 2
+            for row in rows:
+                assert row["order_status"] == "DELIVERED"
+
+    @pytest.mark.asyncio
+    async def test_export_invalid_range(self, login_admin):
+        '''Start date after end date is rejected'''
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            client.cookies.set(
+                settings.ADMIN_REFRESH_COOKIE_NAME, login_admin["refresh_token"])
+            response = await client.get(
+                "/api/admin/order/export",
+                params={"start": "2025-02-01T00:00:00",
+                        "end": "2025-01-01T00:00:00"},
+                headers={
+                    "Authorization": f"Bearer {login_admin['access_token']}"},
+                follow_redirects=True
+            )
+            assert response.status_code == 400
@@ -0,0 +1,162 @@
+'''Test admin order processing lease'''
+
+from asyncio import gather
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+import pytest_asyncio
+
+from app.admin_app.admin_models.admin import Admin
+from app.admin_app.admin_crud_operations.order_crud import (
+    add_to_orders_being_processed,
+    is_order_being_processed,
+    remove_from_orders_being_processed,
+    update_order_status
+)
+from app.model.user import User
+from app.model.cart_models import CartResponse
+from app.model.order_models import Order, OrderStatus
+from app.crud.user_crud import create_user
+
+
+@pytest_asyncio.fixture(
+    autouse=True,
+    scope="function"
+)
+async def setup_bd(db):
+    '''Set up database for testing'''
+    await Admin.insert_many([
+        Admin(
+            name=f"Admin {i}",
+            email=f"admin@{i}.com",
+            username=f"admin{i}",
+            password="password",
+            role="ORDER_MANAGER"
+        ) for i in range(25)
+    ])
+
+    user = await create_user({
+        "username": "testuser",
+        "email": "testuser@123.com",
+        "password": "password",
+        "name": "Test User"
+    })
+    user = await User.get(user["id"])
+
+    await Order(
+        user=user,
+        user_id=user.id,
+        order_details=CartResponse(items=[], total_price=0, total_count=0),
+        address="Test address",
+        phone="1234567890",
+        razorpay_order_id="order_test_1",
+        amount=100,
+        payment_verified=True,
+    ).insert()
+
+    yield
+
+
+class TestOrderProcessingLease:
+    '''Test claiming and releasing the order processing lease'''
+
+    @pytest.mark.asyncio
+    async def test_concurrent_claims_single_winner(self):
+        '''Only one of many admins claiming at once gets the lease'''
+        admins = await Admin.find().to_list()
+        order = await Order.find_one()
+
+        results = await gather(
+            *(add_to_orders_being_processed(str(order.id), str(admin.id))
+              for admin in admins),
+            return_exceptions=True
+        )
+
+        winners = [r for r in results if not isinstance(r, Exception)]
+        losers = [r for r in results if isinstance(r, Exception)]
+        assert len(winners) == 1
+        assert len(losers) == len(admins) - 1
+        for error in losers:
+            assert isinstance(error, HTTPException)
+            assert error.status_code == 403
+
+        saved = await Order.get(order.id)
+        assert saved.order_status == OrderStatus.PROCESSING
+        assert str(saved.processing_admin) == winners[0].processing_admin
+        assert saved.processing_lease_expires_at is not None
+
+    @pytest.mark.asyncio
+    async def test_claim_is_reentrant_for_holder(self):
+        '''The lease holder can claim again to renew the lease'''
+        admin = await Admin.find_one()
+        order = await Order.find_one()
+
+        first = await add_to_orders_being_processed(str(order.id), str(admin.id))
+        second = await add_to_orders_being_processed(str(order.id), str(admin.id))
+
+        assert first.processing_admin == str(admin.id)
+        assert second.processing_admin == str(admin.id)
+        assert second.processing_lease_expires_at >= first.processing_lease_expires_at
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_can_be_claimed(self):
+        '''An abandoned lease times out and another admin can take it'''
+        admins = await Admin.find().limit(2).to_list()
+        order = await Order.find_one()
+
+        await add_to_orders_being_processed(str(order.id), str(admins[0].id))
+        with pytest.raises(HTTPException) as exc:
+            await add_to_orders_being_processed(str(order.id), str(admins[1].id))
+        assert exc.value.status_code == 403
+        with pytest.raises(HTTPException) as exc:
+            await is_order_being_processed(str(order.id), str(admins[1].id))
+        assert exc.value.status_code == 403
+
+        await Order.get_motor_collection().update_one(
+            {"_id": order.id},
+            {"$set": {"processing_lease_expires_at": datetime.now(
+                timezone.utc) - timedelta(seconds=1)}}
+        )
+
+        # The expired lease no longer counts as someone else processing it
+        response = await is_order_being_processed(str(order.id), str(admins[1].id))
+        assert response.processing_admin == str(admins[0].id)
+
+        response = await add_to_orders_being_processed(str(order.id), str(admins[1].id))
+        assert response.processing_admin == str(admins[1].id)
+
+    @pytest.mark.asyncio
+    async def test_release_and_update_respect_lease(self):
+        '''Only the lease holder can release or change the status'''
+        admins = await Admin.find().limit(2).to_list()
+        order = await Order.find_one()
+
+        await add_to_orders_being_processed(str(order.id), str(admins[0].id))
+
+        with pytest.raises(HTTPException) as exc:
+            await remove_from_orders_being_processed(str(order.id), str(admins[1].id))
+        assert exc.value.status_code == 403
+
+        with pytest.raises(HTTPException) as exc:
+            await update_order_status(str(order.id), OrderStatus.SHIPPED, str(admins[1].id))
+        assert exc.value.status_code == 403
+
+        released = await remove_from_orders_being_processed(str(order.id), str(admins[0].id))
+        assert released.order_status == OrderStatus.REQUESTED
+        assert released.processing_lease_expires_at is None
+
+        with pytest.raises(HTTPException) as exc:
+            await remove_from_orders_being_processed(str(order.id), str(admins[0].id))
+        assert exc.value.status_code == 400
+
+        shipped = await update_order_status(str(order.id), OrderStatus.SHIPPED, str(admins[1].id))
+        assert shipped.order_status == OrderStatus.SHIPPED
+
+    @pytest.mark.asyncio
+    async def test_claim_missing_order(self):
+        '''Claiming an order that does not exist returns 404'''
+        admin = await Admin.find_one()
+        with pytest.raises(HTTPException) as exc:
+            await add_to_orders_being_processed("64b7f0c2e1d3a2b4c5d6e7f8", str(admin.id))
+        assert exc.value.status_code == 404
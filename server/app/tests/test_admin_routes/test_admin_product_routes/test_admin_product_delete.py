@@ -2,8 +2,6 @@
 
 import pytest
 from httpx import AsyncClient, ASGITransport
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.main import app
@@ -11,29 +9,15 @@ from app.model.category_model import Category
 from app.model.brand_models import Brand
 from app.model.product_models import Product, ProductResponse
 from app.config.env_settings import settings
-from app.admin_app.admin_models.admin import Admin
 from app.admin_app.admin_crud_operations.admin_crud import create_admin
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_bd():
+async def setup_bd(db):
     '''Set up database for testing'''
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[Admin, Category, Brand, Product]
-    )
-
-    await Admin.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
     await create_admin({
         "username": "testadmin",
         "email": "testadmin@123.com",
@@ -85,14 +69,8 @@ async def setup_bd():
 
     yield
 
-    await Admin.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     '''Login info for admin'''
     return {
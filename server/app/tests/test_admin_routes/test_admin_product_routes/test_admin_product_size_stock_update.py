@@ -2,38 +2,22 @@
 
 import pytest
 from httpx import AsyncClient, ASGITransport
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.main import app
 from app.model.category_model import Category
 from app.model.brand_models import Brand
-from app.model.product_models import Product
 from app.config.env_settings import settings
-from app.admin_app.admin_models.admin import Admin
 from app.admin_app.admin_crud_operations.admin_crud import create_admin
+from app.crud import product_crud
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_bd():
+async def setup_bd(db):
     '''Set up database for testing'''
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[Admin, Category, Brand, Product]
-    )
-
-    await Admin.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
     await create_admin({
         "username": "testadmin",
         "email": "testadmin@123.com",
@@ -58,14 +42,8 @@ async def setup_bd():
 
     yield
 
-    await Admin.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
-    client.close()
 
-
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     '''Login info for admin'''
     return {
@@ -74,7 +52,7 @@ def login_info():
     }
 
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def product_data_1():
     '''Product data 1'''
     return {
@@ -200,6 +178,43 @@ class TestAdminProductSizeStockUpdate:
             assert {"size": 12, "stock": 22} in response.json()["sizes"]
             assert {"size": 11, "stock": 77} in response.json()["sizes"]
 
+    @pytest.mark.asyncio
+    async def test_admin_product_size_stock_pushes_delta(self, login_admin, product_added, monkeypatch):
+        '''Test size stock update is pushed to the product room'''
+        published = []
+        monkeypatch.setattr(
+            product_crud.broadcaster, "publish",
+            lambda event, payload, rooms, key=None: published.append(
+                (event, payload, rooms, key))
+        )
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_admin["access_token"]}"
+            }
+            client.cookies.set(
+                settings.ADMIN_REFRESH_COOKIE_NAME, login_admin["refresh_token"]
+            )
+            product_id = str(product_added["product"]["id"])
+
+            response = await client.put(
+                f"/api/admin/product/{product_id}/update-size-stock",
+                headers=auth_headers,
+                json={"sizes": [{"size": 12, "stock": 0}]}
+            )
+            assert response.status_code == 200
+
+        assert len(published) == 1
+        event, payload, rooms, key = published[0]
+        assert event == "product-updated"
+        assert rooms == [f"product:{product_id}"]
+        assert key == product_id
+        assert payload.price is None
+        assert {"size": 12, "stock": 0} in [
+            size.model_dump() for size in payload.sizes]
+
     @pytest.mark.asyncio
     async def test_admin_product_size_stock_invalid_product_id(self, login_admin):
         '''Test size stock update invalid product id'''
@@ -0,0 +1,91 @@
+'''Test the synthetic data generator'''
+
+from collections import Counter
+
+import pytest
+
+from app.benchmarks.data_generator import (
+    MAX_BATCH,
+    MIN_BATCH,
+    PASSWORD,
+    DataGenerator,
+    GeneratorConfig,
+    batch_size_for,
+    dataset_digest
+)
+from app.model.cart_models import CartItemResponse
+from app.utilities.password_utils import verify_password
+
+
+@pytest.fixture
+def config():
+    return GeneratorConfig(products=500, users=200, orders=2000, password_hash="shared")
+
+
+@pytest.fixture
+def dataset(config):
+    generator = DataGenerator(config)
+    return generator, {name: list(documents) for name, documents in generator.collections()}
+
+
+class TestDataGenerator:
+    '''Test determinism, distributions and consistency of generated data'''
+
+    def test_same_seed_same_data(self, config):
+        counts, digest = dataset_digest(config)
+        assert dataset_digest(config) == (counts, digest)
+        config.seed += 1
+        assert dataset_digest(config)[1] != digest
+        assert counts["products"] == 500
+        assert counts["orders"] == 2000
+
+    def test_popularity_is_skewed(self, dataset):
+        _, collections = dataset
+        lines = Counter(item["product_id"] for order in collections["orders"]
+                        for item in order["order_details"]["items"])
+        top = sum(count for _, count in lines.most_common(50))
+        # The top tenth of the catalog gets most order lines
+        assert top > 0.5 * sum(lines.values())
+        customers = Counter(order["user_id"] for order in collections["orders"])
+        assert customers.most_common(1)[0][1] > 10 * (2000 / 200)
+
+    def test_documents_match_the_models(self, dataset):
+        _, collections = dataset
+        for product in collections["products"]:
+            assert [size["size"] for size in product["sizes"]] == list(range(7, 13))
+            assert all(size["stock"] >= 0 for size in product["sizes"])
+            assert 1 <= len(product["images"]) <= 5
+            assert len(product["description"]) <= 100
+        for order in collections["orders"]:
+            for item in order["order_details"]["items"]:
+                CartItemResponse(**item)
+            assert order["amount"] == order["order_details"]["total_price"]
+            assert order["_id"].generation_time == order["created_at"].replace(microsecond=0)
+        cart_lines = {(line["user_id"], line["product_id"]) for line in collections["product_in_cart"]}
+        assert len(cart_lines) == len(collections["product_in_cart"])
+
+    def test_rollups_match_paid_orders(self, dataset):
+        _, collections = dataset
+        paid = [order for order in collections["orders"] if order["payment_verified"]]
+        totals = [rollup for rollup in collections["order_rollups"] if rollup["dimension"] == "all"]
+        assert sum(rollup["order_count"] for rollup in totals) == len(paid)
+        assert sum(rollup["revenue"] for rollup in totals) == pytest.approx(
+            sum(order["amount"] for order in paid), rel=1e-6)
+        brand_units = sum(rollup["units"] for rollup in collections["order_rollups"]
+                          if rollup["dimension"] == "brand")
+        assert brand_units == sum(rollup["units"] for rollup in totals)
+        delivered = sum(rollup["status_counts"].get("DELIVERED", 0) for rollup in totals)
+        assert delivered == sum(order["order_status"] == "DELIVERED" for order in paid)
+
+    def test_fast_hash_verifies_with_the_app(self):
+        generator = DataGenerator(GeneratorConfig(users=2, password_hash="fast"))
+        list(generator.brands())
+        users = list(generator.users())
+        assert users[0]["password"] != users[1]["password"]
+        assert users[0]["password"].startswith("$2b$04$")
+        assert verify_password(PASSWORD, users[0]["password"])
+
+    def test_batch_size_for(self):
+        assert batch_size_for({"x": "a" * 10}) == MAX_BATCH
+        assert batch_size_for({"x": "a" * 200_000}) == MIN_BATCH
+        assert batch_size_for({"x": "a" * 2000}, target_bytes=1_000_000) == 1_000_000 // 2015
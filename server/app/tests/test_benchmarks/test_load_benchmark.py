@@ -0,0 +1,64 @@
+'''Test the load benchmark result summaries'''
+
+import pytest
+
+from app.benchmarks.load_benchmark import (
+    OfflinePaymentOrders,
+    Recorder,
+    compare,
+    percentile,
+    summarize
+)
+
+
+class TestLoadBenchmarkResults:
+    '''Test percentiles, summaries and run comparison'''
+
+    def test_percentile_interpolates(self):
+        values = [0.01, 0.02, 0.03, 0.04, 0.05]
+        assert percentile(values, 0) == 0.01
+        assert percentile(values, 50) == 0.03
+        assert percentile(values, 100) == 0.05
+        assert percentile(values, 95) == pytest.approx(0.048)
+        assert percentile([], 99) == 0.0
+
+    def test_warmup_is_not_recorded(self):
+        recorder = Recorder()
+        recorder.request("GET /api/brand/", 0.5, 200)
+        recorder.measuring = True
+        recorder.request("GET /api/brand/", 0.01, 200)
+        recorder.request("GET /api/brand/", 0.03, 500)
+        recorder.request("POST /api/cart/add", 0.02, 404)
+
+        summary = summarize(recorder, elapsed=2.0)
+
+        brand = summary["endpoints"]["GET /api/brand/"]
+        assert brand["count"] == 2
+        assert brand["rps"] == 1.0
+        assert brand["p50_ms"] == 20.0
+        assert brand["server_errors"] == 1
+        assert brand["statuses"] == {"200": 1, "500": 1}
+        assert summary["endpoints"]["POST /api/cart/add"]["client_errors"] == 1
+        assert summary["total"]["count"] == 3
+        assert summary["total"]["server_errors"] == 1
+
+    def test_compare_runs(self):
+        baseline = {"total": {"p95_ms": 40.0, "rps": 100.0},
+                    "endpoints": {"GET /api/product/": {"p95_ms": 50.0, "rps": 40.0},
+                                  "GET /api/cart/": {"p95_ms": 10.0, "rps": 20.0}}}
+        current = {"total": {"p95_ms": 30.0, "rps": 125.0},
+                   "endpoints": {"GET /api/product/": {"p95_ms": 25.0, "rps": 60.0}}}
+
+        rows = {row["endpoint"]: row for row in compare(baseline, current)}
+
+        assert rows["total"]["p95_change"] == -25.0
+        assert rows["total"]["rps_change"] == 25.0
+        assert rows["GET /api/product/"]["p95_ms"] == (50.0, 25.0)
+        assert "GET /api/cart/" not in rows
+
+    def test_offline_payment_order(self):
+        order = OfflinePaymentOrders().create(
+            {"amount": 129900.0, "currency": "INR", "receipt": "recept_1", "payment_capture": 1})
+        assert order["id"].startswith("order_")
+        assert order["amount"] == 129900
+        assert order["status"] == "created"
@@ -0,0 +1,63 @@
+'''Test the startup benchmark and the app's import time budget'''
+
+from app.benchmarks.startup_benchmark import (
+    IMPORT_BUDGET_SECONDS,
+    by_package,
+    measure_import,
+    parse_importtime,
+    summarize
+)
+from app.utilities.lazy_import import lazy_module
+
+REPORT = """\
+import time: self [us] | cumulative | imported package
+some warning printed to stderr
+import time:       120 |        120 |     fastapi.params
+import time:       300 |        420 |   fastapi.routing
+import time:        80 |        500 | fastapi
+import time:      1000 |       1500 | app.main
+"""
+
+
+class TestStartupBenchmark:
+    '''Test parsing and summarizing -X importtime reports'''
+
+    def test_parse_importtime(self):
+        records = parse_importtime(REPORT)
+
+        assert [record.name for record in records] == [
+            "fastapi.params", "fastapi.routing", "fastapi", "app.main"]
+        assert [record.depth for record in records] == [2, 1, 0, 0]
+        assert records[1].self_us == 300
+        assert records[1].cumulative_us == 420
+
+    def test_summary(self):
+        records = parse_importtime(REPORT)
+        runs = [{"seconds": 0.5, "lazy_loaded": []},
+                {"seconds": 0.7, "lazy_loaded": ["PIL"]},
+                {"seconds": 0.6, "lazy_loaded": []}]
+
+        summary = summarize("app.main", runs, records, top=2)
+
+        assert by_package(records) == {"app": 1000, "fastapi": 500}
+        assert summary["import_s"] == {"min": 0.5, "median": 0.6, "max": 0.7}
+        assert summary["lazy_loaded"] == ["PIL"]
+        assert [module["name"] for module in summary["modules"]] == ["app.main", "fastapi"]
+
+    def test_lazy_module_imports_on_first_use(self):
+        module = lazy_module("json.tool")
+        assert not module.loaded
+        assert callable(module.main)
+        assert module.loaded
+
+
+class TestStartupBudget:
+    '''Importing the app stays fast and leaves the heavy SDKs unloaded'''
+
+    def test_app_import_within_budget(self):
+        # The first import may write the bytecode cache
+        measure_import()
+        runs = [measure_import()[0] for _ in range(3)]
+
+        assert all(run["lazy_loaded"] == [] for run in runs), runs
+        assert min(run["seconds"] for run in runs) < IMPORT_BUDGET_SECONDS
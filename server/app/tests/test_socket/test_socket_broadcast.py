@@ -0,0 +1,149 @@
+'''Test coalesced socket broadcasting'''
+
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from app.config.socket_broadcast import SocketBroadcaster
+from app.model.order_models import OrderDeltaEvent
+from app.model.product_models import ProductDeltaEvent, Size
+
+
+class RecordingServer:
+    '''Stands in for the Socket.IO server and records emits'''
+
+    def __init__(self):
+        self.emits = []
+
+    async def emit(self, event, data, to=None):
+        self.emits.append((event, data, to))
+
+
+class Payload(BaseModel):
+    id: str
+    status: str
+
+
+class TestSocketBroadcaster:
+    '''Test the background broadcast queue'''
+
+    @pytest.mark.asyncio
+    async def test_single_emit_for_many_rooms(self):
+        '''One serialized payload is sent to every room in one emit'''
+        server = RecordingServer()
+        broadcaster = SocketBroadcaster(server, window=0.01)
+
+        broadcaster.publish("order-updated", Payload(
+            id="1", status="SHIPPED"), rooms=["admin", "user-1"], key="1")
+        await broadcaster.close()
+
+        assert server.emits == [(
+            "order-updated",
+            {"id": "1", "status": "SHIPPED"},
+            ["admin", "user-1"]
+        )]
+
+    @pytest.mark.asyncio
+    async def test_burst_is_coalesced(self):
+        '''Updates to the same key within the window become one event'''
+        server = RecordingServer()
+        broadcaster = SocketBroadcaster(server, window=0.05)
+
+        for status in ["PROCESSING", "SHIPPED", "DELIVERED"]:
+            broadcaster.publish("order-updated", Payload(
+                id="1", status=status), rooms=["admin"], key="1")
+        broadcaster.publish("order-updated", Payload(
+            id="2", status="SHIPPED"), rooms=["admin"], key="2")
+        await broadcaster.close()
+
+        assert len(server.emits) == 2
+        assert server.emits[0][1] == {"id": "1", "status": "DELIVERED"}
+        assert server.emits[1][1] == {"id": "2", "status": "SHIPPED"}
+
+    @pytest.mark.asyncio
+    async def test_deltas_are_merged(self):
+        '''Coalesced deltas keep the first base version and all changes'''
+        server = RecordingServer()
+        broadcaster = SocketBroadcaster(server, window=0.05)
+
+        broadcaster.publish("order-updated", OrderDeltaEvent(
+            id="1", user_id="u", base_version=3, version=4,
+            changes={"order_status": "PROCESSING", "processing_admin": "a"}
+        ), rooms=["admin"], key="1")
+        broadcaster.publish("order-updated", OrderDeltaEvent(
+            id="1", user_id="u", base_version=4, version=5,
+            changes={"order_status": "SHIPPED"}
+        ), rooms=["u"], key="1")
+        await broadcaster.close()
+
+        assert server.emits == [(
+            "order-updated",
+            {
+                "id": "1",
+                "user_id": "u",
+                "base_version": 3,
+                "version": 5,
+                "changes": {"order_status": "SHIPPED", "processing_admin": "a"}
+            },
+            ["admin", "u"]
+        )]
+
+    @pytest.mark.asyncio
+    async def test_product_deltas_are_merged(self):
+        '''A price change and a stock change in one window become one event'''
+        server = RecordingServer()
+        broadcaster = SocketBroadcaster(server, window=0.05)
+
+        broadcaster.publish("product-updated", ProductDeltaEvent(
+            id="p", price=99.0, updated_at="2025-01-01T00:00:00Z"
+        ), rooms=["product:p"], key="p")
+        broadcaster.publish("product-updated", ProductDeltaEvent(
+            id="p", sizes=[Size(size=10, stock=0)],
+            updated_at="2025-01-01T00:00:01Z"
+        ), rooms=["product:p"], key="p")
+        await broadcaster.close()
+
+        assert len(server.emits) == 1
+        payload = server.emits[0][1]
+        assert payload["price"] == 99.0
+        assert payload["sizes"] == [{"size": 10, "stock": 0}]
+        assert payload["updated_at"] == "2025-01-01T00:00:01Z"
+
+    @pytest.mark.asyncio
+    async def test_keyless_events_are_not_coalesced(self):
+        '''Events without a key are each delivered'''
+        server = RecordingServer()
+        broadcaster = SocketBroadcaster(server, window=0.01)
+
+        broadcaster.publish("new-order", "a", rooms=["admin"])
+        broadcaster.publish("new-order", "b", rooms=["admin"])
+        await broadcaster.close()
+
+        assert [emit[1] for emit in server.emits] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_publish_does_not_wait_for_emit(self):
+        '''Publishing returns before the event is sent'''
+        server = RecordingServer()
+        broadcaster = SocketBroadcaster(server, window=0.05)
+
+        broadcaster.publish("new-order", "a", rooms=["admin"])
+        assert server.emits == []
+        await asyncio.sleep(0.1)
+        assert len(server.emits) == 1
+        await broadcaster.close()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops(self):
+        '''Events beyond the queue bound are dropped'''
+        server = RecordingServer()
+        broadcaster = SocketBroadcaster(server, window=0.01, max_pending=2)
+
+        results = [broadcaster.publish("new-order", str(i), rooms=["admin"])
+                   for i in range(3)]
+        await broadcaster.close()
+
+        assert results == [True, True, False]
+        assert broadcaster.dropped == 1
+        assert len(server.emits) == 2
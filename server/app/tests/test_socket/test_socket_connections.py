@@ -0,0 +1,186 @@
+'''Test the socket handshake: principal routing, caching and limits'''
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import socket_manager
+from app.config.socket_connections import ConnectionRegistry, HandshakeMetrics
+from app.utilities.auth_utils import create_access_token, get_token_principal, PRINCIPAL_CLAIM, USER_PRINCIPAL, ADMIN_PRINCIPAL
+from app.utilities.principal_cache import PrincipalCache
+
+
+class RecordingAuth:
+    '''Records which websocket verification ran'''
+
+    def __init__(self, user=None, admin=None):
+        self.user = user
+        self.admin = admin
+        self.calls = []
+
+    async def user_ws(self, token):
+        self.calls.append("user")
+        if self.user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return self.user
+
+    async def admin_ws(self, token):
+        self.calls.append("admin")
+        if self.admin is None:
+            raise HTTPException(status_code=404, detail="Admin not found")
+        return self.admin
+
+
+class User:
+    def __init__(self, data):
+        self.data = data
+
+    def model_dump(self):
+        return self.data
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    recording = RecordingAuth(
+        user=User({"id": "u1", "username": "user"}),
+        admin={"id": "a1", "username": "admin"}
+    )
+    monkeypatch.setattr(socket_manager, "get_current_user_ws", recording.user_ws)
+    monkeypatch.setattr(socket_manager, "get_current_admin_ws", recording.admin_ws)
+    return recording
+
+
+class TestPrincipalRouting:
+    '''Tokens with a principal claim need a single lookup'''
+
+    @pytest.mark.asyncio
+    async def test_admin_token_skips_user_lookup(self, auth):
+        token = await create_access_token(
+            data={"sub": "a1", PRINCIPAL_CLAIM: ADMIN_PRINCIPAL})
+        assert get_token_principal(token) == ADMIN_PRINCIPAL
+
+        principal, admin = await socket_manager.authenticate_socket(token)
+
+        assert principal == ADMIN_PRINCIPAL
+        assert admin["id"] == "a1"
+        assert auth.calls == ["admin"]
+
+    @pytest.mark.asyncio
+    async def test_user_token_skips_admin_lookup(self, auth):
+        token = await create_access_token(
+            data={"sub": "u1", PRINCIPAL_CLAIM: USER_PRINCIPAL})
+
+        principal, user = await socket_manager.authenticate_socket(token)
+
+        assert principal == USER_PRINCIPAL
+        assert user["id"] == "u1"
+        assert auth.calls == ["user"]
+
+    @pytest.mark.asyncio
+    async def test_legacy_token_falls_back_to_admin(self, auth):
+        auth.user = None
+        token = await create_access_token(data={"sub": "a1"})
+        assert get_token_principal(token) is None
+
+        principal, _ = await socket_manager.authenticate_socket(token)
+
+        assert principal == ADMIN_PRINCIPAL
+        assert auth.calls == ["user", "admin"]
+
+    @pytest.mark.asyncio
+    async def test_failed_verification_refuses(self, auth):
+        auth.admin = None
+        token = await create_access_token(
+            data={"sub": "a1", PRINCIPAL_CLAIM: ADMIN_PRINCIPAL})
+
+        with pytest.raises(ConnectionRefusedError):
+            await socket_manager.authenticate_socket(token)
+        assert auth.calls == ["admin"]
+
+    def test_garbage_token_has_no_principal(self):
+        assert get_token_principal("not-a-token") is None
+
+
+class TestPrincipalCache:
+    '''Test the principal cache'''
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_one_load(self):
+        cache = PrincipalCache(ttl=30)
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            await asyncio.sleep(0.01)
+            return {"id": "u1"}
+
+        results = await asyncio.gather(
+            *(cache.get_or_load(("user", "u1"), loader) for _ in range(50)))
+
+        assert loads == 1
+        assert all(result == {"id": "u1"} for result in results)
+        assert await cache.get_or_load(("user", "u1"), loader) == {"id": "u1"}
+        assert loads == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_and_expiry_are_not_cached(self):
+        cache = PrincipalCache(ttl=0.01)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise HTTPException(status_code=404, detail="User not found")
+            return {"id": "u1"}
+
+        with pytest.raises(HTTPException):
+            await cache.get_or_load(("user", "u1"), loader)
+        await cache.get_or_load(("user", "u1"), loader)
+        await asyncio.sleep(0.02)
+        await cache.get_or_load(("user", "u1"), loader)
+
+        assert calls == 3
+
+    def test_invalidate_and_size_bound(self):
+        cache = PrincipalCache(ttl=30, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        assert cache.get("a") is None
+        cache.invalidate("b")
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+
+class TestConnectionLimits:
+    '''Test per-principal connection limits and handshake metrics'''
+
+    def test_limit_per_principal(self):
+        registry = ConnectionRegistry(max_per_principal=2)
+
+        assert registry.add("user:1", "sid-1")
+        assert registry.add("user:1", "sid-2")
+        assert not registry.add("user:1", "sid-3")
+        assert registry.add("user:2", "sid-4")
+
+        registry.remove("user:1", "sid-1")
+        assert registry.add("user:1", "sid-3")
+        registry.remove(None, "sid-unknown")
+        assert registry.total == 3
+
+    def test_metrics_snapshot(self):
+        metrics = HandshakeMetrics(samples=10)
+        for seconds in (0.001, 0.002, 0.003, 0.004):
+            metrics.observe("connect", seconds)
+        metrics.record("user_connected")
+        metrics.record("limited")
+
+        snapshot = metrics.snapshot()
+
+        assert snapshot["latency"]["connect"]["count"] == 4
+        assert snapshot["latency"]["connect"]["max_ms"] == 4.0
+        assert snapshot["latency"]["auth"]["count"] == 0
+        assert snapshot["outcomes"] == {"user_connected": 1, "limited": 1}
@@ -0,0 +1,123 @@
+'''Test cross-process socket event delivery'''
+
+import asyncio
+import json
+import os
+import sys
+import textwrap
+
+import pytest
+import pytest_asyncio
+import socketio
+from bson import ObjectId
+
+from app.config.socket_pubsub import AsyncMongoManager
+
+COLLECTION = "socketio_messages_test"
+SERVER_DIR = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Runs in a separate interpreter, like a second uvicorn worker would
+EMITTER_SCRIPT = textwrap.dedent('''
+    import asyncio
+    import sys
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.config.env_settings import settings
+    from app.config.socket_pubsub import AsyncMongoManager
+
+    async def main():
+        client = AsyncIOMotorClient(settings.MONGODB_URI)
+        manager = AsyncMongoManager(
+            client[sys.argv[1]],
+            collection=sys.argv[2],
+            write_only=True
+        )
+        await manager.emit("new-order", '{"id": "order-1"}', room="admin")
+        client.close()
+
+    asyncio.run(main())
+''')
+
+
+class RecordingMongoManager(AsyncMongoManager):
+    '''Records emits delivered to this worker instead of sending them'''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = asyncio.Queue()
+
+    async def _handle_emit(self, message):
+        await self.received.put(message)
+
+
+@pytest_asyncio.fixture(scope="function")
+async def database(db):
+    '''Clean capped collection for each test'''
+    await db.drop_collection(COLLECTION)
+    yield db
+    await db.drop_collection(COLLECTION)
+
+
+@pytest.mark.mongo_server
+class TestMongoClientManager:
+    '''Events published by one process reach the others'''
+
+    @pytest.mark.asyncio
+    async def test_emit_from_another_process(self, database):
+        '''An emit in a child process is delivered to this worker'''
+        manager = RecordingMongoManager(database, collection=COLLECTION)
+        server = socketio.AsyncServer(
+            async_mode="asgi", client_manager=manager)
+        manager.initialize()
+        # Let the listener open its tailable cursor before emitting
+        await asyncio.sleep(0.5)
+
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", EMITTER_SCRIPT, database.name, COLLECTION,
+            cwd=SERVER_DIR
+        )
+        assert await asyncio.wait_for(process.wait(), timeout=30) == 0
+
+        message = await asyncio.wait_for(manager.received.get(), timeout=10)
+        assert message["event"] == "new-order"
+        assert message["room"] == "admin"
+        assert json.loads(message["data"]) == {"id": "order-1"}
+
+        manager.thread.cancel()
+        assert server.manager is manager
+
+    @pytest.mark.asyncio
+    async def test_own_messages_are_not_redelivered(self, database):
+        '''A worker handles its own emits locally, only once'''
+        manager = RecordingMongoManager(database, collection=COLLECTION)
+        socketio.AsyncServer(async_mode="asgi", client_manager=manager)
+        manager.initialize()
+        await asyncio.sleep(0.5)
+
+        await manager.emit("order-updated", "{}", room="admin")
+        await manager.received.get()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(manager.received.get(), timeout=2)
+        manager.thread.cancel()
+
+    @pytest.mark.asyncio
+    async def test_messages_with_lower_ids_are_delivered(self, database):
+        '''Another process can insert an ObjectId lower than the last one seen'''
+        manager = RecordingMongoManager(database, collection=COLLECTION)
+        socketio.AsyncServer(async_mode="asgi", client_manager=manager)
+        manager.initialize()
+        await asyncio.sleep(0.5)
+
+        for index, object_id in enumerate(["ffffffffffffffffffffffff", "000000000000000000000001"]):
+            await database[COLLECTION].insert_one({
+                "_id": ObjectId(object_id),
+                "channel": manager.channel,
+                "message": {"method": "emit", "event": "order-updated", "data": str(index),
+                            "namespace": "/", "room": "admin", "skip_sid": None,
+                            "callback": None, "host_id": "other-worker"}
+            })
+
+        received = [await asyncio.wait_for(manager.received.get(), timeout=10) for _ in range(2)]
+        assert [message["data"] for message in received] == ["0", "1"]
+        manager.thread.cancel()
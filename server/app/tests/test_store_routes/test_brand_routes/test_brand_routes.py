@@ -2,32 +2,18 @@ import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
 from app.model.brand_models import Brand
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.config.env_settings import settings
-from app.model.user import User
 from app.crud.user_crud import create_user
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_bd():
+async def setup_bd(db):
     '''Set up database for testing'''
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[User, Brand]
-    )
-
-    await User.delete_all()
     await create_user({
         "username": "testuser",
         "email": "testuser@123.com",
@@ -35,7 +21,6 @@ async def setup_bd():
         "name": "Test User"
     })
 
-    await Brand.delete_all()
     brands = [
         Brand(title="Brand 1"),
         Brand(title="Brand 2"),
@@ -53,12 +38,8 @@ async def setup_bd():
 
     yield
 
-    await User.delete_all()
-    await Brand.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     '''Login info for user'''
     return {
@@ -93,6 +74,8 @@ class TestBrandsGet:
             return {"access_token": access_token, "refresh_token": refresh_token}
 
     @pytest.mark.asyncio
+    # The user lookup of auth and the brand page
+    @pytest.mark.query_budget("/api/brand/", max_queries=2, max_repeats=1)
     async def test_brands_get(self, login_user):
         async with AsyncClient(
             transport=ASGITransport(app=app),
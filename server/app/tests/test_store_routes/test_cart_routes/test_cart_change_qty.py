@@ -2,8 +2,6 @@
 
 import pytest
 from httpx import AsyncClient, ASGITransport
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.config.env_settings import settings
@@ -11,31 +9,15 @@ from app.main import app
 from app.model.category_model import Category
 from app.model.brand_models import Brand
 from app.model.product_models import Product
-from app.model.user import User
-from app.model.cart_models import ProductInCart
 from app.crud.user_crud import create_user
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_bd():
+async def setup_bd(db):
     '''Set up database for testing'''
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[User, Category, Brand, Product, ProductInCart]
-    )
-
-    await User.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
     await create_user({
         "username": "testuser",
         "email": "testuser@123.com",
@@ -43,7 +25,6 @@ async def setup_bd():
         "name": "Test User"
     })
 
-    await Category.delete_all()
     categories = await Category.insert_many([
         Category(title="Category 1"),
         Category(title="Category 2"),
@@ -108,14 +89,8 @@ async def setup_bd():
 
     yield
 
-    await User.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function", autouse=True)
+@pytest_asyncio.fixture(scope="function", autouse=True)
 def login_info():
     '''Login info for user'''
     return {
@@ -0,0 +1,300 @@
+'''Test cart revalidation'''
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+import pytest_asyncio
+
+from app.config.env_settings import settings
+from app.main import app
+from app.model.category_model import Category
+from app.model.brand_models import Brand
+from app.model.product_models import Product
+from app.model.cart_models import ProductInCart
+from app.crud.user_crud import create_user
+
+
+@pytest_asyncio.fixture(
+    autouse=True,
+    scope="function"
+)
+async def setup_bd(db):
+    '''Set up database for testing'''
+    await create_user({
+        "username": "testuser",
+        "email": "testuser@123.com",
+        "password": "password",
+        "name": "Test User"
+    })
+
+    categories = await Category.insert_many([
+        Category(title="Category 1"),
+        Category(title="Category 2"),
+        Category(title="Category 3"),
+        Category(title="Category 4"),
+        Category(title="Category 5"),
+        Category(title="Category 6"),
+        Category(title="Category 7"),
+    ])
+
+    categories = await Category.find().to_list()
+
+    await Brand.insert_many([
+        Brand(title="Brand1"),
+        Brand(title="Brand2"),
+        Brand(title="Brand3"),
+    ])
+    brands = await Brand.find().to_list()
+
+    products = [
+        Product(
+            title="Product1",
+            description="Description of product",
+            price=22.99,
+            category=categories[0],
+            brand=brands[0],
+            sizes=[{
+                "size": 10,
+                "stock": 10
+            },
+                {
+                "size": 11,
+                "stock": 10
+            },
+                {
+                "size": 12,
+                "stock": 13
+            },]
+        ),
+        Product(
+            title="Product2",
+            description="Description of product",
+            price=302.99,
+            category=categories[1],
+            brand=brands[1],
+            sizes=[{
+                "size": 10,
+                "stock": 10
+            },
+                {
+                "size": 11,
+                "stock": 10
+            },
+                {
+                "size": 12,
+                "stock": 13
+            },]
+        )
+    ]
+
+    await Product.insert_many(products)
+
+    yield
+
+
+@pytest_asyncio.fixture(scope="function", autouse=True)
+def login_info():
+    '''Login info for user'''
+    return {
+        "username": "testuser@123.com",
+        "password": "password"
+    }
+
+
+class TestCartRevalidate:
+    '''Test cart revalidation'''
+    @pytest_asyncio.fixture(
+        scope="function",
+        autouse=True
+    )
+    async def login_user(self, login_info):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            response = await client.post(
+                "/api/auth/login",
+                data={
+                    "username": login_info["username"],
+                    "password": login_info["password"]
+                }
+            )
+            assert response.status_code == 200
+            response_data = response.json()
+            access_token = response_data["access_token"]
+            cookies = response.cookies
+            refresh_token = cookies.get(settings.USER_REFRESH_COOKIE_NAME)
+            return {"access_token": access_token, "refresh_token": refresh_token}
+
+    @pytest.mark.asyncio
+    async def test_cart_read_refreshes_price_and_stock(self, login_user):
+        '''Stale prices and quantities are corrected in the response only'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            products = await Product.find().to_list()
+            first, second = products[0], products[1]
+
+            for product in (first, second):
+                add_res = await client.post(
+                    "/api/cart/add",
+                    headers=auth_headers,
+                    json={"product_id": str(product.id),
+                          "quantity": 5, "size": 10}
+                )
+                assert add_res.status_code == 201
+
+            first.price = 30.0
+            first.sizes = [{"size": 10, "stock": 2}]
+            await first.save()
+            second.sizes = [{"size": 11, "stock": 3}]
+            await second.save()
+
+            response = await client.get(
+                "/api/cart/",
+                follow_redirects=True,
+                headers=auth_headers
+            )
+            assert response.status_code == 200
+            assert response.json()["changes"] == []
+
+            response = await client.get(
+                "/api/cart/?revalidate=true",
+                follow_redirects=True,
+                headers=auth_headers
+            )
+            assert response.status_code == 200
+            data = response.json()
+            reasons = {change["reason"] for change in data["changes"]}
+            assert reasons == {"PRICE_CHANGED", "QUANTITY_REDUCED", "REMOVED"}
+            assert data["total_count"] == 2
+            assert data["total_price"] == 60.0
+            assert len(data["items"]) == 1
+
+            # Reading never writes, the stored cart is left as it was
+            cart_items = await ProductInCart.find().to_list()
+            assert len(cart_items) == 2
+            assert {item.quantity for item in cart_items} == {5}
+
+    @pytest.mark.asyncio
+    async def test_cart_sync_saves_corrections(self, login_user):
+        '''An explicit sync persists the corrected cart'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            product = await Product.find_one()
+            add_res = await client.post(
+                "/api/cart/add",
+                headers=auth_headers,
+                json={"product_id": str(product.id),
+                      "quantity": 5, "size": 10}
+            )
+            assert add_res.status_code == 201
+
+            product.price = 30.0
+            product.sizes = [{"size": 10, "stock": 2}]
+            await product.save()
+
+            response = await client.post(
+                "/api/cart/sync",
+                headers=auth_headers,
+                json={"operations": [
+                    {"action": "CHANGE_QUANTITY",
+                        "cart_id": add_res.json()["id"], "quantity": -1}
+                ]}
+            )
+            assert response.status_code == 200
+            reasons = {change["reason"] for change in response.json()["changes"]}
+            assert reasons == {"PRICE_CHANGED", "QUANTITY_REDUCED"}
+
+            # Reduced to the stock of 2, then changed by the operation
+            cart_item = await ProductInCart.find_one()
+            assert cart_item.price == 30.0
+            assert cart_item.quantity == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_cart_sync_saves_nothing(self, login_user):
+        '''Corrections are not saved when an operation of the sync fails'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            product = await Product.find_one()
+            add_res = await client.post(
+                "/api/cart/add",
+                headers=auth_headers,
+                json={"product_id": str(product.id),
+                      "quantity": 5, "size": 10}
+            )
+            assert add_res.status_code == 201
+
+            product.price = 30.0
+            product.sizes = [{"size": 10, "stock": 2}]
+            await product.save()
+
+            response = await client.post(
+                "/api/cart/sync",
+                headers=auth_headers,
+                json={"operations": [
+                    {"action": "CHANGE_QUANTITY",
+                        "cart_id": add_res.json()["id"], "quantity": 5}
+                ]}
+            )
+            assert response.status_code == 400
+
+            cart_item = await ProductInCart.find_one()
+            assert cart_item.price != 30.0
+            assert cart_item.quantity == 5
+
+    @pytest.mark.asyncio
+    async def test_checkout_rejects_stale_cart(self, login_user):
+        '''Checkout stops when the cart had to be corrected'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            product = await Product.find_one()
+            add_res = await client.post(
+                "/api/cart/add",
+                headers=auth_headers,
+                json={"product_id": str(product.id),
+                      "quantity": 1, "size": 10}
+            )
+            assert add_res.status_code == 201
+
+            product.price = 99.0
+            await product.save()
+
+            response = await client.post(
+                "/api/order/create-order",
+                headers=auth_headers,
+                json={"address": "Test address", "phone": "1234567890"}
+            )
+            assert response.status_code == 409
+            cart_item = await ProductInCart.find_one()
+            assert cart_item.price == 99.0
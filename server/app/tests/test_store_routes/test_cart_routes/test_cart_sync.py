@@ -0,0 +1,267 @@
+'''Test cart sync'''
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+import pytest_asyncio
+
+from app.config.env_settings import settings
+from app.main import app
+from app.model.category_model import Category
+from app.model.brand_models import Brand
+from app.model.product_models import Product
+from app.model.cart_models import ProductInCart
+from app.crud.user_crud import create_user
+
+
+@pytest_asyncio.fixture(
+    autouse=True,
+    scope="function"
+)
+async def setup_bd(db):
+    '''Set up database for testing'''
+    await create_user({
+        "username": "testuser",
+        "email": "testuser@123.com",
+        "password": "password",
+        "name": "Test User"
+    })
+
+    categories = await Category.insert_many([
+        Category(title="Category 1"),
+        Category(title="Category 2"),
+        Category(title="Category 3"),
+        Category(title="Category 4"),
+        Category(title="Category 5"),
+        Category(title="Category 6"),
+        Category(title="Category 7"),
+    ])
+
+    categories = await Category.find().to_list()
+
+    await Brand.insert_many([
+        Brand(title="Brand1"),
+        Brand(title="Brand2"),
+        Brand(title="Brand3"),
+    ])
+    brands = await Brand.find().to_list()
+
+    products = [
+        Product(
+            title="Product1",
+            description="Description of product",
+            price=22.99,
+            category=categories[0],
+            brand=brands[0],
+            sizes=[{
+                "size": 10,
+                "stock": 10
+            },
+                {
+                "size": 11,
+                "stock": 10
+            },
+                {
+                "size": 12,
+                "stock": 13
+            },]
+        ),
+        Product(
+            title="Product2",
+            description="Description of product",
+            price=302.99,
+            category=categories[1],
+            brand=brands[1],
+            sizes=[{
+                "size": 10,
+                "stock": 10
+            },
+                {
+                "size": 11,
+                "stock": 10
+            },
+                {
+                "size": 12,
+                "stock": 13
+            },]
+        )
+    ]
+
+    await Product.insert_many(products)
+
+    yield
+
+
+@pytest_asyncio.fixture(scope="function", autouse=True)
+def login_info():
+    '''Login info for user'''
+    return {
+        "username": "testuser@123.com",
+        "password": "password"
+    }
+
+
+class TestCartSync:
+    '''Test cart sync'''
+    @pytest_asyncio.fixture(
+        scope="function",
+        autouse=True
+    )
+    async def login_user(self, login_info):
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            response = await client.post(
+                "/api/auth/login",
+                data={
+                    "username": login_info["username"],
+                    "password": login_info["password"]
+                }
+            )
+            assert response.status_code == 200
+            response_data = response.json()
+            access_token = response_data["access_token"]
+            cookies = response.cookies
+            refresh_token = cookies.get(settings.USER_REFRESH_COOKIE_NAME)
+            return {"access_token": access_token, "refresh_token": refresh_token}
+
+    @pytest.mark.asyncio
+    async def test_cart_sync_success(self, login_user):
+        '''Apply add, change and remove operations in one request'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            products = await Product.find().to_list()
+            first_id, second_id = str(products[0].id), str(products[1].id)
+
+            add_res = await client.post(
+                "/api/cart/add",
+                headers=auth_headers,
+                json={"product_id": second_id, "quantity": 1, "size": 11}
+            )
+            assert add_res.status_code == 201
+            existing_cart_id = add_res.json()["id"]
+
+            response = await client.post(
+                "/api/cart/sync",
+                headers=auth_headers,
+                json={"operations": [
+                    {"action": "ADD", "product_id": first_id,
+                        "size": 10, "quantity": 2},
+                    {"action": "ADD", "product_id": first_id,
+                        "size": 10, "quantity": 1},
+                    {"action": "ADD", "product_id": first_id,
+                        "size": 12, "quantity": 1},
+                    {"action": "REMOVE", "product_id": first_id, "size": 12},
+                    {"action": "CHANGE_QUANTITY",
+                        "cart_id": existing_cart_id, "quantity": 2},
+                ]}
+            )
+            assert response.status_code == 200
+            data = response.json()
+            assert data["total_count"] == 6
+            assert data["total_price"] == round(
+                products[0].price * 3 + products[1].price * 3, 2)
+
+            cart_items = await ProductInCart.find().to_list()
+            assert len(cart_items) == 2
+            quantities = {(str(item.product_id), item.size): item.quantity
+                          for item in cart_items}
+            assert quantities == {(first_id, 10): 3, (second_id, 11): 3}
+
+    @pytest.mark.asyncio
+    async def test_cart_sync_insufficient_stock(self, login_user):
+        '''Nothing is written when any operation fails'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            products = await Product.find().to_list()
+            product_id = str(products[0].id)
+
+            response = await client.post(
+                "/api/cart/sync",
+                headers=auth_headers,
+                json={"operations": [
+                    {"action": "ADD", "product_id": product_id,
+                        "size": 11, "quantity": 1},
+                    {"action": "ADD", "product_id": product_id,
+                        "size": 10, "quantity": 11},
+                ]}
+            )
+            assert response.status_code == 400
+            assert await ProductInCart.find().count() == 0
+
+    @pytest.mark.asyncio
+    async def test_cart_sync_change_quantity_by_product(self, login_user):
+        '''A line can be addressed by product and size instead of cart id'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            product = await Product.find_one()
+            product_id = str(product.id)
+
+            response = await client.post(
+                "/api/cart/sync",
+                headers=auth_headers,
+                json={"operations": [
+                    {"action": "ADD", "product_id": product_id,
+                        "size": 10, "quantity": 1},
+                    {"action": "CHANGE_QUANTITY", "product_id": product_id,
+                        "size": 10, "quantity": 2},
+                ]}
+            )
+            assert response.status_code == 200
+            assert response.json()["total_count"] == 3
+
+            cart_item = await ProductInCart.find_one()
+            assert cart_item.quantity == 3
+
+    @pytest.mark.asyncio
+    async def test_cart_sync_invalid_operation(self, login_user):
+        '''Operations missing required fields are rejected'''
+        async with AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://test"
+        ) as client:
+            auth_headers = {
+                "Authorization": f"Bearer {login_user['access_token']}"
+            }
+            client.cookies.set(
+                settings.USER_REFRESH_COOKIE_NAME, login_user["refresh_token"]
+            )
+            response = await client.post(
+                "/api/cart/sync",
+                headers=auth_headers,
+                json={"operations": [{"action": "ADD", "size": 10}]}
+            )
+            assert response.status_code == 422
+
+            response = await client.post(
+                "/api/cart/sync",
+                headers=auth_headers,
+                json={"operations": [
+                    {"action": "CHANGE_QUANTITY", "size": 10, "quantity": 1}
+                ]}
+            )
+            assert response.status_code == 422
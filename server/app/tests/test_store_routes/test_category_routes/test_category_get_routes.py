@@ -2,34 +2,20 @@
 
 import pytest
 from httpx import AsyncClient, ASGITransport
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.config.env_settings import settings
 from app.main import app
 from app.model.category_model import Category
-from app.model.user import User
 from app.crud.user_crud import create_user
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_bd():
+async def setup_bd(db):
     '''Set up database for testing'''
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[User, Category]
-    )
-
-    await User.delete_all()
     await create_user({
         "username": "testuser",
         "email": "testuser@123.com",
@@ -37,7 +23,6 @@ async def setup_bd():
         "name": "Test User"
     })
 
-    await Category.delete_all()
     categories = [
         Category(title="Category 1"),
         Category(title="Category 2"),
@@ -51,12 +36,8 @@ async def setup_bd():
 
     yield
 
-    await User.delete_all()
-    await Category.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info():
     '''Login info for user'''
     return {
@@ -2,8 +2,6 @@
 
 import pytest
 from httpx import AsyncClient, ASGITransport
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 
 from app.config.env_settings import settings
@@ -11,30 +9,15 @@ from app.main import app
 from app.model.category_model import Category
 from app.model.brand_models import Brand
 from app.model.product_models import Product, ProductResponse
-from app.model.user import User
 from app.crud.user_crud import create_user
 
 
 @pytest_asyncio.fixture(
     autouse=True,
-    scope="function",
-    loop_scope="function"
+    scope="function"
 )
-async def setup_bd():
+async def setup_bd(db):
     '''Set up database for testing'''
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[User, Category, Brand, Product]
-    )
-
-    await User.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
     await create_user({
         "username": "testuser",
         "email": "testuser@123.com",
@@ -42,7 +25,6 @@ async def setup_bd():
         "name": "Test User"
     })
 
-    await Category.delete_all()
     categories = await Category.insert_many([
         Category(title="Category 1"),
         Category(title="Category 2"),
@@ -107,14 +89,8 @@ async def setup_bd():
 
     yield
 
-    await User.delete_all()
-    await Category.delete_all()
-    await Brand.delete_all()
-    await Product.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function", autouse=True)
+@pytest_asyncio.fixture(scope="function", autouse=True)
 def login_info():
     '''Login info for user'''
     return {
@@ -149,6 +125,8 @@ class TestProductGet:
             return {"access_token": access_token, "refresh_token": refresh_token}
 
     @pytest.mark.asyncio
+    # The user lookup of auth and one aggregation for the page and its links
+    @pytest.mark.query_budget("/api/product/", max_queries=2, max_repeats=1)
     async def test_product_get_success(self, login_user):
         async with AsyncClient(
             transport=ASGITransport(app=app),
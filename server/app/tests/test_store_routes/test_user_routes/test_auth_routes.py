@@ -2,8 +2,6 @@ import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
 from app.model.user import User
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
 import pytest_asyncio
 from beanie import PydanticObjectId
 
@@ -11,25 +9,12 @@ from app.config.env_settings import settings
 from app.crud.user_crud import create_user
 
 
-@pytest_asyncio.fixture(autouse=True, scope="function", loop_scope="function")
-async def setup_db():
-    # Setup test database
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI)
-    print(await client.server_info())
-    await init_beanie(database=client[settings.DATABASE_TESTING], document_models=[User])
-
-    # Clear users collection before each test
-    await User.delete_all()
-
+@pytest_asyncio.fixture(autouse=True, scope="function")
+async def setup_db(db):
     yield
 
-    # Cleanup after test
-    await User.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def valid_user():
     return {
         "username": "testuser",
@@ -41,7 +26,7 @@ def valid_user():
     }
 
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def duplicate_user():
     return {
         "username": "duplicateuser",
@@ -50,7 +35,7 @@ def duplicate_user():
     }
 
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def duplicate_email():
     return {
         "username": "new_username",
@@ -59,7 +44,7 @@ def duplicate_email():
     }
 
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def duplicate_username():
     return {
         "username": "duplicateuser",
@@ -1,26 +1,13 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
 from app.main import app
-from app.model.user import User, UserResponse
-from beanie import init_beanie
-from motor.motor_asyncio import AsyncIOMotorClient
+from app.model.user import UserResponse
 import pytest_asyncio
-from app.config.env_settings import settings
 from app.crud.user_crud import create_user
 
 
-@pytest_asyncio.fixture(autouse=True, scope="function", loop_scope="function")
-async def setup_db():
-    client: AsyncIOMotorClient = AsyncIOMotorClient(
-        settings.MONGODB_URI
-    )
-    print(await client.server_info())
-    await init_beanie(
-        database=client[settings.DATABASE_TESTING],
-        document_models=[User]
-    )
-
-    await User.delete_all()
+@pytest_asyncio.fixture(autouse=True, scope="function")
+async def setup_db(db):
     await create_user({
         "username": "testuser",
         "email": "testuser@123.com",
@@ -30,11 +17,8 @@ async def setup_db():
 
     yield
 
-    await User.delete_all()
-    client.close()
-
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info_username():
     return {
         "username": "testuser",
@@ -42,7 +26,7 @@ def login_info_username():
     }
 
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def login_info_email():
     return {
         "username": "testuser@123.com",
@@ -50,7 +34,7 @@ def login_info_email():
     }
 
 
-@pytest_asyncio.fixture(scope="function", loop_scope="function")
+@pytest_asyncio.fixture(scope="function")
 def update_profile_info():
     return {
         "name": "new_name",
@@ -0,0 +1,88 @@
+'''Test compression of API responses'''
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from httpx import AsyncClient, ASGITransport
+
+from app.utilities.compression import CompressionMiddleware
+
+PRODUCTS = [{"id": str(i), "title": f"Running shoe {i}", "price": 99.5} for i in range(200)]
+
+
+@pytest.fixture
+def client():
+    compressed_app = FastAPI()
+    compressed_app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @compressed_app.get("/products")
+    async def products():
+        return PRODUCTS
+
+    @compressed_app.get("/small")
+    async def small():
+        return {"detail": "ok"}
+
+    @compressed_app.get("/cached")
+    async def cached():
+        return JSONResponse(PRODUCTS, headers={"ETag": '"products-v1"'})
+
+    @compressed_app.get("/export")
+    async def export():
+        async def rows():
+            for product in PRODUCTS:
+                yield f"{product['id']},{product['title']}\n"
+        return StreamingResponse(rows(), media_type="text/csv")
+
+    @compressed_app.get("/encoded")
+    async def encoded():
+        return Response(b"x" * 1000, media_type="application/json",
+                        headers={"Content-Encoding": "identity-custom"})
+
+    transport = ASGITransport(app=compressed_app)
+    return compressed_app, AsyncClient(transport=transport, base_url="http://test")
+
+
+class TestCompressionMiddleware:
+    '''Test which responses are compressed and how'''
+
+    @pytest.mark.asyncio
+    async def test_prefers_brotli_then_gzip(self, client):
+        _, http = client
+        async with http:
+            response = await http.get("/products", headers={"Accept-Encoding": "gzip, br"})
+            assert response.headers["content-encoding"] == "br"
+            assert response.headers["vary"] == "Accept-Encoding"
+            assert int(response.headers["content-length"]) < len(response.content)
+            assert response.json() == PRODUCTS
+
+            gzipped = await http.get("/products", headers={"Accept-Encoding": "gzip"})
+            assert gzipped.headers["content-encoding"] == "gzip"
+            assert gzipped.json() == PRODUCTS
+
+            plain = await http.get("/products", headers={"Accept-Encoding": "identity"})
+            assert "content-encoding" not in plain.headers
+
+    @pytest.mark.asyncio
+    async def test_skips_small_streaming_and_encoded(self, client):
+        _, http = client
+        async with http:
+            for path in ("/small", "/export", "/encoded"):
+                response = await http.get(path, headers={"Accept-Encoding": "br"})
+                assert response.headers.get("content-encoding") in (None, "identity-custom")
+
+            export = await http.get("/export", headers={"Accept-Encoding": "br"})
+            assert export.text.count("\n") == len(PRODUCTS)
+
+    @pytest.mark.asyncio
+    async def test_reuses_compressed_body_for_same_etag(self, client):
+        compressed_app, http = client
+        async with http:
+            first = await http.get("/cached", headers={"Accept-Encoding": "br"})
+            second = await http.get("/cached", headers={"Accept-Encoding": "br"})
+
+        middleware = compressed_app.middleware_stack
+        while not isinstance(middleware, CompressionMiddleware):
+            middleware = middleware.app
+        assert middleware.cache.hits == 1
+        assert first.json() == second.json() == PRODUCTS
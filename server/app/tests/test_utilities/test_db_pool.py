@@ -0,0 +1,81 @@
+'''Test the Mongo client pool options and pool metrics'''
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference, monitoring
+
+from app.config import db
+from app.config.db import client_options
+from app.config.env_settings import settings
+from app.config.metrics import (
+    db_pool_listener,
+    pool_checked_out,
+    pool_checkout_failures,
+    pool_connections,
+    pool_wait,
+    pool_waiting
+)
+
+ADDRESS = ("pool-test", 27017)
+LABEL = "pool-test:27017"
+
+
+class TestClientOptions:
+    '''Test the options the app client is built with'''
+
+    def test_options_configure_the_client(self):
+        options = client_options(settings.model_copy(update={
+            "MONGO_MIN_POOL_SIZE": 4,
+            "MONGO_MAX_POOL_SIZE": 40,
+            "MONGO_WAIT_QUEUE_TIMEOUT_MS": 1500,
+            "MONGO_COMPRESSORS": " zlib, ",
+            "MONGO_READ_PREFERENCE": "secondaryPreferred"
+        }))
+        client = AsyncIOMotorClient("mongodb://localhost:27017", connect=False, **options)
+
+        pool = client.delegate.options.pool_options
+        assert pool.min_pool_size == 4
+        assert pool.max_pool_size == 40
+        assert pool.wait_queue_timeout == 1.5
+        assert options["compressors"] == ["zlib"]
+        assert client.read_preference == ReadPreference.SECONDARY_PREFERRED
+        client.close()
+
+
+    def test_skips_compressors_without_their_package(self, monkeypatch):
+        monkeypatch.setitem(db.COMPRESSOR_PACKAGES, "zstd", "not_installed_zstandard")
+        options = client_options(settings.model_copy(update={
+            "MONGO_COMPRESSORS": "zstd,zlib"
+        }))
+        assert options["compressors"] == ["zlib"]
+
+
+class TestPoolMetrics:
+    '''Test the pool listener gauges'''
+
+    def test_tracks_open_and_checked_out_connections(self):
+        db_pool_listener.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 1))
+        db_pool_listener.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 2))
+        db_pool_listener.connection_check_out_started(
+            monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+        assert pool_waiting.value(LABEL) == 1
+
+        db_pool_listener.connection_checked_out(
+            monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, duration=0.003))
+        assert pool_waiting.value(LABEL) == 0
+        assert pool_checked_out.value(LABEL) == 1
+        assert pool_wait.count(LABEL) == 1
+
+        db_pool_listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+        db_pool_listener.connection_closed(monitoring.ConnectionClosedEvent(ADDRESS, 2, "idle"))
+        assert pool_checked_out.value(LABEL) == 0
+        assert pool_connections.value(LABEL) == 1
+
+    def test_counts_checkout_failures(self):
+        failures = pool_checkout_failures.value(LABEL, "timeout")
+        db_pool_listener.connection_check_out_started(
+            monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+        db_pool_listener.connection_check_out_failed(
+            monitoring.ConnectionCheckOutFailedEvent(ADDRESS, "timeout", duration=2.0))
+
+        assert pool_checkout_failures.value(LABEL, "timeout") == failures + 1
+        assert pool_waiting.value(LABEL) == 0
@@ -0,0 +1,79 @@
+'''Test the image transcoding pipeline'''
+
+import io
+
+import pytest
+from PIL import Image
+
+from app.utilities.image_pipeline import (
+    InvalidImageError,
+    process_image,
+    transcode_image,
+    verify_image_bytes
+)
+
+
+def make_image(width: int, height: int, image_format: str = "JPEG", exif: bool = False) -> bytes:
+    '''Encode a solid colour image'''
+    image = Image.new("RGB", (width, height), (200, 30, 30))
+    buffer = io.BytesIO()
+    options = {}
+    if exif:
+        metadata = Image.Exif()
+        metadata[0x010F] = "Camera maker"  # Make
+        metadata[0x0112] = 6  # Orientation: rotate 90 degrees
+        options["exif"] = metadata.tobytes()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+class TestImagePipeline:
+    '''Test verification and renditions'''
+
+    def test_renditions_per_width(self):
+        '''Each width is encoded as WebP with the aspect ratio kept'''
+        processed = transcode_image(
+            make_image(2000, 1000), (320, 640, 1280), ("webp",), 80)
+
+        assert (processed.width, processed.height) == (2000, 1000)
+        assert [(r.width, r.height, r.format) for r in processed.renditions] == [
+            (320, 160, "webp"), (640, 320, "webp"), (1280, 640, "webp")
+        ]
+        with Image.open(io.BytesIO(processed.largest().data)) as encoded:
+            assert encoded.format == "WEBP"
+            assert encoded.size == (1280, 640)
+
+    def test_small_image_is_not_upscaled(self):
+        '''Widths above the source collapse into the source width'''
+        processed = transcode_image(
+            make_image(500, 500, "PNG"), (320, 640, 1280), ("webp",), 80)
+
+        assert [r.width for r in processed.renditions] == [320, 500]
+
+    def test_metadata_is_stripped_after_orientation(self):
+        '''EXIF orientation is applied, then no EXIF is written'''
+        processed = transcode_image(
+            make_image(400, 200, exif=True), (1280,), ("webp",), 80)
+
+        assert (processed.width, processed.height) == (200, 400)
+        with Image.open(io.BytesIO(processed.largest().data)) as encoded:
+            assert not encoded.getexif()
+            assert "icc_profile" not in encoded.info
+
+    def test_rejects_non_images_and_other_formats(self):
+        '''Garbage and formats outside the allow list are refused'''
+        with pytest.raises(InvalidImageError):
+            verify_image_bytes(b"not an image")
+        with pytest.raises(InvalidImageError):
+            verify_image_bytes(make_image(10, 10, "GIF"))
+        assert verify_image_bytes(make_image(10, 10, "PNG")) == "png"
+
+    @pytest.mark.asyncio
+    async def test_process_pool(self):
+        '''Transcoding runs in the worker pool and errors come back'''
+        processed = await process_image(
+            make_image(800, 600), widths=(320,), formats=("webp",))
+        assert processed.renditions[0].width == 320
+
+        with pytest.raises(InvalidImageError):
+            await process_image(b"not an image")
@@ -0,0 +1,126 @@
+'''Test structured logging and request id correlation'''
+
+import io
+import json
+import logging
+import random
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.config.logging_config import (
+    SamplingFilter,
+    configure_logging,
+    parse_levels,
+    parse_rates,
+    request_id_var,
+    stop_logging
+)
+from app.utilities.request_id import REQUEST_ID_HEADER, RequestIdMiddleware
+
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    configure_logging(level="INFO", levels="app.tests.quiet=WARNING",
+                      sample_rates="", log_format="json", stream=stream)
+    yield stream
+    # Restart with the defaults so later tests log as the app does
+    configure_logging()
+
+
+def written_records(stream: io.StringIO) -> list[dict]:
+    # Stopping the listener writes out everything still queued
+    stop_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def request_id_app():
+    test_app = FastAPI()
+    test_app.add_middleware(RequestIdMiddleware)
+
+    @test_app.get("/items")
+    async def get_items():
+        logging.getLogger("app.tests.items").info("Listing items")
+        return {"request_id": request_id_var.get()}
+
+    return test_app
+
+
+class TestLoggingConfig:
+    '''Test the queued JSON logger'''
+
+    def test_parse_settings(self):
+        assert parse_levels("app.routes=debug, app.crud=WARNING,bad") == {
+            "app.routes": logging.DEBUG, "app.crud": logging.WARNING}
+        assert parse_rates("app.config.socket_manager=0.1") == {"app.config.socket_manager": 0.1}
+
+    def test_json_record_with_extra_fields(self, log_stream):
+        token = request_id_var.set("abc123")
+        try:
+            logging.getLogger("app.tests.json").warning(
+                "Slow query in %s", "/api/product/", extra={"count": 7})
+        finally:
+            request_id_var.reset(token)
+
+        [record] = written_records(log_stream)
+        assert record["message"] == "Slow query in /api/product/"
+        assert record["level"] == "WARNING"
+        assert record["logger"] == "app.tests.json"
+        assert record["request_id"] == "abc123"
+        assert record["count"] == 7
+
+    def test_exception_is_formatted(self, log_stream):
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            logging.getLogger("app.tests.errors").exception("Failed")
+
+        [record] = written_records(log_stream)
+        assert "ValueError: bad value" in record["exception"]
+
+    def test_per_module_levels(self, log_stream):
+        logging.getLogger("app.tests.quiet").info("Dropped")
+        logging.getLogger("app.tests.quiet.child").warning("Kept")
+        logging.getLogger("app.tests.loud").info("Kept too")
+
+        assert [record["message"] for record in written_records(log_stream)] == [
+            "Kept", "Kept too"]
+
+    def test_sampling_keeps_warnings(self):
+        sampler = SamplingFilter({"app.noisy": 0.25}, rng=random.Random(7))
+
+        def record(name: str, level: int) -> logging.LogRecord:
+            return logging.makeLogRecord({"name": name, "levelno": level})
+
+        kept = sum(sampler.filter(record("app.noisy.child", logging.INFO)) for _ in range(1000))
+        assert 200 < kept < 300
+        assert all(sampler.filter(record("app.noisy", logging.WARNING)) for _ in range(100))
+        assert all(sampler.filter(record("app.other", logging.INFO)) for _ in range(100))
+
+
+class TestRequestIdMiddleware:
+    '''Test request id correlation'''
+
+    @pytest.mark.asyncio
+    async def test_generated_id_tags_records(self, request_id_app, log_stream):
+        async with AsyncClient(transport=ASGITransport(app=request_id_app), base_url="http://test") as ac:
+            response = await ac.get("/items")
+
+        request_id = response.headers[REQUEST_ID_HEADER]
+        assert len(request_id) == 32
+        assert response.json()["request_id"] == request_id
+        [record] = written_records(log_stream)
+        assert record["request_id"] == request_id
+        assert request_id_var.get() is None
+
+    @pytest.mark.asyncio
+    async def test_proxy_id_is_reused(self, request_id_app):
+        async with AsyncClient(transport=ASGITransport(app=request_id_app), base_url="http://test") as ac:
+            response = await ac.get("/items", headers={REQUEST_ID_HEADER: "edge-42"})
+            invalid = await ac.get("/items", headers={REQUEST_ID_HEADER: "bad id\"}"})
+
+        assert response.headers[REQUEST_ID_HEADER] == "edge-42"
+        assert invalid.headers[REQUEST_ID_HEADER] != "bad id\"}"
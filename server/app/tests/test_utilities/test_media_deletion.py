@@ -0,0 +1,93 @@
+'''Test the batched media deletion worker'''
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from app.model.media_models import MediaDeletion
+from app.utilities.media_deletion import MediaDeletionWorker, retry_delay
+from app.utilities.media_storage import MediaStorage, MediaStorageError
+
+
+class RecordingStorage(MediaStorage):
+    '''Keeps the batches it was asked to delete'''
+    name = "recording"
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    async def save(self, data, folder, extension):
+        raise NotImplementedError
+
+    async def delete(self, public_id):
+        return True
+
+    async def delete_many(self, public_ids):
+        self.batches.append(list(public_ids))
+        if self.fail:
+            raise MediaStorageError("provider unavailable")
+        return list(public_ids)
+
+
+@pytest_asyncio.fixture(
+    autouse=True,
+    scope="function"
+)
+async def setup_bd(db):
+    '''Set up database for testing'''
+    yield
+
+
+class TestMediaDeletionWorker:
+    '''Test queueing, batching and retrying deletes'''
+
+    @pytest.mark.asyncio
+    async def test_enqueue_skips_duplicates(self):
+        worker = MediaDeletionWorker(RecordingStorage(), calls_per_minute=0)
+
+        assert await worker.enqueue(["a", "b", "a", ""]) == 2
+        assert await worker.enqueue(["b", "c"]) == 1
+        assert await MediaDeletion.count() == 3
+
+    @pytest.mark.asyncio
+    async def test_deletes_in_batches(self):
+        storage = RecordingStorage()
+        worker = MediaDeletionWorker(storage, calls_per_minute=0)
+        await worker.enqueue(f"products/{i}" for i in range(250))
+
+        while await worker.drain_once():
+            pass
+
+        assert [len(batch) for batch in storage.batches] == [100, 100, 50]
+        assert worker.calls == 3
+        assert await MediaDeletion.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_are_retried_then_given_up(self):
+        storage = RecordingStorage(fail=True)
+        worker = MediaDeletionWorker(storage, calls_per_minute=0, max_attempts=2)
+        await worker.enqueue(["a"])
+
+        assert await worker.drain_once() == 1
+        entry = await MediaDeletion.find_one(MediaDeletion.public_id == "a")
+        assert entry.attempts == 1
+        assert entry.failed is False
+        assert entry.last_error == "provider unavailable"
+        # Not due again until the backoff has passed
+        assert await worker.drain_once() == 0
+
+        await MediaDeletion.get_motor_collection().update_many(
+            {}, {"$set": {"next_attempt_at": datetime.now(timezone.utc)}})
+        assert await worker.drain_once() == 1
+        entry = await MediaDeletion.find_one(MediaDeletion.public_id == "a")
+        assert entry.attempts == 2
+        assert entry.failed is True
+        assert len(storage.batches) == 2
+
+
+def test_retry_delay_grows_and_is_capped():
+    assert retry_delay(1) == timedelta(seconds=30)
+    assert retry_delay(2) == timedelta(seconds=60)
+    assert retry_delay(20) == timedelta(hours=1)
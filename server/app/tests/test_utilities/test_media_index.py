@@ -0,0 +1,152 @@
+'''Test the reference-counted media content index'''
+
+import io
+
+import pytest
+import pytest_asyncio
+from fastapi import UploadFile
+from PIL import Image as PILImage
+
+from app.admin_app.admin_crud_operations import product_crud
+from app.model.media_models import MediaAsset, MediaDeletion
+from app.model.brand_models import Brand
+from app.model.category_model import Category
+from app.model.product_models import Image, ImageRendition, Product
+from app.utilities import media_utils
+from app.utilities.media_storage import LocalStorage
+from app.utilities.media_index import (
+    acquire_media,
+    content_hash,
+    content_hash_sync,
+    register_media,
+    release_media
+)
+
+
+def make_image(name: str) -> Image:
+    return Image(
+        url=f"https://media.test/{name}-1280.webp",
+        public_id=f"{name}-1280",
+        width=1280,
+        height=960,
+        renditions=[
+            ImageRendition(width=640, height=480, format="webp",
+                           url=f"https://media.test/{name}-640.webp",
+                           public_id=f"{name}-640")
+        ]
+    )
+
+
+def jpeg_bytes(colour: tuple[int, int, int]) -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (800, 600), colour).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+async def queued_ids() -> set[str]:
+    return {entry.public_id for entry in await MediaDeletion.find_all().to_list()}
+
+
+@pytest_asyncio.fixture(
+    autouse=True,
+    scope="function"
+)
+async def setup_bd(db):
+    '''Set up database for testing'''
+    yield
+
+
+class TestMediaIndex:
+    '''Test sharing stored images between uploads'''
+
+    @pytest.mark.asyncio
+    async def test_duplicate_upload_reuses_stored_image(self):
+        key = await content_hash(b"shoe-shot", "product")
+        assert await acquire_media(key) is None
+
+        image = await register_media(key, make_image("shoe"))
+        reused = await acquire_media(key)
+
+        assert reused == image
+        asset = await MediaAsset.find_one(MediaAsset.content_hash == key)
+        assert asset.ref_count == 2
+
+    @pytest.mark.asyncio
+    async def test_files_deleted_when_last_reference_released(self):
+        key = await content_hash(b"shoe-shot", "product")
+        image = await register_media(key, make_image("shoe"))
+        await acquire_media(key)
+
+        await release_media([image])
+        assert await queued_ids() == set()
+
+        await release_media([image])
+        assert await queued_ids() == {"shoe-1280", "shoe-640"}
+        assert await MediaAsset.count() == 0
+        # A released asset is uploaded again rather than reused
+        assert await acquire_media(key) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicate_keeps_first_copy(self):
+        key = await content_hash(b"shoe-shot", "product")
+        first = await register_media(key, make_image("first"))
+        second = await register_media(key, make_image("second"))
+
+        assert second == first
+        assert await queued_ids() == {"second-1280", "second-640"}
+
+    @pytest.mark.asyncio
+    async def test_unindexed_images_are_deleted_directly(self):
+        await release_media([make_image("legacy"), "users/avatar"])
+
+        assert await queued_ids() == {"legacy-1280", "legacy-640", "users/avatar"}
+
+    @pytest.mark.asyncio
+    async def test_primary_rendition_uses_first_output_format(self, monkeypatch, tmp_path):
+        '''Without WebP among the output formats the first one is the primary'''
+        monkeypatch.setattr(media_utils, "output_formats", lambda: ("png",))
+        monkeypatch.setattr(media_utils, "rendition_widths", lambda: (320, 640))
+        monkeypatch.setattr(media_utils, "media_storage", LocalStorage(str(tmp_path), "/media"))
+        image = await media_utils.upload_image_renditions(jpeg_bytes((200, 30, 30)), "products")
+
+        assert image.width == 640
+        assert image.public_id.endswith(".png")
+        assert {rendition.format for rendition in image.renditions} == {"png"}
+
+    @pytest.mark.asyncio
+    async def test_failed_product_upload_releases_other_images(self, monkeypatch):
+        '''References taken by the uploads that succeeded are given back'''
+        product = await Product(
+            title="Product1",
+            price=50,
+            brand=await Brand(title="Brand1").insert(),
+            category=await Category(title="Category 1").insert()
+        ).insert()
+        key = await content_hash(b"shoe-shot", "product")
+        broken = jpeg_bytes((0, 0, 0))
+
+        async def upload(image_path, folder):
+            with open(image_path, "rb") as upload_file:
+                if upload_file.read() == broken:
+                    raise ValueError("Invalid image")
+            return await register_media(key, make_image("shoe"))
+
+        monkeypatch.setattr(product_crud, "upload_image_renditions", upload)
+        with pytest.raises(ValueError):
+            await product_crud.add_images_product(str(product.id), [
+                UploadFile(io.BytesIO(jpeg_bytes((200, 30, 30))), filename="shoe.jpg"),
+                UploadFile(io.BytesIO(broken), filename="broken.jpg")
+            ])
+
+        assert await MediaAsset.count() == 0
+        assert await queued_ids() == {"shoe-1280", "shoe-640"}
+        assert (await Product.get(product.id)).images == []
+
+
+def test_content_hash_depends_on_bytes_and_variant(tmp_path):
+    path = tmp_path / "upload"
+    path.write_bytes(b"shoe-shot")
+
+    assert content_hash_sync(str(path), "product") == content_hash_sync(b"shoe-shot", "product")
+    assert content_hash_sync(b"shoe-shot", "profile") != content_hash_sync(b"shoe-shot", "product")
+    assert content_hash_sync(b"other-shot", "product") != content_hash_sync(b"shoe-shot", "product")
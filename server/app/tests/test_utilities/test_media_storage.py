@@ -0,0 +1,62 @@
+'''Test the local media storage backend'''
+
+import os
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.utilities.media_storage import (
+    IMMUTABLE_CACHE_CONTROL,
+    LocalStorage,
+    MediaFiles,
+    MediaStorageError
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path), "/media")
+
+
+class TestLocalStorage:
+    '''Test saving, serving and deleting files on disk'''
+
+    @pytest.mark.asyncio
+    async def test_save_and_delete(self, storage):
+        stored = await storage.save(b"image-bytes", "products", "webp")
+
+        assert stored.public_id.startswith("products/")
+        assert stored.public_id.endswith(".webp")
+        assert stored.url == f"/media/{stored.public_id}"
+        with open(storage.path(stored.public_id), "rb") as file:
+            assert file.read() == b"image-bytes"
+
+        assert await storage.delete(stored.public_id) is True
+        assert not os.path.exists(storage.path(stored.public_id))
+        assert await storage.delete(stored.public_id) is False
+
+    @pytest.mark.asyncio
+    async def test_rejects_paths_outside_root(self, storage):
+        with pytest.raises(MediaStorageError):
+            await storage.delete("../outside.webp")
+
+    @pytest.mark.asyncio
+    async def test_served_with_ranges_and_cache_headers(self, storage):
+        stored = await storage.save(b"0123456789", "users", "webp")
+        media_app = FastAPI()
+        media_app.mount("/media", MediaFiles(directory=storage.root))
+
+        async with AsyncClient(transport=ASGITransport(app=media_app), base_url="http://test") as client:
+            response = await client.get(stored.url)
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+            assert "etag" in response.headers
+
+            partial = await client.get(stored.url, headers={"Range": "bytes=2-5"})
+            assert partial.status_code == 206
+            assert partial.content == b"2345"
+
+            cached = await client.get(
+                stored.url, headers={"If-None-Match": response.headers["etag"]})
+            assert cached.status_code == 304
@@ -0,0 +1,116 @@
+'''Test request metrics and the /metrics route'''
+
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.main import app
+from app.config.env_settings import settings
+from app.config.metrics import (
+    MetricsRegistry,
+    db_command_listener,
+    http_in_flight,
+    http_requests
+)
+from app.utilities.metrics_middleware import DB_ROUNDTRIPS_HEADER, MetricsMiddleware
+
+
+def finished_command(name: str, micros: int = 1500):
+    return SimpleNamespace(command_name=name, duration_micros=micros)
+
+
+@pytest.fixture
+def metrics_app():
+    test_app = FastAPI()
+    test_app.add_middleware(MetricsMiddleware)
+
+    @test_app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        # What the listener sees when a handler runs one query per link
+        for _ in range(3):
+            db_command_listener.succeeded(finished_command("find"))
+        return {"id": item_id}
+
+    return test_app
+
+
+class TestMetricsRegistry:
+    '''Test the Prometheus text output'''
+
+    def test_renders_counters_and_cumulative_histograms(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests", ("route",))
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        requests.inc("/a")
+        requests.inc("/a")
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+
+        text = registry.render()
+
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{route="/a"} 2' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1.0"} 2' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+        assert 'latency_seconds_count 3' in text
+
+    def test_rejects_duplicate_names(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests")
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "Requests")
+
+
+class TestMetricsMiddleware:
+    '''Test per-route metrics and the round trip header'''
+
+    @pytest.mark.asyncio
+    async def test_counts_by_route_template_and_db_roundtrips(self, metrics_app):
+        before = http_requests.value("GET", "/items/{item_id}", "200")
+
+        async with AsyncClient(transport=ASGITransport(app=metrics_app), base_url="http://test") as client:
+            first = await client.get("/items/1")
+            await client.get("/items/2")
+            missing = await client.get("/nowhere")
+
+        assert first.headers[DB_ROUNDTRIPS_HEADER] == "3"
+        assert missing.headers[DB_ROUNDTRIPS_HEADER] == "0"
+        assert http_requests.value("GET", "/items/{item_id}", "200") == before + 2
+        assert http_requests.value("GET", "<unmatched>", "404") >= 1
+        assert http_in_flight.value("GET") == 0
+
+    @pytest.mark.asyncio
+    async def test_metrics_route(self):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "socketio_connections_open 0" in response.text
+
+    @pytest.mark.asyncio
+    async def test_metrics_route_requires_the_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            missing = await client.get("/metrics")
+            wrong = await client.get("/metrics", headers={"Authorization": "Bearer nope"})
+            allowed = await client.get(
+                "/metrics", headers={"Authorization": "Bearer scrape-token"})
+
+        assert missing.status_code == 401
+        assert wrong.status_code == 401
+        assert allowed.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_metrics_route_hidden_in_production_without_a_token(self, monkeypatch):
+        monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+        monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/metrics")
+
+        assert response.status_code == 404
@@ -0,0 +1,109 @@
+'''Test repeated query detection and query budgets'''
+
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from httpx import AsyncClient, ASGITransport
+
+from app.config.metrics import db_command_listener, repeated_queries
+from app.utilities.metrics_middleware import DB_REPEATED_HEADER, MetricsMiddleware
+from app.utilities.query_detector import (
+    QueryBudgetExceeded,
+    QueryRecorder,
+    RequestQueries,
+    command_shape,
+    find_repeated
+)
+
+
+def run_command(name: str, command: dict):
+    '''Feed the listener what PyMongo reports for one command'''
+    db_command_listener.started(SimpleNamespace(command_name=name, command=command))
+    db_command_listener.succeeded(SimpleNamespace(command_name=name, duration_micros=800))
+
+
+@pytest.fixture
+def detector_app():
+    test_app = FastAPI()
+    test_app.add_middleware(
+        MetricsMiddleware, detect_repeated_queries=True, repeated_query_threshold=3)
+
+    @test_app.get("/products")
+    async def products():
+        run_command("find", {"find": "products", "filter": {}, "limit": 15})
+        # One brand lookup per product, like fetch_all_links
+        for _ in range(4):
+            run_command("find", {"find": "brands", "filter": {"_id": ObjectId()}, "limit": 1})
+        return []
+
+    return test_app
+
+
+class TestCommandShape:
+    '''Test which commands count as the same query'''
+
+    def test_values_are_ignored(self):
+        first = command_shape("find", {"find": "brands", "filter": {"_id": ObjectId()}})
+        second = command_shape("find", {"find": "brands", "filter": {"_id": ObjectId()}})
+        batched = command_shape("find", {"find": "brands", "filter": {"_id": {"$in": [1, 2, 3]}}})
+        single = command_shape("find", {"find": "brands", "filter": {"_id": {"$in": [1]}}})
+
+        assert first == second
+        assert batched == single
+        assert first != batched
+
+    def test_collection_and_command_matter(self):
+        brands = command_shape("find", {"find": "brands", "filter": {}})
+        categories = command_shape("find", {"find": "categories", "filter": {}})
+        count = command_shape("count", {"count": "brands", "query": {}})
+
+        assert len({brands, categories, count}) == 3
+
+    def test_non_queries_have_no_shape(self):
+        assert command_shape("getMore", {"getMore": 1, "collection": "brands"}) is None
+        assert command_shape("endSessions", {"endSessions": []}) is None
+
+    def test_find_repeated(self):
+        shapes = Counter({"a": 5, "b": 2})
+        assert find_repeated(shapes, 3) == {"a": 5}
+
+
+class TestQueryBudget:
+    '''Test budgets and the middleware detector'''
+
+    def test_assert_budget(self):
+        recorder = QueryRecorder()
+        recorder.requests.append(RequestQueries(
+            method="GET", route="/products", status=200, commands=6,
+            shapes=Counter({"find brands {}": 4})))
+
+        recorder.assert_budget("/products", max_queries=6, max_repeats=4)
+        with pytest.raises(QueryBudgetExceeded):
+            recorder.assert_budget("/products", max_queries=5)
+        with pytest.raises(QueryBudgetExceeded):
+            recorder.assert_budget("/products", max_queries=10, max_repeats=2)
+        with pytest.raises(QueryBudgetExceeded):
+            recorder.assert_budget("/orders", max_queries=10)
+
+    @pytest.mark.asyncio
+    async def test_middleware_flags_and_records_repeated_queries(self, detector_app, query_recorder):
+        before = repeated_queries.value("GET", "/products")
+
+        async with AsyncClient(transport=ASGITransport(app=detector_app), base_url="http://test") as client:
+            response = await client.get("/products")
+
+        assert response.headers[DB_REPEATED_HEADER] == "4"
+        assert repeated_queries.value("GET", "/products") == before + 1
+        [request] = query_recorder.for_route("/products")
+        assert request.commands == 5
+        with pytest.raises(QueryBudgetExceeded):
+            query_recorder.assert_budget("/products", max_queries=5, max_repeats=1)
+
+    @pytest.mark.asyncio
+    @pytest.mark.query_budget("/products", max_queries=5)
+    async def test_marker_allows_requests_within_budget(self, detector_app):
+        async with AsyncClient(transport=ASGITransport(app=detector_app), base_url="http://test") as client:
+            await client.get("/products")
@@ -0,0 +1,120 @@
+'''Test serving the built React apps'''
+
+import gzip
+import os
+
+import brotli
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient, ASGITransport
+
+from app.utilities.static_files import (
+    IMMUTABLE_CACHE_CONTROL,
+    PrecompressedStaticFiles,
+    SpaShell,
+    precompress_directory,
+    rewrite_admin_asset_paths
+)
+
+INDEX_HTML = '<html><script src="/assets/index-C0ffee12.js"></script></html>'
+SCRIPT = b"console.log('solestore');" * 100
+
+
+@pytest.fixture
+def build_dir(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    (tmp_path / "index.html").write_text(INDEX_HTML, encoding="utf-8")
+    (assets / "index-C0ffee12.js").write_bytes(SCRIPT)
+    (assets / "logo.svg").write_bytes(b"<svg/>")
+    return tmp_path
+
+
+def make_app(build_dir) -> tuple[FastAPI, SpaShell]:
+    shell = SpaShell(str(build_dir / "index.html"), rewrite=rewrite_admin_asset_paths)
+    static_app = FastAPI()
+    static_app.mount("/assets", PrecompressedStaticFiles(directory=str(build_dir / "assets")))
+
+    @static_app.get("/{full_path:path}")
+    async def serve(full_path: str, request: Request):
+        return shell.response(request.headers)
+
+    return static_app, shell
+
+
+class TestSpaShell:
+    '''Test the cached index.html'''
+
+    @pytest.mark.asyncio
+    async def test_served_compressed_with_etag(self, build_dir):
+        static_app, _ = make_app(build_dir)
+
+        async with AsyncClient(transport=ASGITransport(app=static_app), base_url="http://test") as client:
+            response = await client.get("/admin/orders", headers={"Accept-Encoding": "br, gzip"})
+            assert response.status_code == 200
+            assert response.headers["content-encoding"] == "br"
+            assert response.headers["cache-control"] == "no-cache"
+            assert 'src="/admin-assets/index-C0ffee12.js"' in response.text
+
+            gzipped = await client.get("/", headers={"Accept-Encoding": "gzip, br;q=0"})
+            assert gzipped.headers["content-encoding"] == "gzip"
+            assert gzipped.headers["etag"] == response.headers["etag"]
+
+            cached = await client.get(
+                "/", headers={"If-None-Match": response.headers["etag"]})
+            assert cached.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_reloaded_when_file_changes(self, build_dir):
+        static_app, shell = make_app(build_dir)
+        index = build_dir / "index.html"
+
+        async with AsyncClient(transport=ASGITransport(app=static_app), base_url="http://test") as client:
+            first = await client.get("/", headers={"Accept-Encoding": "identity"})
+            index.write_text("<html>new build</html>", encoding="utf-8")
+            stat = index.stat()
+            os.utime(index, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            second = await client.get("/", headers={"Accept-Encoding": "identity"})
+
+        assert first.text != second.text
+        assert second.text == "<html>new build</html>"
+        assert second.headers["etag"] != first.headers["etag"]
+
+    def test_missing_build(self, tmp_path):
+        assert SpaShell(str(tmp_path / "index.html")).available is False
+
+
+class TestPrecompressedStaticFiles:
+    '''Test hashed assets and their .br/.gz files'''
+
+    @pytest.mark.asyncio
+    async def test_serves_sidecars_for_hashed_assets(self, build_dir):
+        assert precompress_directory(str(build_dir)) == 1
+        assert not (build_dir / "assets" / "logo.svg.br").exists()
+        static_app, _ = make_app(build_dir)
+
+        async with AsyncClient(transport=ASGITransport(app=static_app), base_url="http://test") as client:
+            response = await client.get(
+                "/assets/index-C0ffee12.js", headers={"Accept-Encoding": "br"})
+            assert response.status_code == 200
+            assert response.headers["content-encoding"] == "br"
+            assert response.headers["content-type"].startswith("text/javascript")
+            assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+            assert response.headers["vary"] == "Accept-Encoding"
+            assert brotli.decompress(
+                (build_dir / "assets" / "index-C0ffee12.js.br").read_bytes()) == SCRIPT
+
+            gzipped = await client.get(
+                "/assets/index-C0ffee12.js", headers={"Accept-Encoding": "gzip"})
+            assert gzipped.headers["content-encoding"] == "gzip"
+            assert gzip.decompress(
+                (build_dir / "assets" / "index-C0ffee12.js.gz").read_bytes()) == SCRIPT
+
+            plain = await client.get(
+                "/assets/index-C0ffee12.js", headers={"Accept-Encoding": "identity"})
+            assert "content-encoding" not in plain.headers
+            assert plain.content == SCRIPT
+
+            unhashed = await client.get("/assets/logo.svg")
+            assert unhashed.status_code == 200
+            assert unhashed.headers.get("cache-control") != IMMUTABLE_CACHE_CONTROL
@@ -0,0 +1,99 @@
+'''Test streamed upload spooling and size limits'''
+
+import io
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, UploadFile
+from httpx import AsyncClient, ASGITransport
+from PIL import Image
+
+from app.utilities.upload_utils import (
+    UploadSizeLimitMiddleware,
+    sniff_image_type,
+    spool_image_upload
+)
+
+
+def png_bytes(width: int = 20, height: int = 20) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="image.png")
+
+
+limited_app = FastAPI()
+limited_app.add_middleware(UploadSizeLimitMiddleware, max_bytes=1024)
+
+
+@limited_app.post("/upload")
+async def upload_route(file: UploadFile):
+    return {"size": len(await file.read())}
+
+
+class TestSpoolImageUpload:
+    '''Test spooling uploads to disk'''
+
+    def test_sniff_image_type(self):
+        assert sniff_image_type(png_bytes()) == "png"
+        assert sniff_image_type(b"\xff\xd8\xff\xe0rest") == "jpeg"
+        assert sniff_image_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "webp"
+        assert sniff_image_type(b"GIF89a") is None
+
+    @pytest.mark.asyncio
+    async def test_spooled_to_disk_and_removed(self):
+        data = png_bytes()
+        async with spool_image_upload(upload(data)) as path:
+            with open(path, "rb") as spooled:
+                assert spooled.read() == data
+        assert not os.path.exists(path)
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_image_header(self):
+        with pytest.raises(HTTPException) as error:
+            async with spool_image_upload(upload(b"<html>not an image</html>")):
+                pass
+        assert error.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_file(self):
+        with pytest.raises(HTTPException) as error:
+            async with spool_image_upload(upload(png_bytes(400, 400)), max_bytes=100):
+                pass
+        assert error.value.status_code == 413
+
+
+class TestUploadSizeLimitMiddleware:
+    '''Test the request body limit'''
+
+    @pytest.mark.asyncio
+    async def test_small_upload_passes(self):
+        async with AsyncClient(transport=ASGITransport(app=limited_app), base_url="http://test") as client:
+            response = await client.post("/upload", files={"file": ("a.png", b"x" * 100)})
+        assert response.status_code == 200
+        assert response.json() == {"size": 100}
+
+    @pytest.mark.asyncio
+    async def test_declared_length_over_limit(self):
+        async with AsyncClient(transport=ASGITransport(app=limited_app), base_url="http://test") as client:
+            response = await client.post("/upload", files={"file": ("a.png", b"x" * 4096)})
+        assert response.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_streamed_body_over_limit(self):
+        async def body():
+            yield b"--boundary\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n\r\n"
+            for _ in range(10):
+                yield b"x" * 512
+            yield b"\r\n--boundary--\r\n"
+
+        async with AsyncClient(transport=ASGITransport(app=limited_app), base_url="http://test") as client:
+            response = await client.post(
+                "/upload",
+                content=body(),
+                headers={"content-type": "multipart/form-data; boundary=boundary"}
+            )
+        assert response.status_code == 413
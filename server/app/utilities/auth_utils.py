@@ -8,9 +8,16 @@ from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
 from typing import Annotated
 from fastapi import HTTPException, status, Depends, Request, Response
 from app.crud.user_crud import get_user_details, refresh_token_is_saved
+from app.utilities.principal_cache import principal_cache
 
 settings = get_settings()
 
+# Access tokens say whether they belong to a user or an admin so socket
+# connections can go straight to the right lookup
+PRINCIPAL_CLAIM = "principal"
+USER_PRINCIPAL = "user"
+ADMIN_PRINCIPAL = "admin"
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
@@ -91,6 +98,19 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], reques
         await invalidate_token()
 
 
+def get_token_principal(token: str) -> str | None:
+    '''Read the principal claim without verifying the token.
+
+    Only used to pick which verification to run, the chosen one checks the
+    signature and expiry.
+    '''
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False})
+    except InvalidTokenError:
+        return None
+    return payload.get(PRINCIPAL_CLAIM)
+
+
 async def get_current_user_ws(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -106,10 +126,11 @@ async def get_current_user_ws(token: str):
             algorithms=[settings.ALGORITHM]
         )
         user_id: str = payload.get("sub")
-        if not user_id:
+        if not user_id or payload.get(PRINCIPAL_CLAIM, USER_PRINCIPAL) != USER_PRINCIPAL:
             await invalidate_token()
 
-        user = await get_user_details(user_id)
+        user = await principal_cache.get_or_load(
+            (USER_PRINCIPAL, user_id), lambda: get_user_details(user_id))
         if not user:
             await invalidate_token()
         return user
@@ -0,0 +1,151 @@
+'''Brotli and gzip compression of API responses'''
+
+import gzip
+from collections import OrderedDict
+from typing import Optional
+
+import brotli
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utilities.static_files import accepted_encodings
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/"
+)
+# Bodies larger than this are compressed on a worker thread
+THREADPOOL_THRESHOLD = 64 * 1024
+NOT_COMPRESSED_STATUSES = {204, 206, 304}
+
+
+def compress_body(body: bytes, encoding: str, brotli_quality: int, gzip_level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality, mode=brotli.MODE_TEXT)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressedBodyCache:
+    '''Compressed bodies of responses that carry an ETag, least recently used first out'''
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self._entries: OrderedDict[tuple[str, str, str], bytes] = OrderedDict()
+
+    def get(self, key: tuple[str, str, str]) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return body
+
+    def set(self, key: tuple[str, str, str], body: bytes):
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class CompressionMiddleware:
+    '''Compress complete responses with brotli or gzip, whichever the client prefers.
+
+    Only single-message bodies are compressed: streaming responses such as
+    the order export pass through untouched, as do bodies that are already
+    encoded, partial content, non-text types and anything under
+    `minimum_size`. A response with an ETag is the same bytes every time,
+    so its compressed body is kept and reused when it is served again.
+    '''
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            minimum_size: int = 1024,
+            brotli_quality: int = 4,
+            gzip_level: int = 6,
+            cache_entries: int = 256
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        self.cache = CompressedBodyCache(cache_entries)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope))
+        encoding = next(
+            (encoding for encoding in ("br", "gzip") if encoding in accepted), None)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def compressing_send(message: Message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start, body):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            compressed = await self._compress(scope, body, encoding, headers.get("etag"))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
+
+    def _should_compress(self, start: Message, body: bytes) -> bool:
+        if len(body) < self.minimum_size or start["status"] in NOT_COMPRESSED_STATUSES:
+            return False
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", ""):
+            return False
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    async def _compress(self, scope: Scope, body: bytes, encoding: str, etag: Optional[str]) -> bytes:
+        key = None
+        if etag:
+            # File ETags are only unique per path
+            target = scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+            key = (target, etag, encoding)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        args = (body, encoding, self.brotli_quality, self.gzip_level)
+        if len(body) > THREADPOOL_THRESHOLD:
+            compressed = await run_in_threadpool(compress_body, *args)
+        else:
+            compressed = compress_body(*args)
+        if key is not None:
+            self.cache.set(key, compressed)
+        return compressed
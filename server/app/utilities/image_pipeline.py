@@ -0,0 +1,185 @@
+'''Image validation and transcoding in a process pool
+
+Pillow is imported by the functions that use it, on the first upload or
+in the worker processes, rather than when the app starts.
+'''
+
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+from app.config.env_settings import settings
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+ALLOWED_SOURCE_FORMATS = {"jpeg", "png", "webp"}
+# Refuse decompression bombs before decoding them
+MAX_IMAGE_PIXELS = 40_000_000
+
+
+class InvalidImageError(ValueError):
+    '''Uploaded bytes are not an allowed, decodable image'''
+
+
+@dataclass
+class Rendition:
+    width: int
+    height: int
+    format: str
+    data: bytes
+
+
+@dataclass
+class ProcessedImage:
+    '''Dimensions of the source and its re-encoded renditions'''
+    width: int
+    height: int
+    source_format: str
+    renditions: list[Rendition] = field(default_factory=list)
+
+    def largest(self, image_format: Optional[str] = None) -> Rendition:
+        candidates = [rendition for rendition in self.renditions
+                      if image_format is None or rendition.format == image_format]
+        return max(candidates, key=lambda rendition: rendition.width)
+
+
+def _parse_list(value: str) -> list[str]:
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+
+def rendition_widths() -> tuple[int, ...]:
+    return tuple(sorted(int(width) for width in _parse_list(settings.IMAGE_RENDITION_WIDTHS)))
+
+
+def output_formats() -> tuple[str, ...]:
+    '''Configured output formats this Pillow build can encode, in order.
+    WebP when none of them can be.'''
+    from PIL import features
+    formats = [image_format for image_format in _parse_list(settings.IMAGE_OUTPUT_FORMATS)
+               if image_format != "avif" or features.check("avif")]
+    return tuple(formats) or ("webp",)
+
+
+def _source(data: bytes | str):
+    # Spooled uploads are passed by path so the worker reads them from disk
+    return data if isinstance(data, str) else io.BytesIO(data)
+
+
+def _open_verified(data: bytes | str) -> "Image.Image":
+    from PIL import Image, UnidentifiedImageError
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    try:
+        with Image.open(_source(data)) as probe:
+            source_format = (probe.format or "").lower()
+            if source_format not in ALLOWED_SOURCE_FORMATS:
+                raise InvalidImageError(
+                    f"Unsupported image format: {source_format or 'unknown'}")
+            # verify() checks the file structure but leaves the image unusable
+            probe.verify()
+        image = Image.open(_source(data))
+        image.load()
+        return image
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidImageError(str(e)) from e
+
+
+def verify_image_bytes(data: bytes | str) -> str:
+    '''Return the format of a valid image, raise InvalidImageError otherwise'''
+    with _open_verified(data) as image:
+        return image.format.lower()
+
+
+def transcode_image(
+        data: bytes | str,
+        widths: tuple[int, ...],
+        formats: tuple[str, ...],
+        quality: int
+) -> ProcessedImage:
+    '''Verify, strip metadata and encode the image at each width and format.
+
+    `data` is the image bytes or the path of a spooled upload. Runs in a
+    worker process. Widths larger than the source are dropped, the
+    source width is used instead so small uploads still get one rendition.
+    EXIF orientation is applied before the metadata is discarded.
+    '''
+    from PIL import Image, ImageOps
+    with _open_verified(data) as source:
+        source_format = source.format.lower()
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        targets = sorted({min(width, image.width) for width in widths})
+        processed = ProcessedImage(
+            width=image.width,
+            height=image.height,
+            source_format=source_format
+        )
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize(
+                (width, height), Image.Resampling.LANCZOS)
+            for image_format in formats:
+                buffer = io.BytesIO()
+                options = {"quality": quality}
+                if image_format == "webp":
+                    options["method"] = 4
+                # No exif or icc_profile is passed, so no metadata is written
+                resized.save(buffer, format=image_format.upper(), **options)
+                processed.renditions.append(Rendition(
+                    width=width,
+                    height=height,
+                    format=image_format,
+                    data=buffer.getvalue()
+                ))
+        return processed
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_semaphore = asyncio.Semaphore(settings.IMAGE_MAX_CONCURRENCY)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+    return _executor
+
+
+async def _run(func, *args):
+    # The semaphore bounds how many uploads wait in memory for the pool
+    async with _semaphore:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+async def verify_image(data: bytes | str) -> str:
+    '''Verify an upload off the event loop and return its format'''
+    return await _run(verify_image_bytes, data)
+
+
+async def process_image(
+        data: bytes | str,
+        widths: Optional[tuple[int, ...]] = None,
+        formats: Optional[tuple[str, ...]] = None
+) -> ProcessedImage:
+    '''Transcode an upload into renditions off the event loop'''
+    return await _run(
+        transcode_image,
+        data,
+        widths or rendition_widths(),
+        formats or output_formats(),
+        settings.IMAGE_QUALITY
+    )
+
+
+def shutdown_image_pool():
+    '''Stop the worker processes'''
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
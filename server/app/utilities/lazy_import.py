@@ -0,0 +1,47 @@
+'''Deferred imports for heavy third-party SDKs
+
+Payment and identity SDKs pull in `requests`, `pkg_resources` and
+crypto backends. Most processes importing the app (workers, CLI jobs,
+tests) never call them, so they are loaded on first use instead of at
+startup.
+'''
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Optional
+
+
+class LazyModule:
+    '''Stands in for a module until one of its attributes is used'''
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr: str):
+        # Only reached for attributes the proxy does not have itself
+        if attr in ("_name", "_module", "_lock"):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    '''Import `name` the first time an attribute of it is used'''
+    return LazyModule(name)
@@ -0,0 +1,192 @@
+'''Deferred, batched deletion of stored media'''
+
+import logging
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from app.config.env_settings import settings
+from app.model.media_models import MediaDeletion
+from app.utilities.media_storage import MAX_DELETE_BATCH, MediaStorage, MediaStorageError, media_storage
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 5.0
+CLAIM_LEASE_SECONDS = 300
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+def retry_delay(attempts: int) -> timedelta:
+    '''Exponential backoff after the given number of failed attempts'''
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+class MediaDeletionWorker:
+    '''Remove stored files in the background, many per provider call.
+
+    Deletes are recorded in the `media_deletions` collection, so they
+    survive restarts, and requests return without waiting for the provider.
+    The worker claims up to `batch_size` due entries at a time, so several
+    processes can drain the same queue, and spaces provider calls to stay
+    under `calls_per_minute`. Failed entries are retried with exponential
+    backoff and marked failed after `max_attempts`.
+    '''
+
+    def __init__(
+            self,
+            storage: MediaStorage,
+            calls_per_minute: int = settings.MEDIA_DELETE_CALLS_PER_MINUTE,
+            max_attempts: int = settings.MEDIA_DELETE_MAX_ATTEMPTS,
+            batch_size: int = MAX_DELETE_BATCH,
+            poll_interval: float = POLL_INTERVAL_SECONDS
+    ):
+        self.storage = storage
+        self.min_interval = 60 / calls_per_minute if calls_per_minute > 0 else 0
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.calls = 0
+        self._last_call: Optional[float] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self):
+        return MediaDeletion.get_motor_collection()
+
+    async def enqueue(self, public_ids: Iterable[str]) -> int:
+        '''Record files to delete, returns how many were new'''
+        public_ids = list(dict.fromkeys(
+            str(public_id) for public_id in public_ids if public_id))
+        if not public_ids:
+            return 0
+        now = datetime.now(timezone.utc)
+        result = await self.collection.bulk_write([
+            UpdateOne(
+                {"backend": self.storage.name, "public_id": public_id},
+                {"$setOnInsert": {
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "claim": None,
+                    "last_error": None,
+                    "failed": False,
+                    "created_at": now
+                }},
+                upsert=True
+            )
+            for public_id in public_ids
+        ], ordered=False)
+        if self._wake is not None:
+            self._wake.set()
+        return result.upserted_count
+
+    async def _throttle(self):
+        loop = asyncio.get_running_loop()
+        if self._last_call is not None:
+            wait = self._last_call + self.min_interval - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        self._last_call = loop.time()
+
+    async def drain_once(self) -> int:
+        '''Delete one batch of due entries, returns how many were claimed'''
+        now = datetime.now(timezone.utc)
+        due = {
+            "backend": self.storage.name,
+            "failed": False,
+            "next_attempt_at": {"$lte": now}
+        }
+        candidates = await self.collection.find(due, projection={"_id": 1}).sort(
+            "next_attempt_at", 1).limit(self.batch_size).to_list(length=None)
+        if not candidates:
+            return 0
+
+        claim = uuid.uuid4().hex
+        await self.collection.update_many(
+            {**due, "_id": {"$in": [candidate["_id"] for candidate in candidates]}},
+            {"$set": {
+                "claim": claim,
+                "next_attempt_at": now + timedelta(seconds=CLAIM_LEASE_SECONDS)
+            }}
+        )
+        claimed = await self.collection.find(
+            {"claim": claim}, projection={"public_id": 1, "attempts": 1}
+        ).to_list(length=None)
+        if not claimed:
+            # Another worker took them first
+            return 0
+
+        await self._throttle()
+        self.calls += 1
+        error = "Not deleted by the storage backend"
+        try:
+            deleted = set(await self.storage.delete_many(
+                [entry["public_id"] for entry in claimed]))
+        except MediaStorageError as e:
+            logger.error("Error deleting media batch: %s", e)
+            deleted = set()
+            error = str(e)
+
+        if deleted:
+            await self.collection.delete_many(
+                {"claim": claim, "public_id": {"$in": list(deleted)}})
+        retries = [
+            UpdateOne(
+                {"_id": entry["_id"], "claim": claim},
+                {"$set": {
+                    "attempts": entry["attempts"] + 1,
+                    "next_attempt_at": now + retry_delay(entry["attempts"] + 1),
+                    "claim": None,
+                    "last_error": error,
+                    "failed": entry["attempts"] + 1 >= self.max_attempts
+                }}
+            )
+            for entry in claimed if entry["public_id"] not in deleted
+        ]
+        if retries:
+            await self.collection.bulk_write(retries, ordered=False)
+        return len(claimed)
+
+    async def _run(self):
+        while True:
+            # Cleared first so an enqueue during the drain is not missed
+            self._wake.clear()
+            try:
+                handled = await self.drain_once()
+            except PyMongoError as e:
+                logger.error("Error draining media deletions: %s", e)
+                handled = 0
+            if handled < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def start(self):
+        '''Start draining in the background of the running loop'''
+        if self._worker is None or self._worker.done():
+            self._wake = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        '''Stop the background task, queued entries stay in the collection'''
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+media_deletions = MediaDeletionWorker(media_storage)
+
+
+async def enqueue_media_deletion(public_ids: Iterable[str]) -> int:
+    '''Delete stored files in the background'''
+    return await media_deletions.enqueue(public_ids)
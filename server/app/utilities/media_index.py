@@ -0,0 +1,144 @@
+'''Content-addressed index of stored images with reference counts'''
+
+import hashlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from starlette.concurrency import run_in_threadpool
+
+from app.model.media_models import MediaAsset
+from app.model.product_models import Image
+from app.utilities.media_deletion import enqueue_media_deletion
+from app.utilities.media_storage import media_storage
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def content_hash_sync(data: bytes | str, variant: str) -> str:
+    '''SHA-256 of the processing variant and the upload.
+
+    `data` is the upload bytes or the path of a spooled upload. The variant
+    names the renditions made from it, so the same bytes processed with
+    other settings are stored separately.
+    '''
+    digest = hashlib.sha256(variant.encode())
+    digest.update(b"\0")
+    if isinstance(data, str):
+        with open(data, "rb") as file:
+            while chunk := file.read(HASH_CHUNK_BYTES):
+                digest.update(chunk)
+    else:
+        digest.update(data)
+    return digest.hexdigest()
+
+
+async def content_hash(data: bytes | str, variant: str) -> str:
+    return await run_in_threadpool(content_hash_sync, data, variant)
+
+
+def _collection():
+    return MediaAsset.get_motor_collection()
+
+
+async def acquire_media(content_hash: str) -> Optional[Image]:
+    '''Take a reference on an already stored upload, None if there is none'''
+    asset = await _collection().find_one_and_update(
+        {
+            "backend": media_storage.name,
+            "content_hash": content_hash,
+            # An asset at zero is being released, it must not be revived
+            "ref_count": {"$gt": 0}
+        },
+        {
+            "$inc": {"ref_count": 1},
+            "$set": {"updated_at": datetime.now(timezone.utc)}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    return Image(**asset["image"]) if asset else None
+
+
+async def register_media(content_hash: str, image: Image) -> Image:
+    '''Index a newly stored upload with one reference.
+
+    If the same upload was stored concurrently, the other copy is used and
+    the files of this one are deleted.
+    '''
+    try:
+        await MediaAsset(
+            backend=media_storage.name,
+            content_hash=content_hash,
+            image=image
+        ).insert()
+        return image
+    except DuplicateKeyError:
+        existing = await acquire_media(content_hash)
+        if existing is None:
+            # The other copy is being released, keep this one unindexed
+            return image
+        await enqueue_media_deletion(image.public_ids())
+        return existing
+
+
+async def release_media(images: Iterable[Image | str]):
+    '''Drop one reference per image and delete the ones no longer used.
+
+    Accepts product images or the public ids of profile images. Images
+    stored before the index existed have a single owner and are deleted
+    right away.
+    '''
+    counts = Counter()
+    stored_ids = {}
+    for image in images:
+        if isinstance(image, str):
+            public_id, public_ids = image, [image]
+        else:
+            public_id, public_ids = image.public_id, image.public_ids()
+        if not public_id:
+            continue
+        counts[public_id] += 1
+        stored_ids[public_id] = public_ids
+    if not counts:
+        return
+
+    collection = _collection()
+    backend = media_storage.name
+    indexed = await collection.find(
+        {"backend": backend, "image.public_id": {"$in": list(counts)}},
+        projection={"image.public_id": 1}
+    ).to_list(length=None)
+    indexed_ids = {asset["image"]["public_id"] for asset in indexed}
+    to_delete = [stored_id
+                 for public_id in counts if public_id not in indexed_ids
+                 for stored_id in stored_ids[public_id]]
+
+    if indexed_ids:
+        await collection.bulk_write([
+            UpdateOne(
+                {"backend": backend, "image.public_id": public_id},
+                {"$inc": {"ref_count": -counts[public_id]}}
+            )
+            for public_id in indexed_ids
+        ], ordered=False)
+        released = await collection.find(
+            {
+                "backend": backend,
+                "image.public_id": {"$in": list(indexed_ids)},
+                "ref_count": {"$lte": 0}
+            }
+        ).to_list(length=None)
+        if released:
+            await collection.delete_many({
+                "_id": {"$in": [asset["_id"] for asset in released]},
+                "ref_count": {"$lte": 0}
+            })
+            to_delete.extend(
+                stored_id
+                for asset in released
+                for stored_id in Image(**asset["image"]).public_ids()
+            )
+
+    await enqueue_media_deletion(to_delete)
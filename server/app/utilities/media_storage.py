@@ -0,0 +1,193 @@
+'''Storage backends for uploaded media'''
+
+import os
+import uuid
+from abc import ABC, abstractmethod
+from asyncio import get_event_loop
+from dataclasses import dataclass
+from functools import partial
+from types import SimpleNamespace
+from typing import Optional
+
+import aiofiles
+import aiofiles.os
+from fastapi.staticfiles import StaticFiles
+
+from app.config.env_settings import settings
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Largest batch the Cloudinary Admin API accepts in one delete call
+MAX_DELETE_BATCH = 100
+
+
+class MediaStorageError(Exception):
+    '''The backend could not store or delete a file'''
+
+
+@dataclass
+class StoredMedia:
+    url: str
+    public_id: str
+
+
+class MediaStorage(ABC):
+    '''Where uploaded images are kept.
+
+    `public_id` is whatever the backend needs to delete the file later, it
+    is stored next to the url on users, admins and product images.
+    '''
+    name: str
+
+    @abstractmethod
+    async def save(self, data: bytes, folder: str, extension: str) -> StoredMedia:
+        '''Store the bytes under folder and return where they are served'''
+
+    @abstractmethod
+    async def delete(self, public_id: str) -> bool:
+        '''Remove a file, returns False if it did not exist'''
+
+    async def delete_many(self, public_ids: list[str]) -> list[str]:
+        '''Remove up to MAX_DELETE_BATCH files.
+
+        Returns the ids that are gone now, including ones that were already
+        missing; ids left out should be retried.
+        '''
+        for public_id in public_ids:
+            await self.delete(public_id)
+        return list(public_ids)
+
+
+class CloudinaryStorage(MediaStorage):
+    '''Cloudinary through its blocking SDK, run on the default executor'''
+    name = "cloudinary"
+
+    def __init__(self):
+        self._sdk: Optional[SimpleNamespace] = None
+
+    def _load(self) -> SimpleNamespace:
+        '''Import and configure the SDK on first use.
+
+        Not at startup, so the local backend works without Cloudinary
+        settings and processes that store nothing skip the import.
+        '''
+        if self._sdk is None:
+            from cloudinary.uploader import upload, destroy
+            from cloudinary.api import delete_resources
+            from cloudinary.exceptions import Error as CloudinaryError
+            from app.config.cloudinary_config import cloudinary  # noqa: F401, configures the SDK
+            self._sdk = SimpleNamespace(
+                upload=upload,
+                destroy=destroy,
+                delete_resources=delete_resources,
+                error=CloudinaryError
+            )
+        return self._sdk
+
+    async def save(self, data: bytes, folder: str, extension: str) -> StoredMedia:
+        sdk = self._load()
+        try:
+            loop = get_event_loop()
+            result = await loop.run_in_executor(None, partial(
+                sdk.upload,
+                data,
+                folder=folder,
+                resource_type="image"
+            ))
+        except sdk.error as e:
+            raise MediaStorageError(str(e)) from e
+        return StoredMedia(url=result["secure_url"], public_id=result["public_id"])
+
+    async def delete(self, public_id: str) -> bool:
+        sdk = self._load()
+        try:
+            loop = get_event_loop()
+            result = await loop.run_in_executor(None, partial(sdk.destroy, public_id))
+        except sdk.error as e:
+            raise MediaStorageError(str(e)) from e
+        return result.get("result") == "ok"
+
+    async def delete_many(self, public_ids: list[str]) -> list[str]:
+        sdk = self._load()
+        try:
+            loop = get_event_loop()
+            result = await loop.run_in_executor(None, partial(
+                sdk.delete_resources,
+                list(public_ids),
+                resource_type="image"
+            ))
+        except sdk.error as e:
+            raise MediaStorageError(str(e)) from e
+        # Both "deleted" and "not_found" mean the file is gone
+        deleted = result.get("deleted", {})
+        return [public_id for public_id in public_ids if public_id in deleted]
+
+
+class LocalStorage(MediaStorage):
+    '''Files on local disk, served by `MediaFiles`.
+
+    Names are random, so a stored file never changes and can be cached
+    forever. Writes go to a temporary name first so a reader never sees a
+    partial file.
+    '''
+    name = "local"
+
+    def __init__(self, root: str, url_prefix: str):
+        self.root = os.path.abspath(root)
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def path(self, public_id: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, public_id))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise MediaStorageError(f"Invalid media id: {public_id}")
+        return path
+
+    async def save(self, data: bytes, folder: str, extension: str) -> StoredMedia:
+        public_id = f"{folder.strip('/')}/{uuid.uuid4().hex}.{extension}"
+        path = self.path(public_id)
+        partial_path = f"{path}.part"
+        try:
+            await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+            async with aiofiles.open(partial_path, "wb") as file:
+                await file.write(data)
+            await aiofiles.os.replace(partial_path, path)
+        except OSError as e:
+            raise MediaStorageError(str(e)) from e
+        return StoredMedia(url=f"{self.url_prefix}/{public_id}", public_id=public_id)
+
+    async def delete(self, public_id: str) -> bool:
+        try:
+            await aiofiles.os.remove(self.path(public_id))
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            raise MediaStorageError(str(e)) from e
+
+
+class MediaFiles(StaticFiles):
+    '''StaticFiles for stored media with long-lived caching.
+
+    Range requests, ETag and Last-Modified come from Starlette; stored files
+    never change, so they are marked immutable as well.
+    '''
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+def build_media_storage() -> MediaStorage:
+    '''Create the backend selected by MEDIA_STORAGE (cloudinary or local)'''
+    backend = settings.MEDIA_STORAGE.lower()
+    if backend == "cloudinary":
+        return CloudinaryStorage()
+    if backend == "local":
+        return LocalStorage(
+            settings.MEDIA_ROOT,
+            f"{settings.MEDIA_BASE_URL or ''}{settings.MEDIA_URL_PATH}"
+        )
+    raise ValueError(f"Unknown MEDIA_STORAGE: {settings.MEDIA_STORAGE}")
+
+
+media_storage = build_media_storage()
@@ -0,0 +1,164 @@
+import logging
+from fastapi import HTTPException, status
+
+from asyncio import gather
+
+from app.config.env_settings import settings
+from app.model.product_models import Image, ImageRendition
+from app.utilities.image_pipeline import (
+    InvalidImageError,
+    output_formats,
+    process_image,
+    rendition_widths,
+    verify_image
+)
+from app.utilities.media_index import acquire_media, content_hash, register_media
+from app.utilities.media_storage import MediaStorageError, StoredMedia, media_storage
+
+logger = logging.getLogger(__name__)
+
+INVALID_IMAGE_MESSAGE = "Invalid file type. Only image files of (jpeg, jpg, png, webp) are allowed."
+
+
+def _variant(kind: str, widths: tuple[int, ...], formats: tuple[str, ...]) -> str:
+    '''Processing settings that go into the content hash'''
+    return f"{kind}:{','.join(map(str, widths))}:{','.join(formats)}:{settings.IMAGE_QUALITY}"
+
+
+async def validate_image(file: bytes) -> bool:
+    """
+    Validate whether the uploaded file is an image.
+    Decoding runs in the image worker pool, not on the event loop.
+
+    :param file: File bytes
+    :return: True if the file is an image, False otherwise
+    """
+    try:
+        await verify_image(file)
+        return True
+    except InvalidImageError as e:
+        logger.error("Validate Image error: %s", e)
+        return False
+
+
+async def update_profile_image(file: bytes | str, folder: str = "solestore_ecommerce_app/users") -> StoredMedia:
+    """
+        Re-encode an image to a single WebP and store it.
+
+        :param file: Image file bytes or the path of a spooled upload
+        :param folder: Folder path in the media storage
+        :return: url and public id of the stored image, shared with
+            earlier uploads of the same bytes
+        """
+
+    widths, formats = (settings.PROFILE_IMAGE_WIDTH,), ("webp",)
+    # The same picture uploaded again reuses the stored file
+    key = await content_hash(file, _variant("profile", widths, formats))
+    existing = await acquire_media(key)
+    if existing:
+        return StoredMedia(url=existing.url, public_id=existing.public_id)
+
+    try:
+        processed = await process_image(file, widths=widths, formats=formats)
+    except InvalidImageError as e:
+        raise ValueError(INVALID_IMAGE_MESSAGE) from e
+
+    try:
+        largest = processed.largest()
+        stored = await media_storage.save(largest.data, folder, "webp")
+    except MediaStorageError as e:
+        logger.error("Error storing profile image: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail="Error updating prfoile image"
+        ) from e
+
+    image = await register_media(key, Image(
+        url=stored.url,
+        public_id=stored.public_id,
+        width=largest.width,
+        height=largest.height
+    ))
+    return StoredMedia(url=image.url, public_id=image.public_id)
+
+
+async def upload_image_renditions(file: bytes | str, folder: str) -> Image:
+    """
+    Re-encode an image at every rendition width and store each one.
+
+    :param file: Image file bytes or the path of a spooled upload
+    :param folder: Folder path in the media storage
+    :return: Image whose url is the largest rendition in the first output
+        format, shared with earlier uploads of the same bytes
+    """
+    widths, formats = rendition_widths(), output_formats()
+    # Uploads already stored, e.g. the same shot for several colorways,
+    # are not processed or uploaded again
+    key = await content_hash(file, _variant("product", widths, formats))
+    existing = await acquire_media(key)
+    if existing:
+        return existing
+
+    try:
+        processed = await process_image(file, widths=widths, formats=formats)
+    except InvalidImageError as e:
+        raise ValueError(INVALID_IMAGE_MESSAGE) from e
+
+    results = await gather(
+        *(media_storage.save(rendition.data, folder, rendition.format)
+          for rendition in processed.renditions),
+        return_exceptions=True
+    )
+    failed = [result for result in results if isinstance(result, Exception)]
+    if failed:
+        # Do not leave half of an image behind
+        await gather(
+            *(delete_image(result.public_id)
+              for result in results if not isinstance(result, Exception)),
+            return_exceptions=True
+        )
+        logger.error("Error storing image renditions: %s", failed[0])
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail="Error uploading image"
+        ) from failed[0]
+
+    renditions = [
+        ImageRendition(
+            width=rendition.width,
+            height=rendition.height,
+            format=rendition.format,
+            url=result.url,
+            public_id=result.public_id
+        )
+        for rendition, result in zip(processed.renditions, results)
+    ]
+    # The first configured format is the one every client can display
+    primary = max(
+        (rendition for rendition in renditions if rendition.format == formats[0]),
+        key=lambda rendition: rendition.width
+    )
+    return await register_media(key, Image(
+        url=primary.url,
+        public_id=primary.public_id,
+        width=primary.width,
+        height=primary.height,
+        renditions=renditions
+    ))
+
+
+async def delete_image(public_id: str):
+    """
+    Delete an image from the media storage.
+
+    :param public_id: The public ID of the image
+    :return: True if the image existed
+    """
+    try:
+        return await media_storage.delete(public_id)
+    except MediaStorageError as e:
+        logger.error("Error deleting image: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_417_EXPECTATION_FAILED,
+            detail="Error updating prfoile image"
+        ) from e
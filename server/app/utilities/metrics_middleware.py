@@ -0,0 +1,118 @@
+'''Request metrics and per-request Mongo round trips'''
+
+import logging
+import time
+from collections import Counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.metrics import (
+    DbStats,
+    current_db_stats,
+    http_db_roundtrips,
+    http_in_flight,
+    http_latency,
+    http_requests,
+    repeated_queries
+)
+from app.utilities.query_detector import RequestQueries, find_repeated, record_request, recording
+
+logger = logging.getLogger(__name__)
+
+DB_ROUNDTRIPS_HEADER = "X-DB-Roundtrips"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+# Most times one query shape was issued, sent when shapes are kept
+DB_REPEATED_HEADER = "X-DB-Max-Repeated-Query"
+
+
+def route_label(scope: Scope, root_path: str) -> str:
+    '''The route template a request matched, so paths with ids share a label'''
+    route = scope.get("route")
+    if route is not None and hasattr(route, "path"):
+        return route.path
+    # Mounts, like the asset directories and the socket app, set root_path
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return f"{mounted[len(root_path):]}/*"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    '''Record latency, status and Mongo round trips for each HTTP request.
+
+    Latency is measured to the end of the response body. With
+    `debug_headers`, the number of Mongo commands issued before the
+    response started and their total time are sent as headers, so an N+1
+    query pattern shows up in the browser's network tab. With
+    `detect_repeated_queries`, a request issuing one query shape
+    `repeated_query_threshold` times or more is logged and counted.
+    '''
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            debug_headers: bool = True,
+            detect_repeated_queries: bool = False,
+            repeated_query_threshold: int = 5
+    ):
+        self.app = app
+        self.debug_headers = debug_headers
+        self.detect_repeated_queries = detect_repeated_queries
+        self.repeated_query_threshold = repeated_query_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        keep_shapes = self.detect_repeated_queries or recording()
+        stats = DbStats(shapes=Counter() if keep_shapes else None)
+        token = current_db_stats.set(stats)
+        status = 500
+
+        async def send_with_metrics(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.debug_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers[DB_ROUNDTRIPS_HEADER] = str(stats.commands)
+                    headers[DB_TIME_HEADER] = f"{stats.seconds * 1000:.1f}"
+                    if stats.shapes:
+                        headers[DB_REPEATED_HEADER] = str(max(stats.shapes.values()))
+            await send(message)
+
+        http_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_db_stats.reset(token)
+            http_in_flight.dec(method)
+            route = route_label(scope, root_path)
+            http_requests.inc(method, route, str(status))
+            http_latency.observe(elapsed, method, route)
+            http_db_roundtrips.observe(stats.commands, method, route)
+            if self.detect_repeated_queries:
+                self._flag_repeated(method, route, stats)
+            if recording():
+                record_request(RequestQueries(
+                    method=method,
+                    route=route,
+                    status=status,
+                    commands=stats.commands,
+                    shapes=stats.shapes or Counter()
+                ))
+
+    def _flag_repeated(self, method: str, route: str, stats: DbStats):
+        repeated = find_repeated(stats.shapes, self.repeated_query_threshold)
+        if repeated:
+            repeated_queries.inc(method, route)
+            for shape, count in repeated.items():
+                logger.warning(
+                    "Repeated query in %s %s: %sx %s", method, route, count, shape,
+                    extra={"route": route, "shape": shape, "count": count})
@@ -0,0 +1,86 @@
+'''Short-lived cache of authenticated principals'''
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from app.config.env_settings import settings
+
+MAX_CACHED_PRINCIPALS = 10000
+
+
+class PrincipalCache:
+    '''Cache user and admin lookups for a few seconds.
+
+    Socket reconnects after a deploy authenticate the same principals over
+    and over. Entries expire after `ttl` seconds and concurrent lookups for
+    the same principal share a single database query. Errors are never
+    cached, so a missing user is looked up again on the next attempt.
+    '''
+
+    def __init__(self, ttl: float, max_entries: int = MAX_CACHED_PRINCIPALS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._loading: dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if len(self._entries) >= self.max_entries:
+            # Dicts keep insertion order, drop the oldest entry
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        '''Return the cached principal or load it, once per key at a time'''
+        if self.ttl <= 0:
+            return await loader()
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it, nobody else has to retrieve it
+            future.exception()
+            raise
+        else:
+            if value is not None:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if not future.done():
+                future.cancel()
+            del self._loading[key]
+
+
+principal_cache = PrincipalCache(ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS)
@@ -0,0 +1,117 @@
+'''Repeated query detection for development and tests.
+
+Every Mongo command issued while a request is handled is reduced to a
+shape: the command, the collection and the structure of its filter with
+the values left out. The same shape issued many times in one request is
+the N+1 pattern, e.g. `fetch_all_links` called for each product of a page.
+'''
+
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Parts of each command that decide which documents it touches
+SHAPED_FIELDS = {
+    "find": ("filter", "projection", "sort"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "countDocuments": ("query",),
+    "distinct": ("query",),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+    "insert": ()
+}
+
+
+def _structure(value):
+    if isinstance(value, dict):
+        return {key: _structure(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # $in with one id or fifty is the same query
+        return [_structure(value[0])] if value else []
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> Optional[str]:
+    '''The shape of a command, None for commands that are not queries'''
+    fields = SHAPED_FIELDS.get(command_name)
+    if fields is None:
+        return None
+    collection = command.get(command_name)
+    parts = {name: _structure(command[name]) for name in fields if name in command}
+    return f"{command_name} {collection} {json.dumps(parts, sort_keys=True)}"
+
+
+def find_repeated(shapes: Counter, threshold: int) -> dict[str, int]:
+    '''Shapes issued at least `threshold` times'''
+    return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+@dataclass
+class RequestQueries:
+    '''Mongo commands of one handled request'''
+    method: str
+    route: str
+    status: int
+    commands: int
+    # Commands per shape, empty when the detector is off
+    shapes: Counter = field(default_factory=Counter)
+
+
+class QueryBudgetExceeded(AssertionError):
+    '''A request issued more commands than its budget'''
+
+
+class QueryRecorder:
+    '''Collect the queries of every request handled while it is active.
+
+    Used as a context manager by the `query_budget` test marker and the
+    `query_recorder` fixture.
+    '''
+
+    def __init__(self):
+        self.requests: list[RequestQueries] = []
+
+    def __enter__(self) -> "QueryRecorder":
+        _recorders.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        _recorders.remove(self)
+
+    def for_route(self, route: str) -> list[RequestQueries]:
+        return [request for request in self.requests if request.route == route]
+
+    def assert_budget(self, route: str, max_queries: int, max_repeats: Optional[int] = None):
+        '''Fail if a request to `route` went over budget, or none was made.
+
+        `max_repeats` limits how often one query shape may be issued.
+        '''
+        requests = self.for_route(route)
+        if not requests:
+            raise QueryBudgetExceeded(f"No request to {route} was recorded")
+        for request in requests:
+            if request.commands > max_queries:
+                raise QueryBudgetExceeded(
+                    f"{request.method} {route} issued {request.commands} Mongo commands, "
+                    f"the budget is {max_queries}")
+            if max_repeats is not None:
+                for shape, count in request.shapes.items():
+                    if count > max_repeats:
+                        raise QueryBudgetExceeded(
+                            f"{request.method} {route} repeated {shape} {count} times, "
+                            f"the limit is {max_repeats}")
+
+
+_recorders: list[QueryRecorder] = []
+
+
+def record_request(request: RequestQueries):
+    for recorder in _recorders:
+        recorder.requests.append(request)
+
+
+def recording() -> bool:
+    return bool(_recorders)
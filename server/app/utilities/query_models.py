@@ -2,9 +2,10 @@
 
 from enum import Enum
 from typing import Optional
+from datetime import datetime
 
 from app.admin_app.admin_models.admin import AdminRole
-from app.model.order_models import OrderStatus
+from app.model.order_models import OrderStatus, RollupDimension
 
 
 from pydantic import BaseModel, Field, field_validator
@@ -87,6 +88,10 @@ class CartQueryParams(BaseModel):
         description="Page number"
     )
     search: Optional[str] = None
+    revalidate: bool = Field(
+        default=False,
+        description="Report and correct stale prices and stock in the response, without saving"
+    )
 
 
 class OrderQueryParams(BaseModel):
@@ -96,3 +101,28 @@ class OrderQueryParams(BaseModel):
         description="Page number"
     )
     order_status: Optional[OrderStatus] = None
+    summary: bool = Field(
+        default=False,
+        description="Return compact order summaries without the cart snapshot"
+    )
+
+
+class OrderAnalyticsQueryParams(BaseModel):
+    '''Query params for order rollups'''
+    dimension: RollupDimension = RollupDimension.ALL
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    key: Optional[str] = None
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class OrderExportQueryParams(BaseModel):
+    '''Query params for the order export'''
+    export_format: ExportFormat = ExportFormat.csv
+    order_status: Optional[OrderStatus] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
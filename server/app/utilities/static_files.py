@@ -0,0 +1,193 @@
+'''Serving the built React apps: cached index shells and hashed assets'''
+
+import gzip
+import hashlib
+import os
+import re
+import stat
+import sys
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import anyio
+import brotli
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Scope
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# The shell names the current asset hashes, so it is always revalidated
+SHELL_CACHE_CONTROL = "no-cache"
+# Vite names built assets like index-C0ffee12.js
+HASHED_ASSET = re.compile(r"-[A-Za-z0-9_-]{8,}\.[a-z0-9]+$")
+# Preferred first
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_EXTENSIONS = (".js", ".mjs", ".css", ".html", ".svg", ".json", ".txt", ".map")
+
+
+def accepted_encodings(headers: Headers) -> set[str]:
+    '''Content codings the client accepts, q=0 entries excluded'''
+    accepted = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        params = params.replace(" ", "")
+        if coding and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+def rewrite_admin_asset_paths(content: str) -> str:
+    '''Point the admin build at the /admin-assets mount'''
+    return (
+        content
+        .replace('src="assets/', 'src="/admin-assets/')
+        .replace('href="assets/', 'href="/admin-assets/')
+        .replace('src="/assets/', 'src="/admin-assets/')
+        .replace('href="/assets/', 'href="/admin-assets/')
+    )
+
+
+@dataclass
+class _ShellVariants:
+    mtime_ns: int
+    etag: str
+    bodies: dict[str, bytes]
+
+
+class SpaShell:
+    '''The index.html of a single page app, read once and kept compressed.
+
+    The file is rewritten and compressed with brotli and gzip when first
+    needed and again only when its modification time changes, so a
+    navigation costs a stat call instead of a read and four replaces.
+    '''
+
+    def __init__(self, index_path: str, rewrite: Optional[Callable[[str], str]] = None):
+        self.index_path = index_path
+        self.rewrite = rewrite
+        self._variants: Optional[_ShellVariants] = None
+
+    def _load(self) -> Optional[_ShellVariants]:
+        try:
+            mtime_ns = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            self._variants = None
+            return None
+        if self._variants is not None and self._variants.mtime_ns == mtime_ns:
+            return self._variants
+
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        if self.rewrite:
+            content = self.rewrite(content)
+        body = content.encode("utf-8")
+        self._variants = _ShellVariants(
+            mtime_ns=mtime_ns,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            bodies={
+                "br": brotli.compress(body, quality=11, mode=brotli.MODE_TEXT),
+                "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+                "identity": body
+            }
+        )
+        return self._variants
+
+    @property
+    def available(self) -> bool:
+        return self._load() is not None
+
+    def response(self, headers: Headers) -> Optional[Response]:
+        '''The shell in the best encoding the client accepts, None if not built'''
+        variants = self._load()
+        if variants is None:
+            return None
+
+        response_headers = {
+            "ETag": variants.etag,
+            "Cache-Control": SHELL_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+        if_none_match = headers.get("if-none-match", "")
+        if variants.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=response_headers)
+
+        accepted = accepted_encodings(headers)
+        encoding = next(
+            (encoding for encoding, _ in SIDECARS if encoding in accepted), "identity")
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(
+            content=variants.bodies[encoding],
+            media_type="text/html",
+            headers=response_headers
+        )
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    '''StaticFiles for Vite build output.
+
+    Serves a `.br` or `.gz` file written next to an asset when the client
+    accepts it, and marks content-hashed files immutable.
+    '''
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = None
+        if scope["method"] in ("GET", "HEAD"):
+            response = await self._sidecar_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        response.headers["Vary"] = "Accept-Encoding"
+        if response.status_code in (200, 206, 304) and HASHED_ASSET.search(path):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    async def _sidecar_response(self, path: str, scope: Scope) -> Optional[Response]:
+        accepted = accepted_encodings(Headers(scope=scope))
+        for encoding, suffix in SIDECARS:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(
+                self.lookup_path, path + suffix)
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                continue
+            # The media type is guessed from the name without the suffix
+            response = self.file_response(full_path, stat_result, scope)
+            if response.status_code != 304:
+                response.headers["Content-Encoding"] = encoding
+            return response
+        return None
+
+
+def precompress_directory(directory: str, min_bytes: int = 1024) -> int:
+    '''Write .br and .gz files next to compressible build output.
+
+    Run after `npm run build`; returns how many files were compressed.
+    Sidecars that would not be smaller than the original are not kept.
+    '''
+    compressed = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < min_bytes:
+                continue
+            for suffix, body in (
+                (".br", brotli.compress(data, quality=11)),
+                (".gz", gzip.compress(data, compresslevel=9, mtime=0))
+            ):
+                if len(body) < len(data):
+                    with open(path + suffix, "wb") as f:
+                        f.write(body)
+            compressed += 1
+    return compressed
+
+
+if __name__ == "__main__":
+    for build_dir in sys.argv[1:]:
+        count = precompress_directory(build_dir)
+        print(f"Precompressed {count} files in {build_dir}")
@@ -0,0 +1,138 @@
+'''Bounded-memory handling of multipart uploads'''
+
+import os
+import tempfile
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import AsyncIterator
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.env_settings import settings
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+INVALID_IMAGE_DETAIL = "Only jpeg, png and webp images are accepted"
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    '''Identify an allowed image from its first bytes'''
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File is larger than {max_bytes // (1024 * 1024)} MB"
+    )
+
+
+@asynccontextmanager
+async def spool_image_upload(upload: UploadFile, max_bytes: int = None) -> AsyncIterator[str]:
+    '''Copy an uploaded image to a temporary file in chunks and yield its path.
+
+    The header is checked on the first chunk and the size limit on every
+    chunk, so bad uploads are rejected without reading them whole. The file
+    is removed on exit. Image processing opens it by path, so the bytes are
+    never held in memory or sent to the worker processes.
+    '''
+    max_bytes = max_bytes or settings.MAX_IMAGE_UPLOAD_BYTES
+    spooled = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+    try:
+        size = 0
+        while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+            if size == 0 and sniff_image_type(chunk) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=INVALID_IMAGE_DETAIL
+                )
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            await run_in_threadpool(spooled.write, chunk)
+        if size == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=INVALID_IMAGE_DETAIL
+            )
+        spooled.close()
+        yield spooled.name
+    finally:
+        spooled.close()
+        try:
+            os.unlink(spooled.name)
+        except FileNotFoundError:
+            pass
+
+
+@asynccontextmanager
+async def spool_image_uploads(uploads: list[UploadFile], max_bytes: int = None) -> AsyncIterator[list[str]]:
+    '''Spool several uploads, one after another, and yield their paths'''
+    async with AsyncExitStack() as stack:
+        paths = []
+        for upload in uploads:
+            paths.append(await stack.enter_async_context(
+                spool_image_upload(upload, max_bytes)))
+        yield paths
+
+
+class UploadSizeLimitMiddleware:
+    '''Reject multipart bodies over a size limit while they stream in.
+
+    A declared Content-Length over the limit is refused before anything is
+    read; otherwise the received bytes are counted and the request fails
+    with 413 as soon as the limit is passed, before the rest is spooled.
+    '''
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        if not content_type.startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send: Send):
+        body = b'{"detail":"Request body is too large"}'
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close")
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})